@@ -0,0 +1,214 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import zlib
+from game.headless import setup_headless, run_frames, KeyState, key_event, click_event
+from mods.my_config import GAME_CONFIG
+from mods.my_blocks import BLOCKS
+from mods.my_player import PLAYER_CONFIG
+
+# Замеры производительности игрового цикла без окна
+# Запуск: python3 benchmark.py --output results.json
+# Каждый сценарий прогоняет игру заданное число кадров и сохраняет время каждого этапа кадра
+
+setup_headless()
+import pygame
+from game.engine import GameEngine
+from game.replay import InputReplay
+
+def walk_scenario(args, rng):
+    """Игрок бежит вправо через широкий мир"""
+    keys = KeyState([pygame.K_RIGHT])
+
+    def script(frame, engine):
+        return [key_event(pygame.K_SPACE)], keys # Всё время прыгаем, чтобы перепрыгивать деревья
+
+    config = {'WORLD_WIDTH': args.width or 10000, 'WORLD_HEIGHT': args.height or 50}
+    return config, BLOCKS, {'SPEED': 20, 'JUMP_POWER': 22}, script
+
+def stream_scenario(args, rng):
+    """Игрок долго бежит вправо по бесконечному миру - память должна оставаться на месте"""
+    keys = KeyState([pygame.K_RIGHT])
+
+    def script(frame, engine):
+        return [key_event(pygame.K_SPACE)], keys
+
+    config = {'INFINITE_WORLD': True, 'WORLD_HEIGHT': args.height or 50, 'WORLD_MEMORY_MB': 1}
+    return config, BLOCKS, {'SPEED': 40, 'JUMP_POWER': 22}, script
+
+def edit_scenario(args, rng):
+    """Массовое разрушение и постановка блоков вокруг игрока"""
+    idle = KeyState()
+    screen_width = GAME_CONFIG['SCREEN_WIDTH']
+    screen_height = GAME_CONFIG['SCREEN_HEIGHT'] - 60 # Без панели UI
+
+    def script(frame, engine):
+        events = []
+        for _ in range(20):
+            pos = (rng.randrange(screen_width), rng.randrange(screen_height))
+            events.append(click_event(pos, rng.choice([1, 3])))
+        return events, idle
+
+    config = {'WORLD_WIDTH': args.width or 1000, 'WORLD_HEIGHT': args.height or 50}
+    return config, BLOCKS, {}, script
+
+def hud_scenario(args, rng):
+    """Большой инвентарь, который меняется каждый кадр"""
+    blocks = dict(BLOCKS)
+    for i in range(12): # Дополнительные блоки без текстур (рисуются цветом)
+        blocks[f'bench_{i}'] = {'name': f'Блок {i}', 'breakable': True, 'solid': True}
+    number_keys = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5,
+                   pygame.K_6, pygame.K_7, pygame.K_8]
+    idle = KeyState()
+    screen_width = GAME_CONFIG['SCREEN_WIDTH']
+    screen_height = GAME_CONFIG['SCREEN_HEIGHT'] - 60
+
+    def script(frame, engine):
+        events = [key_event(number_keys[frame % len(number_keys)])]
+        pos = (rng.randrange(screen_width), rng.randrange(screen_height))
+        events.append(click_event(pos, 1 if frame % 2 else 3))
+        return events, idle
+
+    config = {'WORLD_WIDTH': args.width or 1000, 'WORLD_HEIGHT': args.height or 50}
+    return config, blocks, {}, script
+
+def mobs_scenario(args, rng):
+    """Тысячи мобов ходят по всему миру (MOB_SIM_DISTANCE с запасом - двигаются все, а не только у экрана)"""
+    idle = KeyState()
+
+    def script(frame, engine):
+        return [], idle
+
+    width = args.width or 1000
+    config = {'WORLD_WIDTH': width, 'WORLD_HEIGHT': args.height or 50,
+              'MOB_COUNT': args.mobs, 'MOB_SIM_DISTANCE': width}
+    return config, BLOCKS, {}, script
+
+def zoom_scenario(args, rng):
+    """Камера отдалена так, что виден весь мир (10000 блоков); игрок бежит и ломает/ставит блоки"""
+    keys = KeyState([pygame.K_RIGHT])
+    screen_width = GAME_CONFIG['SCREEN_WIDTH']
+    screen_height = GAME_CONFIG['SCREEN_HEIGHT'] - 60
+
+    def script(frame, engine):
+        events = [key_event(pygame.K_SPACE)]
+        if frame == 0: # Отдаляем камеру до упора
+            events += [key_event(pygame.K_MINUS)] * 30
+        for _ in range(5):
+            pos = (rng.randrange(screen_width), rng.randrange(screen_height))
+            events.append(click_event(pos, rng.choice([1, 3])))
+        return events, keys
+
+    config = {'WORLD_WIDTH': args.width or 10000, 'WORLD_HEIGHT': args.height or 50}
+    return config, BLOCKS, {'SPEED': 20, 'JUMP_POWER': 22}, script
+
+SCENARIOS = {
+    'walk': walk_scenario,
+    'stream': stream_scenario,
+    'edit': edit_scenario,
+    'hud': hud_scenario,
+    'mobs': mobs_scenario,
+    'zoom': zoom_scenario,
+}
+
+def run_scenario(name, args):
+    """Создает игру для сценария и прогоняет его"""
+    rng = random.Random(args.seed)
+    config_overrides, blocks, player_overrides, script = SCENARIOS[name](args, rng)
+    config = dict(GAME_CONFIG, SAVE_FILE=None, **config_overrides) # Замеры не трогают сохранение игрока
+    player_config = dict(PLAYER_CONFIG, **player_overrides)
+
+    start = time.perf_counter()
+    engine = GameEngine(config, blocks, player_config)
+    startup = time.perf_counter() - start
+
+    result = run_frames(engine, args.frames, script)
+    result['scenario'] = name
+    result['startup_ms'] = startup * 1000
+    result['first_frame_ms'] = engine.time_to_first_frame * 1000
+    result['startup'] = engine.startup.report() # Из чего сложилось время до первого кадра
+    result['world'] = [engine.world.width, engine.world.height]
+    if hasattr(engine.world, 'resident_bytes'):
+        result['world_resident_bytes'] = engine.world.resident_bytes()
+    engine.world.close()
+    return result
+
+def run_replay(path):
+    """Повторяет записанную игру (RECORD_INPUT) с максимальной скоростью - кадр в кадр как при записи"""
+    replay = InputReplay(path)
+    config = dict(GAME_CONFIG, **replay.header['config'])
+    player_config = dict(PLAYER_CONFIG, **replay.header['player'])
+
+    start = time.perf_counter()
+    engine = GameEngine(config, BLOCKS, player_config)
+    startup = time.perf_counter() - start
+
+    result = run_frames(engine, len(replay), replay.script, replay.frame_times)
+    result['scenario'] = f'replay {path}'
+    result['startup_ms'] = startup * 1000
+    result['first_frame_ms'] = engine.time_to_first_frame * 1000
+    result['startup'] = engine.startup.report()
+    result['world'] = [engine.world.width, engine.world.height]
+    # По итоговому состоянию видно, что повтор прошел так же, как запись
+    result['final_player'] = [engine.player['x'], engine.player['y']]
+    if engine.world.width is not None:
+        cells = engine.world.get_region(0, 0, engine.world.width, engine.world.height)
+        result['final_world_crc32'] = zlib.crc32(cells.tobytes())
+    engine.world.close()
+    return result
+
+def print_result(result):
+    """Выводит краткую таблицу результатов сценария"""
+    print(f"{result['scenario']}: {result['fps']:.1f} FPS, "
+          f"кадр {result['frame']['mean_ms']:.2f} мс (p99 {result['frame']['p99_ms']:.2f} мс), "
+          f"первый кадр через {result['first_frame_ms']:.0f} мс",
+          file=sys.stderr)
+    for phase, stats in result['phases'].items():
+        print(f"  {phase:<8} mean {stats['mean_ms']:7.3f}  p50 {stats['p50_ms']:7.3f}  "
+              f"p99 {stats['p99_ms']:7.3f} мс", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности игры без окна')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Сценарий (можно указать несколько раз, по умолчанию - все)')
+    parser.add_argument('--frames', type=int, default=600, help='Число кадров в сценарии')
+    parser.add_argument('--width', type=int, help='Ширина мира в блоках')
+    parser.add_argument('--height', type=int, help='Высота мира в блоках')
+    parser.add_argument('--mobs', type=int, default=5000, help='Число мобов в сценарии mobs')
+    parser.add_argument('--replay', action='append', default=[],
+                        help='Повторить записанную игру (файл RECORD_INPUT); можно указать несколько раз')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно случайных чисел для сценариев')
+    parser.add_argument('--output', help='Файл для результатов в формате JSON (по умолчанию - stdout)')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or ([] if args.replay else list(SCENARIOS)):
+        result = run_scenario(name, args)
+        print_result(result)
+        results.append(result)
+        pygame.quit()
+    for path in args.replay:
+        result = run_replay(path)
+        print_result(result)
+        results.append(result)
+        pygame.quit()
+
+    report = {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'frames': args.frames,
+        'seed': args.seed,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
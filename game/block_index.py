@@ -0,0 +1,148 @@
+import numpy as np
+from collections import OrderedDict
+
+# Индекс блоков по типам: сколько блоков каждого типа лежит в каждом чанке мира.
+# Хранится полосами (столбцы чанков на всю высоту мира): counts[строка чанка, ID блока].
+# Полоса считается при первом запросе, который её касается, а изменения мира (place_block,
+# break_block, правки участков, падающие блоки) пересчитывают только задетые чанки полосы.
+# Полос в памяти не больше, чем позволяет лимит: давно не нужные забываются и считаются
+# заново при следующем запросе (в бесконечном мире память не растет с пройденным путем).
+#
+# Запросы не просматривают мир целиком: чанк, где нужного блока нет (счетчик равен 0),
+# пропускается сразу; чанк, целиком попавший в прямоугольник, берет ответ из счетчика;
+# клетки перебираются только в чанках на краю прямоугольника или там, где блок точно есть
+
+class BlockIndex:
+    def __init__(self, world, chunk_size=16, max_distance=256, max_bytes=4 * 1024 * 1024):
+        """Инициализация (max_distance - как далеко в столбцах ищет nearest в бесконечном мире, max_bytes - лимит памяти счетчиков)"""
+        self.world = world
+        self.chunk_size = chunk_size
+        self.max_distance = max_distance
+        self.max_bytes = max_bytes
+        self.rows = (world.height + chunk_size - 1) // chunk_size # Чанков в полосе по вертикали
+        self.strips = OrderedDict() # Номер полосы -> counts[строка чанка, ID блока], в порядке последнего использования
+        world.add_listener(self.on_world_changed)
+
+    def type_count(self):
+        return len(self.world.registry.names)
+
+    def count_cells(self, strip, y0, y1):
+        """Считает блоки по чанкам в строках [y0, y1) полосы: counts[строка чанка, ID блока]"""
+        size = self.chunk_size
+        types = self.type_count()
+        cells = self.world.get_region(strip * size, y0, (strip + 1) * size, y1)
+        rows = (y1 - 1) // size - y0 // size + 1
+        if cells.size == 0:
+            return np.zeros((rows, types), dtype=np.int32)
+        # Номер строки чанка и ID блока складываются в один ключ - и все чанки считаются одним bincount
+        chunk_rows = (np.arange(y0, y1) // size - y0 // size)[:, None] * types
+        keys = (chunk_rows + cells).ravel()
+        return np.bincount(keys, minlength=rows * types).reshape(rows, types).astype(np.int32)
+
+    def get_strip(self, strip):
+        """Счетчики блоков полосы (считает их при первом обращении)"""
+        counts = self.strips.get(strip)
+        if counts is None:
+            counts = self.strips[strip] = self.count_cells(strip, 0, self.world.height)
+            self.evict()
+            return counts
+        self.strips.move_to_end(strip)
+        if counts.shape[1] < self.type_count(): # В реестре появились новые блоки
+            wider = np.zeros((self.rows, self.type_count()), dtype=np.int32)
+            wider[:, :counts.shape[1]] = counts
+            counts = self.strips[strip] = wider
+        return counts
+
+    def evict(self):
+        """Забывает давно не использованные полосы сверх лимита памяти"""
+        strip_bytes = self.rows * self.type_count() * 4
+        while len(self.strips) > 1 and len(self.strips) * strip_bytes > self.max_bytes:
+            self.strips.popitem(last=False)
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Пересчитывает чанки, задетые изменением (у еще не посчитанных полос делать нечего)"""
+        size = self.chunk_size
+        row0 = max(0, y0) // size
+        row1 = (min(y1, self.world.height) - 1) // size + 1
+        if row0 >= row1:
+            return
+        for strip in range(x0 // size, (x1 - 1) // size + 1):
+            if strip in self.strips:
+                counts = self.get_strip(strip)
+                counts[row0:row1] = self.count_cells(strip, row0 * size, min(row1 * size, self.world.height))
+
+    def strip_range(self, x0, x1):
+        """Полосы, задетые столбцами [x0, x1) (у конечного мира - только внутри мира)"""
+        if self.world.width is not None:
+            x0, x1 = max(0, x0), min(self.world.width, x1)
+        if x0 >= x1:
+            return range(0)
+        return range(x0 // self.chunk_size, (x1 - 1) // self.chunk_size + 1)
+
+    def chunks(self, block_id, x0, y0, x1, y1):
+        """Чанки с блоком block_id, задевающие прямоугольник: (x0, y0, x1, y1 пересечения, весь ли чанк внутри, счетчик)"""
+        size = self.chunk_size
+        y0, y1 = max(0, y0), min(self.world.height, y1)
+        if y0 >= y1:
+            return
+        for strip in self.strip_range(x0, x1):
+            column = self.get_strip(strip)[:, block_id]
+            for row in range(y0 // size, (y1 - 1) // size + 1):
+                if not column[row]: # Блока в чанке нет - клетки не смотрим
+                    continue
+                cx0, cy0 = max(x0, strip * size), max(y0, row * size)
+                cx1, cy1 = min(x1, (strip + 1) * size), min(y1, (row + 1) * size)
+                chunk_x1 = (strip + 1) * size if self.world.width is None else min((strip + 1) * size, self.world.width)
+                whole = (cx0 == strip * size and cx1 == chunk_x1 and
+                         cy0 == row * size and cy1 == min((row + 1) * size, self.world.height))
+                yield cx0, cy0, cx1, cy1, whole, int(column[row])
+
+    def count(self, block_type, x0, y0, x1, y1):
+        """Сколько блоков block_type в прямоугольнике клеток [x0, x1) x [y0, y1)"""
+        block_id = self.world.registry.ids.get(block_type)
+        if block_id is None:
+            return 0
+        total = 0
+        for cx0, cy0, cx1, cy1, whole, count in self.chunks(block_id, x0, y0, x1, y1):
+            if whole:
+                total += count
+            else:
+                total += int(np.count_nonzero(self.world.get_region(cx0, cy0, cx1, cy1) == block_id))
+        return total
+
+    def iter_type(self, block_type, x0, y0, x1, y1):
+        """Перебирает клетки (x, y) с блоком block_type в прямоугольнике [x0, x1) x [y0, y1)"""
+        block_id = self.world.registry.ids.get(block_type)
+        if block_id is None:
+            return
+        for cx0, cy0, cx1, cy1, _, _ in self.chunks(block_id, x0, y0, x1, y1):
+            ys, xs = np.nonzero(self.world.get_region(cx0, cy0, cx1, cy1) == block_id)
+            yield from zip((xs + cx0).tolist(), (ys + cy0).tolist())
+
+    def nearest(self, block_type, x, y, max_distance=None):
+        """Ближайшая к клетке (x, y) клетка с блоком block_type (None - не нашлось)
+
+        Полосы просматриваются по мере удаления от x; поиск останавливается, как только
+        следующая полоса заведомо дальше уже найденного блока.
+        """
+        block_id = self.world.registry.ids.get(block_type)
+        if block_id is None:
+            return None
+        size = self.chunk_size
+        if max_distance is None:
+            max_distance = self.max_distance if self.world.width is None else self.world.width
+        home = x // size
+        best, best_distance = None, None
+        for ring in range(max_distance // size + 2):
+            gap = max(0, (ring - 1) * size + 1) # Меньше этого по горизонтали до полос кольца не бывает
+            if best_distance is not None and gap * gap > best_distance:
+                break
+            for strip in {home - ring, home + ring}:
+                x0 = strip * size
+                for cx0, cy0, cx1, cy1, _, _ in self.chunks(block_id, x0, 0, x0 + size, self.world.height):
+                    ys, xs = np.nonzero(self.world.get_region(cx0, cy0, cx1, cy1) == block_id)
+                    distances = (xs + cx0 - x) ** 2 + (ys + cy0 - y) ** 2
+                    i = int(distances.argmin())
+                    if best_distance is None or distances[i] < best_distance:
+                        best, best_distance = (int(xs[i] + cx0), int(ys[i] + cy0)), int(distances[i])
+        return best
\ No newline at end of file
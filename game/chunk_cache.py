@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+# Кэш готовых картинок чанков мира. Чанк - квадрат из CHUNK_SIZE x CHUNK_SIZE блоков,
+# который рисуется на отдельную поверхность один раз и потом просто копируется на экран
+
+class ChunkCache:
+    def __init__(self, max_bytes):
+        """Инициализация"""
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict() # (chunk_x, chunk_y) -> Surface, в порядке последнего использования
+        self.dirty = set() # Чанки, картинку которых нужно перерисовать
+        self.used_bytes = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def __contains__(self, key):
+        return key in self.surfaces
+
+    def get(self, key):
+        """Возвращает картинку чанка и отмечает его как недавно использованный"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        """Кладет картинку чанка в кэш"""
+        old = self.surfaces.pop(key, None)
+        if old is not None:
+            self.used_bytes -= self.surface_bytes(old)
+        self.surfaces[key] = surface
+        self.used_bytes += self.surface_bytes(surface)
+        self.dirty.discard(key)
+
+    def mark_dirty(self, key):
+        """Отмечает чанк как устаревший (например, после постановки блока)"""
+        if key in self.surfaces:
+            self.dirty.add(key)
+
+    def is_dirty(self, key):
+        return key in self.dirty
+
+    def evict(self, keep=()):
+        """Выгружает давно не использованные чанки, пока кэш не уложится в лимит памяти"""
+        while self.used_bytes > self.max_bytes and self.surfaces:
+            key = next(iter(self.surfaces))
+            if key in keep: # Чанки, видимые в текущем кадре, не выгружаем
+                break
+            surface = self.surfaces.pop(key)
+            self.used_bytes -= self.surface_bytes(surface)
+            self.dirty.discard(key)
+
+    def clear(self):
+        """Полностью очищает кэш"""
+        self.surfaces.clear()
+        self.dirty.clear()
+        self.used_bytes = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import zlib
+import numpy as np
+from game.world import AIR
+
+# Правка мира целыми участками: заливка прямоугольника, замена одного блока другим,
+# копирование и вставка. Новый участок считается одной операцией numpy, записывается в мир
+# одним set_region (подписчики - отрисовка, свет, падающие блоки, навигация - узнают об
+# изменении один раз), а для отмены запоминаются прежние клетки участка в сжатом виде.
+# Отмена - это тоже правка участка (от нынешних клеток к прежним), поэтому инвентарь за неё
+# считается по тому, что действительно стоит в мире сейчас, а не по записи о старой правке
+
+class RegionEdit:
+    """Правка участка мира: прежние клетки old и новые new, левый верхний угол (x0, y0)"""
+    def __init__(self, x0, y0, old, new):
+        self.x0 = x0
+        self.y0 = y0
+        self.old = old
+        self.new = new
+
+    def changed(self):
+        """Сколько клеток правка действительно меняет"""
+        return int(np.count_nonzero(self.old != self.new))
+
+    def inventory_delta(self, registry):
+        """Как правка меняет инвентарь: {блок: +сколько получили / -сколько потратили}"""
+        changed = self.old != self.new
+        size = len(registry.names)
+        delta = (np.bincount(self.old[changed], minlength=size).astype(np.int64) -
+                 np.bincount(self.new[changed], minlength=size))
+        return {registry.names[i]: int(delta[i]) for i in np.flatnonzero(delta) if i != AIR}
+
+
+class UndoEntry:
+    """Запись для отмены: прежние клетки участка (сжатые) и делалась ли правка за счет инвентаря"""
+    def __init__(self, edit, use_inventory):
+        self.x0, self.y0 = edit.x0, edit.y0
+        self.shape = edit.old.shape
+        self.dtype = edit.old.dtype
+        self.data = zlib.compress(np.ascontiguousarray(edit.old).tobytes(), 1)
+        self.use_inventory = use_inventory
+
+    def cells(self):
+        return np.frombuffer(zlib.decompress(self.data), dtype=self.dtype).reshape(self.shape)
+
+
+class WorldEditor:
+    def __init__(self, world, registry, undo_limit=32):
+        """Инициализация (undo_limit - сколько последних правок можно отменить)"""
+        self.world = world
+        self.registry = registry
+        self.undo_limit = undo_limit
+        self.history = [] # UndoEntry, последняя правка - в конце
+
+    def clip(self, x0, y0, x1, y1):
+        """Обрезает участок [x0, x1) x [y0, y1) по границам мира (None - от участка ничего не осталось)"""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = max(0, min(y0, y1)), min(self.world.height, max(y0, y1))
+        if self.world.width is not None:
+            x0, x1 = max(0, x0), min(self.world.width, x1)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def region(self, x0, y0, x1, y1):
+        """Копия клеток участка (участок уже обрезан по границам мира)"""
+        return np.array(self.world.get_region(x0, y0, x1, y1))
+
+    def fill(self, x0, y0, x1, y1, block_id):
+        """Правка: весь участок [x0, x1) x [y0, y1) заполняется блоком block_id"""
+        rect = self.clip(x0, y0, x1, y1)
+        if rect is None:
+            return None
+        old = self.region(*rect)
+        return RegionEdit(rect[0], rect[1], old, np.full_like(old, block_id))
+
+    def replace(self, x0, y0, x1, y1, old_id, new_id):
+        """Правка: в участке все блоки old_id заменяются на new_id"""
+        rect = self.clip(x0, y0, x1, y1)
+        if rect is None:
+            return None
+        old = self.region(*rect)
+        return RegionEdit(rect[0], rect[1], old, np.where(old == old_id, old.dtype.type(new_id), old))
+
+    def copy(self, x0, y0, x1, y1):
+        """Копирует участок в буфер (массив ID блоков clipboard[y, x])"""
+        rect = self.clip(x0, y0, x1, y1)
+        if rect is None:
+            return np.zeros((0, 0), dtype=self.registry.dtype)
+        return self.region(*rect)
+
+    def paste(self, x, y, clipboard, skip_air=True):
+        """Правка: буфер вставляется левым верхним углом в клетку (x, y) (skip_air - воздух из буфера не стирает мир)"""
+        height, width = clipboard.shape
+        rect = self.clip(x, y, x + width, y + height)
+        if rect is None:
+            return None
+        x0, y0, x1, y1 = rect
+        old = self.region(*rect)
+        new = clipboard[y0 - y:y1 - y, x0 - x:x1 - x]
+        if skip_air:
+            new = np.where(new == AIR, old, new)
+        return RegionEdit(x0, y0, old, new.astype(old.dtype))
+
+    def protect(self, edit):
+        """Оставляет нетронутыми клетки, которые нельзя сломать руками (неломаемые блоки)"""
+        keep = (edit.old != AIR) & ~self.registry.breakable[edit.old]
+        edit.new = np.where(keep, edit.old, edit.new)
+        return edit
+
+    def apply(self, edit, use_inventory=False):
+        """Записывает правку в мир одним set_region и запоминает её для отмены"""
+        self.history.append(UndoEntry(edit, use_inventory))
+        del self.history[:-self.undo_limit]
+        self.world.set_region(edit.x0, edit.y0, edit.new)
+
+    def undo_edit(self):
+        """Правка, возвращающая участок последней правки к прежним клеткам, и делалась ли та за счет инвентаря (None - отменять нечего)"""
+        if not self.history:
+            return None
+        entry = self.history[-1]
+        cells = entry.cells()
+        height, width = entry.shape
+        current = self.region(entry.x0, entry.y0, entry.x0 + width, entry.y0 + height)
+        return RegionEdit(entry.x0, entry.y0, current, cells), entry.use_inventory
+
+    def undo(self, edit):
+        """Записывает в мир правку отмены из undo_edit и забывает последнюю правку"""
+        self.history.pop()
+        self.world.set_region(edit.x0, edit.y0, edit.new)
\ No newline at end of file
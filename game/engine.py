@@ -1,21 +1,62 @@
+import os
 import pygame
+import math
+import random
 import sys
+import time
+from game.block_index import BlockIndex
+from game.editing import WorldEditor
+from game.entities import Entities
+from game.physics import sweep_x, sweep_y
+from game.falling import FallingBlocks
+from game.navigation import Navigation, jump_height
+from game.network import NetworkClient, NetworkError
+from game.profiler import FrameProfiler, StartupProfiler
 from game.renderer import Renderer
+from game.replay import InputRecorder
+from game.save import WORLD_KEYS, SaveError, SaveFile, SaveTracker, write_save
+from game.streaming import StreamingWorld
+from game.terrain import TerrainGenerator, generate_parallel
+from game.world import AIR, BlockRegistry, World
 
 class GameEngine:    
     def __init__(self, config, blocks, player_config):
         """Инициализация"""
-        pygame.init()
+        self.start_time = time.perf_counter() # Для замера времени до первого кадра
+        self.time_to_first_frame = None
+        self.startup = StartupProfiler() # Из чего складывается время запуска
         
         self.config = config
         self.blocks = blocks
         self.player_config = player_config
+        self.registry = BlockRegistry(blocks) # Числовые ID блоков для компактного хранения мира
 
-        self.renderer = Renderer(config)
-        self.load_textures()
+        self.error_message = None # Состояние ошибки
+        
+        with self.startup.phase('init'):
+            # Включаем только экран: звук и джойстики игре не нужны, а шрифты включаются при первой надписи
+            pygame.display.init()
+            self.renderer = Renderer(config)
+        with self.startup.phase('textures'):
+            self.load_textures()
+
+        # Игра по сети: мир (зерно и измененные чанки) приходит с сервера, сохраняет его сервер (SERVER_SAVE_FILE)
+        self.network = None
+        if config.get('SERVER'):
+            try:
+                self.network = NetworkClient(config['SERVER'], self.registry)
+            except NetworkError as e:
+                self.error_message = str(e)
+        
+        # Сохранение: если файл уже есть, мир и игрок загружаются из него.
+        # Запись ввода (RECORD_INPUT) всегда начинается с нового мира и сохранение не трогает
+        self.record_path = config.get('RECORD_INPUT')
+        self.save_path = None if self.record_path or self.network else config.get('SAVE_FILE')
+        self.save_file = self.open_save()
 
-        self.world = []
-        self.generate_world()
+        self.world = None
+        with self.startup.phase('world'):
+            self.generate_world()
         
         self.player = {
             'x': player_config['START_X'],
@@ -26,76 +67,259 @@ class GameEngine:
             'velocity_y': 0, # Скорость движения игрока по вертикали (=0 - стоит на месте; >0 - движется вверх; <0 - движется вниз)
             'on_ground': True # Находится ли игрок на земле
         }
+        with self.startup.phase('player'):
+            self.place_player_on_surface()
         
         self.camera_x = 0
         self.camera_y = 0
+        self.show_minimap = config.get('MINIMAP', True) # Показывать ли миникарту (M - показать/скрыть)
+        self.zoom = 1.0 # Масштаб камеры (колесо мыши, +/-, 0 - вернуть): 1 - блок размером BLOCK_SIZE пикселей
         
         self.selected_block = 'grass' # Выбранный блок по умолчанию
         
         # Инвентарь
         self.inventory = {block: 10 for block in blocks.keys() if block != 'air'}
         
+        if self.save_file is not None:
+            self.restore_saved_state()
+        
+        # Какие чанки мира изменились (сохраняются только они)
+        self.save_tracker = SaveTracker(self.world, self.world_chunk_size,
+                                        self.save_file.index if self.save_file else ())
+        # Падающие блоки (песок, гравий): проверяются только клетки рядом с изменениями
+        self.falling_blocks = FallingBlocks(self.world, config.get('BLOCK_UPDATES_PER_TICK', 2048),
+                                            config.get('BLOCK_TICK_HZ', 20), occupied=self.cell_occupied)
+        # Индекс блоков по типам: сколько и где лежит блоков каждого типа (для модов и ИИ)
+        self.block_index = BlockIndex(self.world, self.world_chunk_size,
+                                      max_bytes=config.get('BLOCK_INDEX_MB', 4) * 1024 * 1024)
+        # Правка мира целыми участками (заливка, замена, вставка) с отменой
+        self.editor = WorldEditor(self.world, self.registry, config.get('UNDO_LIMIT', 32))
+        # Мобы: данные всех мобов лежат в общих массивах и просчитываются пачкой
+        block_size = config['BLOCK_SIZE']
+        self.entities = Entities(block_size, config.get('MOB_WIDTH', block_size), config.get('MOB_HEIGHT', block_size),
+                                 speed=config.get('MOB_SPEED', 2), gravity=config['GRAVITY'],
+                                 jump_power=config.get('MOB_JUMP_POWER', 12), seed=self.world_seed)
+        self.mob_sim_distance = config.get('MOB_SIM_DISTANCE', 32)
+        # Навигация для ИИ: куда можно дойти, запрыгнуть (на высоту прыжка игрока) и спрыгнуть
+        jump_blocks = int(jump_height(player_config['JUMP_POWER'], config['GRAVITY'], 60 / config.get('PHYSICS_HZ', 60)) // block_size)
+        self.navigation = Navigation(self.world, jump_blocks, agent_height=2,
+                                     cache_size=config.get('NAV_CACHE_SIZE', 256),
+                                     max_bytes=config.get('NAV_CACHE_MB', 8) * 1024 * 1024)
+        self.navigation_budget = config.get('NAV_BUDGET_MS', 2) / 1000
+        if config.get('MOB_COUNT', 0):
+            self.spawn_mobs(config['MOB_COUNT'], seed=self.world_seed)
+        self.autosave_interval = config.get('AUTOSAVE_SECONDS', 60)
+        self.last_save_time = time.perf_counter()
+        
         self.clock = pygame.time.Clock() # FPS
         
-        self.error_message = None # Состояние ошибки
+        # Профилировщик кадра (F3 - показать/скрыть замеры, F9 - сохранить их в файлы)
+        self.profiler = FrameProfiler(enabled=config.get('PROFILER', False))
+        self.frame_hooks = [] # Функции модов, которые вызываются каждый кадр: (название, функция)
         
         # Флаги для управления
-        self.jump_just_pressed = False  # Флаг для одиночного нажатия прыжка
+        self.jump_just_pressed = False  # Флаг для одиночного нажатия прыжка (сбрасывается шагом физики)
         self.jump_key_down = False  # Флаг для отслеживания состояния клавиши прыжка
+        
+        # Физика считается фиксированными шагами PHYSICS_HZ раз в секунду независимо от FPS.
+        # Скорости и гравитация в настройках заданы "в пикселях за кадр" при 60 кадрах в секунду
+        self.physics_step = 1.0 / config.get('PHYSICS_HZ', 60)
+        self.physics_scale = 60 * self.physics_step # Во сколько раз шаг физики короче кадра при 60 FPS
+        self.max_physics_steps = config.get('MAX_PHYSICS_STEPS', 8) # Предел шагов за кадр, чтобы не "догонять" бесконечно
+        self.physics_time = 0.0 # Накопленное, но еще не просчитанное время
+        self.last_frame_time = None
+        self.previous_position = (self.player['x'], self.player['y']) # Позиция игрока до последнего шага
+        self.update_camera(self.player['x'], self.player['y'])
+        # Запись ввода: настройки (с зерном мира) и затем каждый кадр - чтобы повторить игру (benchmark.py --replay)
+        # Сетевую игру не записываем: повтор без сервера не получит чужих правок и игроков
+        self.input_recorder = None
+        if self.record_path and self.network is not None:
+            self.error_message = "Запись ввода в сетевой игре не ведется"
+        elif self.record_path:
+            self.input_recorder = InputRecorder(self.record_path, {
+                'config': dict(config, WORLD_SEED=self.world_seed, SAVE_FILE=None, RECORD_INPUT=None, SERVER=None),
+                'player': player_config,
+            })
+        self.ready_time = time.perf_counter() # Конец инициализации - дальше идет первый кадр
+    
+    def add_frame_hook(self, name, callback):
+        """Добавляет функцию мода, которая будет вызываться каждый кадр (её время замеряется отдельно)"""
+        self.frame_hooks.append((name, callback))
+        self.profiler.register_section(name)
+    
+    def export_profile(self):
+        """Сохраняет замеры профилировщика в JSON и CSV"""
+        name = time.strftime('profile_%Y%m%d_%H%M%S')
+        self.profiler.export_json(f'{name}.json')
+        self.profiler.export_csv(f'{name}.csv')
+        print(f"Замеры сохранены в {name}.json и {name}.csv")
     
     def load_textures(self):
         """Загружает текстуры"""
-        for block_type, block_data in self.blocks.items():
-            if 'texture' in block_data:
-                self.renderer.load_block_texture(block_type, block_data['texture'])
+        self.renderer.load_block_textures({block_type: block_data['texture']
+                                           for block_type, block_data in self.blocks.items()
+                                           if 'texture' in block_data})
+    
+    def world_config(self):
+        """Настройки генерации мира: с сервера или из сохранения, если оно загружено, иначе из GAME_CONFIG"""
+        if self.network is not None:
+            return dict(self.config, **self.network.world)
+        if self.save_file is not None:
+            return dict(self.config, **self.save_file.meta['world'])
+        return self.config
     
     def generate_world(self):
         """Генерирует мир и всё его содержимое"""
+        config = self.world_config()
+        self.world_chunk_size = self.save_file.chunk_size if self.save_file else config.get('CHUNK_SIZE', 16)
         try:
-            world_width = self.config['WORLD_WIDTH']
-            world_height = self.config['WORLD_HEIGHT']
+            world_width = config['WORLD_WIDTH']
+            world_height = config['WORLD_HEIGHT']
             
-            # Создаем пустой мир (воздух)
-            self.world = [['air' for _ in range(world_width)] 
-                         for _ in range(world_height)]
+            # Зерно генерации: один и тот же WORLD_SEED всегда дает один и тот же мир
+            seed = config.get('WORLD_SEED')
+            if seed is None:
+                seed = random.randrange(2 ** 32)
+            self.world_seed = seed
             
-            # Генерируем землю
-            ground_level = world_height - 10
-            for x in range(world_width):
-                # Земля и трава
-                for y in range(ground_level, world_height):
-                    if y == ground_level:
-                        self.world[y][x] = 'grass'
-                    elif y < ground_level + 5:
-                        self.world[y][x] = 'dirt'
-                    else:
-                        self.world[y][x] = 'stone'
-                
-                # Деревья
-                if x % 10 == 0 and x > 10 and x < world_width - 10:
-                    tree_height = 5
-                    tree_x = x
-                    tree_y = ground_level - 1
-                    
-                    # Ствол
-                    for i in range(tree_height):
-                        if tree_y - i >= 0:
-                            self.world[tree_y - i][tree_x] = 'wood'
-                    
-                    # Листва вокруг ствола дерева
-                    for dy in range(-2, 1):
-                        for dx in range(-2, 3):
-                            ly = tree_y - tree_height + dy
-                            lx = tree_x + dx
-                            if (0 <= lx < world_width and 0 <= ly < world_height and 
-                                abs(dx) + abs(dy) < 4):
-                                if self.world[ly][lx] == 'air':
-                                    self.world[ly][lx] = 'leaf'
+            generator = TerrainGenerator(seed, world_height, self.registry, config)
+            if config.get('INFINITE_WORLD', False):
+                # Бесконечный мир: чанки генерируются по мере приближения к ним камеры
+                chunk_size = self.world_chunk_size
+                screen_chunks = self.config['SCREEN_WIDTH'] // self.config['BLOCK_SIZE'] // chunk_size
+                self.world = StreamingWorld(
+                    world_height, self.registry, generator, chunk_size,
+                    memory_budget=self.config.get('WORLD_MEMORY_MB', 64) * 1024 * 1024,
+                    view_distance=screen_chunks // 2 + 2)
+                if self.save_file is not None or self.network is not None: # Сохраненные чанки распаковываются, только когда понадобятся
+                    self.world.chunk_source = self.stored_chunk
+                return
+            
+            self.world = World(world_width, world_height, self.registry)
+            if self.config.get('LAZY_WORLDGEN', True):
+                # Полосы мира генерируются, только когда они впервые понадобятся (обычно - попадут на экран)
+                self.terrain = generator
+                self.world.set_source(self.generate_columns, self.world_chunk_size)
+                return
+            if world_width * world_height >= self.config.get('PARALLEL_WORLDGEN_CELLS', 4_000_000):
+                # Большой мир генерируем полосами в нескольких процессах
+                generate_parallel(generator, self.world.cells, self.config.get('WORLDGEN_WORKERS'))
+            else:
+                self.world.cells[:, :] = generator.generate(0, world_width)
+            
+            # Поверх сгенерированного мира кладем измененные игроками чанки
+            for chunk_x in self.stored_chunk_indices():
+                x0 = chunk_x * self.world_chunk_size
+                x1 = min(world_width, x0 + self.world_chunk_size)
+                self.world.cells[:, x0:x1] = self.stored_chunk(chunk_x)[:, :x1 - x0]
         except Exception as e:
             self.error_message = f"Произошла ошибка при генерации мира: {str(e)}"
-            self.world = [['grass' if y == 10 else 'air' # Создаем простой мир при ошибке
-                          for x in range(50)] 
-                         for y in range(20)]
+            self.world = World(50, 20, self.registry) # Создаем простой мир при ошибке
+            self.world.cells[10, :] = self.registry.get_id('grass')
+        self.world.rebuild_solid()
+    
+    def generate_columns(self, x0, x1):
+        """Генерирует столбцы [x0, x1) конечного мира (если чанк есть в сохранении - берет его оттуда)"""
+        saved = self.stored_chunk(x0 // self.world_chunk_size)
+        if saved is not None:
+            return saved[:, :x1 - x0]
+        return self.terrain.generate(x0, x1)
+    
+    def stored_chunk(self, chunk_x):
+        """Измененный игроками чанк: из снимка мира сервера или из сохранения (None - чанк не менялся)"""
+        if self.network is not None:
+            return self.network.chunks.get(chunk_x)
+        if self.save_file is not None:
+            return self.save_file.read_chunk(chunk_x)
+        return None
+    
+    def stored_chunk_indices(self):
+        """Номера измененных игроками чанков"""
+        if self.network is not None:
+            return list(self.network.chunks)
+        if self.save_file is not None:
+            return list(self.save_file.index)
+        return []
+    
+    def open_save(self):
+        """Открывает файл сохранения, если он есть"""
+        if not self.save_path or not os.path.exists(self.save_path):
+            return None
+        try:
+            return SaveFile(self.save_path, self.registry)
+        except (OSError, SaveError) as e:
+            self.error_message = f"Не удалось загрузить сохранение: {e}"
+            return None
+    
+    def restore_saved_state(self):
+        """Восстанавливает игрока, инвентарь и выбранный блок из сохранения"""
+        meta = self.save_file.meta
+        self.player.update(meta.get('player', {}))
+        self.inventory.update(meta.get('inventory', {}))
+        if meta.get('selected_block') in self.inventory:
+            self.selected_block = meta['selected_block']
+    
+    def save_game(self):
+        """Сохраняет мир, игрока и инвентарь (записываются только изменившиеся чанки)"""
+        if not self.save_path:
+            return False
+        world_config = self.world_config()
+        meta = {
+            'world': dict({key: world_config.get(key) for key in WORLD_KEYS}, WORLD_SEED=self.world_seed),
+            'player': {key: self.player[key] for key in ('x', 'y', 'velocity_y', 'on_ground')},
+            'inventory': self.inventory,
+            'selected_block': self.selected_block,
+        }
+        try:
+            start = time.perf_counter()
+            written = write_save(self.save_path, self.save_tracker, meta, self.registry, self.save_file)
+            if self.save_file is None: # Первое сохранение - дальше будем дописывать в этот файл
+                self.save_file = SaveFile(self.save_path, self.registry)
+            print(f"Игра сохранена: чанков записано - {written}, "
+                  f"{(time.perf_counter() - start) * 1000:.1f} мс")
+        except (OSError, SaveError) as e:
+            print(f"Не удалось сохранить игру: {e}")
+            return False
+        finally:
+            self.last_save_time = time.perf_counter()
+        return True
+    
+    def autosave(self):
+        """Автосохранение раз в AUTOSAVE_SECONDS секунд, если в мире что-то изменилось"""
+        if (self.autosave_interval and self.save_tracker.unsaved and
+                time.perf_counter() - self.last_save_time >= self.autosave_interval):
+            self.save_game()
+    
+    def place_player_on_surface(self):
+        """Если стартовая позиция оказалась внутри холма - поднимает игрока на поверхность"""
+        block_size = self.config['BLOCK_SIZE']
+        player_height = block_size * 2
+        x = self.player['x']
+        if not self.check_collision(x, self.player['y'], block_size, player_height):
+            return
+        left = int(x // block_size)
+        right = int((x + block_size - 1) // block_size)
+        solid_rows = self.world.solid_region(left, 0, right + 1, self.world.height).any(axis=1)
+        top = int(solid_rows.argmax()) # Самая верхняя твердая клетка под игроком
+        self.player['y'] = top * block_size - player_height
+    
+    def spawn_mobs(self, count, seed=None):
+        """Расставляет count мобов на поверхности мира в зоне, где они просчитываются (вокруг игрока)"""
+        block_size = self.config['BLOCK_SIZE']
+        center = int(self.player['x'] // block_size)
+        half = self.config['SCREEN_WIDTH'] // block_size // 2 + self.mob_sim_distance
+        x0, x1 = center - half, center + half
+        if self.world.width is not None:
+            x0, x1 = max(0, x0), min(self.world.width, x1)
+        if x1 <= x0:
+            return
+        rng = random.Random(seed)
+        columns = [rng.randrange(x0, x1) for _ in range(count)]
+        solid = self.world.solid_region(x0, 0, x1, self.world.height)
+        surface = solid.argmax(axis=0) # Верхняя твердая клетка каждого столбца
+        xs = [column * block_size + rng.random() * (block_size - self.entities.width) for column in columns]
+        ys = [int(surface[column - x0]) * block_size - self.entities.height for column in columns]
+        self.entities.spawn_many(xs, ys, [rng.choice((-1, 1)) for _ in range(count)])
     
     def get_block_at(self, x, y):
         """Возвращает блок по координатам"""
@@ -103,9 +327,8 @@ class GameEngine:
             grid_x = int(x // self.config['BLOCK_SIZE'])
             grid_y = int(y // self.config['BLOCK_SIZE'])
             
-            if (0 <= grid_y < len(self.world) and 
-                0 <= grid_x < len(self.world[0])):
-                return self.world[grid_y][grid_x], grid_x, grid_y
+            if self.world.in_bounds(grid_x, grid_y):
+                return self.world.get_block(grid_x, grid_y), grid_x, grid_y
         except:
             pass
         return 'air', -1, -1
@@ -120,12 +343,20 @@ class GameEngine:
         ]
         
         for nx, ny in neighbors:
-            if 0 <= ny < len(self.world) and 0 <= nx < len(self.world[0]):
-                if self.world[ny][nx] != 'air':
-                    return True
+            if self.world.get_id(nx, ny) != AIR:
+                return True
         
         return False
     
+    def cell_occupied(self, grid_x, grid_y):
+        """Занята ли клетка игроком или мобом (туда нельзя поставить или уронить блок)"""
+        block_size = self.config['BLOCK_SIZE']
+        player_rect = pygame.Rect(self.player['x'], self.player['y'], block_size, block_size * 2)
+        block_rect = pygame.Rect(grid_x * block_size, grid_y * block_size, block_size, block_size)
+        if player_rect.colliderect(block_rect):
+            return True
+        return len(self.entities.query(block_rect.x, block_rect.y, block_rect.width, block_rect.height)) > 0
+    
     def place_block(self, x, y, block_type):
         """Ставит блок в мире"""
         try:
@@ -135,7 +366,7 @@ class GameEngine:
                 self.inventory[block_type] > 0):
                 
                 # Проверяем, что выбранная координата не занята другим блоком
-                if self.world[grid_y][grid_x] != 'air':
+                if self.world.get_id(grid_x, grid_y) != AIR:
                     return False
                 
                 # Проверяем, что блок можно поставить (есть опора)
@@ -160,8 +391,14 @@ class GameEngine:
                 if player_rect.colliderect(block_rect):
                     return False
                 
-                self.world[grid_y][grid_x] = block_type
+                # И не внутри моба
+                if len(self.entities.query(block_rect.x, block_rect.y, block_rect.width, block_rect.height)):
+                    return False
+                
+                self.world.set_block(grid_x, grid_y, block_type)
+                self.send_edit(grid_x, grid_y, AIR)
                 self.inventory[block_type] -= 1
+                self.renderer.invalidate_hud() # Инвентарь изменился - перерисовываем панель
                 return True
         except:
             pass
@@ -197,16 +434,110 @@ class GameEngine:
             if (grid_x >= 0 and grid_y >= 0 and 
                 block_type != 'air' and block_info.get('breakable')):
 
-                self.world[grid_y][grid_x] = 'air'
+                self.world.set_id(grid_x, grid_y, AIR)
+                self.send_edit(grid_x, grid_y, self.registry.ids[block_type])
                 if block_type in self.inventory:
                     self.inventory[block_type] += 1
                 else:
                     self.inventory[block_type] = 1
+                self.renderer.invalidate_hud()
                 return True
         except:
             pass
         return False
     
+    # --- Правка мира участками: для построек из скриптов и инструментов уровней ---
+    # Координаты - в блоках, участок [x0, x1) x [y0, y1). use_inventory=True - как руками:
+    # ставятся только блоки из инвентаря, сломанные блоки попадают в него, неломаемые остаются на месте
+    
+    def region_block_id(self, block_type):
+        """ID блока для правки участка (опечатка в названии - ValueError, а не новый блок в реестре)"""
+        block_id = self.registry.ids.get(block_type)
+        if block_id is None:
+            raise ValueError(f"Неизвестный блок: {block_type}")
+        return block_id
+    
+    def fill_region(self, x0, y0, x1, y1, block_type, use_inventory=False):
+        """Заполняет участок блоком block_type ('air' - очищает участок)"""
+        edit = self.editor.fill(x0, y0, x1, y1, self.region_block_id(block_type))
+        return self.apply_region_edit(edit, use_inventory)
+    
+    def replace_region(self, x0, y0, x1, y1, old_type, new_type, use_inventory=False):
+        """Заменяет в участке все блоки old_type на new_type"""
+        edit = self.editor.replace(x0, y0, x1, y1, self.region_block_id(old_type), self.region_block_id(new_type))
+        return self.apply_region_edit(edit, use_inventory)
+    
+    def copy_region(self, x0, y0, x1, y1):
+        """Копирует участок в буфер (массив ID блоков) для paste_region"""
+        return self.editor.copy(x0, y0, x1, y1)
+    
+    def paste_region(self, x, y, clipboard, skip_air=True, use_inventory=False):
+        """Вставляет буфер левым верхним углом в клетку (x, y) (skip_air - воздух из буфера не стирает мир)"""
+        return self.apply_region_edit(self.editor.paste(x, y, clipboard, skip_air), use_inventory)
+    
+    def apply_region_edit(self, edit, use_inventory):
+        """Записывает правку участка в мир (возвращает False, если менять нечего или не хватает блоков)"""
+        if edit is None:
+            return False
+        delta = {}
+        if use_inventory:
+            edit = self.editor.protect(edit)
+            delta = edit.inventory_delta(self.registry)
+            if any(self.inventory.get(name, 0) + count < 0 for name, count in delta.items()):
+                return False
+        if not edit.changed():
+            return False
+        self.editor.apply(edit, use_inventory)
+        self.change_inventory(delta)
+        self.send_region(edit.x0, edit.y0, edit.new, edit.old if use_inventory else None)
+        return True
+    
+    def undo_region_edit(self):
+        """Отменяет последнюю правку участка (False - отменять нечего или не хватает блоков, чтобы вернуть участок)"""
+        undo = self.editor.undo_edit()
+        if undo is None:
+            return False
+        edit, use_inventory = undo
+        delta = {}
+        if use_inventory: # Отмена тратит и возвращает блоки по тем же правилам, что и сама правка
+            edit = self.editor.protect(edit)
+            delta = edit.inventory_delta(self.registry)
+            if any(self.inventory.get(name, 0) + count < 0 for name, count in delta.items()):
+                return False
+        self.editor.undo(edit)
+        self.change_inventory(delta)
+        self.send_region(edit.x0, edit.y0, edit.new, edit.old if use_inventory else None)
+        return True
+    
+    def change_inventory(self, delta):
+        """Меняет инвентарь сразу на много блоков: {блок: +получено / -потрачено}"""
+        if not delta:
+            return
+        for name, count in delta.items():
+            # Ниже нуля уходит только возврат отклоненной сервером правки, если блок уже потрачен
+            self.inventory[name] = max(0, self.inventory.get(name, 0) + count)
+        self.renderer.invalidate_hud()
+    
+    def send_region(self, x0, y0, cells, old=None):
+        """Отправляет правку участка на сервер (old - прежние клетки, если правка меняла инвентарь)"""
+        if self.network is not None:
+            self.network.send_region(x0, y0, cells, old)
+    
+    def send_edit(self, grid_x, grid_y, old_id=None):
+        """Отправляет правку клетки на сервер (у себя она уже сделана вместе с инвентарем, сервер её проверит; old_id - что стояло в клетке)"""
+        if self.network is not None:
+            self.network.send_edit(grid_x, grid_y, self.world.get_id(grid_x, grid_y), old_id)
+    
+    def update_network(self):
+        """Принимает правки мира и позиции игроков с сервера и отправляет свою позицию"""
+        try:
+            self.change_inventory(self.network.poll(self.world)) # Отклоненные сервером правки возвращают инвентарь
+            self.network.send_move(self.player['x'], self.player['y'])
+        except NetworkError as e: # Сервер пропал - играем дальше одни
+            self.error_message = str(e)
+            self.network.close()
+            self.network = None
+    
     def check_collision(self, x, y, width, height):
         """Проверяет столкновение игрока с блоками"""
         # Получаем индексы блоков, с которыми может пересекаться игрок
@@ -215,33 +546,18 @@ class GameEngine:
         top = int(y // self.config['BLOCK_SIZE'])
         bottom = int((y + height - 1) // self.config['BLOCK_SIZE'])
         
-        # Перебираем блоки в этой области
-        for block_y in range(top, bottom + 1):
-            for block_x in range(left, right + 1):
-                if (0 <= block_y < len(self.world) and 
-                    0 <= block_x < len(self.world[0])):
-                    
-                    block_type = self.world[block_y][block_x]
-                    # Проверяем, является ли блок твердым
-                    if block_type != 'air' and self.blocks.get(block_type, {}).get('solid', True):
-                        block_rect = pygame.Rect(
-                            block_x * self.config['BLOCK_SIZE'],
-                            block_y * self.config['BLOCK_SIZE'],
-                            self.config['BLOCK_SIZE'],
-                            self.config['BLOCK_SIZE']
-                        )
-                        
-                        player_rect = pygame.Rect(x, y, width, height)
-                        
-                        if player_rect.colliderect(block_rect):
-                            return True
-        return False
+        # Все клетки в этой области пересекаются с игроком, поэтому достаточно
+        # проверить, есть ли среди них хоть один твердый блок
+        return self.world.any_solid(left, top, right + 1, bottom + 1)
     
-    def handle_events(self):
-        """Обрабатывает события"""
-        self.jump_just_pressed = False # Сбрасываем флаг одиночного нажатия прыжка
+    def handle_events(self, events=None):
+        """Обрабатывает события (events - готовый список событий, например, для игры без окна)"""
+        previous_block = self.selected_block
+        
+        if events is None:
+            events = pygame.event.get()
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
             
@@ -250,6 +566,28 @@ class GameEngine:
                 if event.key in [pygame.K_ESCAPE, pygame.K_F4]:
                     return False
                 
+                # Профилировщик
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                elif event.key == pygame.K_F9 and self.profiler.samples:
+                    self.export_profile()
+                
+                # Сохранение
+                if event.key == pygame.K_F5:
+                    self.save_game()
+                
+                # Миникарта
+                if event.key == pygame.K_m:
+                    self.show_minimap = not self.show_minimap
+                
+                # Масштаб камеры
+                if event.key in [pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS]:
+                    self.change_zoom(1)
+                elif event.key in [pygame.K_MINUS, pygame.K_KP_MINUS]:
+                    self.change_zoom(-1)
+                elif event.key in [pygame.K_0, pygame.K_KP0]:
+                    self.set_zoom(1.0)
+                
                 # Выбор блока
                 if event.key in [pygame.K_1, pygame.K_KP1]:
                     self.selected_block = 'grass'
@@ -287,121 +625,257 @@ class GameEngine:
                     self.jump_key_down = False
             
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
+                mouse_x, mouse_y = event.pos
 
-                if mouse_y >= self.config['SCREEN_HEIGHT'] - 60 and event.button == 1: # Попали мышкой в UI-блок
+                if event.button in (4, 5): # Колесо мыши
+                    self.change_zoom(1 if event.button == 4 else -1)
+                elif mouse_y >= self.config['SCREEN_HEIGHT'] - 60 and event.button == 1: # Попали мышкой в UI-блок
                     self.choose_block_in_ui(mouse_x, mouse_y)
                 else:
-                    world_x = mouse_x + self.camera_x
-                    world_y = mouse_y + self.camera_y
+                    world_x = mouse_x / self.zoom + self.camera_x
+                    world_y = mouse_y / self.zoom + self.camera_y
                     
                     if event.button == 1:  # Вызываем функцию разрушения блока
                         self.break_block(world_x, world_y)
                     elif event.button == 3:  # Вызываем функцию постановки блока
                         self.place_block(world_x, world_y, self.selected_block)
 
+        if self.selected_block != previous_block: # Выбран другой блок - перерисовываем панель
+            self.renderer.invalidate_hud()
         return True
     
-    def update_player(self):
-        """Обновляет состояние игрока"""
-        keys = pygame.key.get_pressed() # Получаем состояние всех клавиш
+    def update_player(self, keys=None):
+        """Обновляет состояние игрока (keys - состояние клавиш, по умолчанию берется с клавиатуры)"""
+        if keys is None:
+            keys = pygame.key.get_pressed() # Получаем состояние всех клавиш
         
         dx = 0
         if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            dx -= self.player['speed']
+            dx -= self.player['speed'] * self.physics_scale
         if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            dx += self.player['speed']
+            dx += self.player['speed'] * self.physics_scale
         
-        if dx != 0:
-            new_x = self.player['x'] + dx
-            player_width = self.config['BLOCK_SIZE']
-            player_height = self.config['BLOCK_SIZE'] * 2
-            
-            # Проверяем коллизию на новой позиции
-            if not self.check_collision(new_x, self.player['y'], player_width, player_height):
-                self.player['x'] = new_x
-            else: # При наличии коллизии пробуем сдвинуться на 1 пиксель за несколько попыток
-                for offset in range(1, int(abs(dx)) + 1):
-                    test_x = self.player['x'] + (1 if dx > 0 else -1)
-                    if not self.check_collision(test_x, self.player['y'], player_width, player_height):
-                        self.player['x'] = test_x
-                    else:
-                        break
+        block_size = self.config['BLOCK_SIZE']
+        player_width = block_size
+        player_height = block_size * 2
+        
+        # Движение по горизонтали: сразу находим ближайший блок на пути и встаем вплотную к нему
+        self.player['x'], _ = sweep_x(self.world, self.player['x'], self.player['y'],
+                                      player_width, player_height, dx, block_size)
         
         if self.jump_just_pressed and self.player['on_ground']: # Прыжок
             self.player['velocity_y'] = -self.player['jump_power']
             self.player['on_ground'] = False
+        self.jump_just_pressed = False # Нажатие прыжка обработано
         
         
-        self.player['velocity_y'] += self.config['GRAVITY'] # Гравитация
-        dy = self.player['velocity_y'] # Движение по вертикали
+        self.player['velocity_y'] += self.config['GRAVITY'] * self.physics_scale # Гравитация
+        dy = self.player['velocity_y'] * self.physics_scale # Движение по вертикали
         
         if dy != 0:
-            new_y = self.player['y'] + dy
-            player_width = self.config['BLOCK_SIZE']
-            player_height = self.config['BLOCK_SIZE'] * 2
-            
-            # Проверяем коллизию на новой позиции
-            if not self.check_collision(self.player['x'], new_y, player_width, player_height):
-                self.player['y'] = new_y
+            self.player['y'], hit = sweep_y(self.world, self.player['x'], self.player['y'],
+                                            player_width, player_height, dy, block_size)
+            if not hit:
                 self.player['on_ground'] = False
-            else: # Если нашли коллизия
+            else: # Если нашли коллизию - игрок уже стоит вплотную к блоку
                 if dy > 0:  # Падение вниз
                     self.player['on_ground'] = True
-                    self.player['velocity_y'] = 0
-                    
-                    # Находим точное положение над блоком
-                    for offset in range(1, int(abs(dy)) + 1):
-                        test_y = self.player['y'] + 1
-                        if not self.check_collision(self.player['x'], test_y, player_width, player_height):
-                            self.player['y'] = test_y
-                        else:
-                            break
-                else:  # Движение вверх
-                    self.player['velocity_y'] = 0
+                self.player['velocity_y'] = 0
         
         # Проверяем, стоит ли игрок на земле
         if not self.player['on_ground']:
-            player_width = self.config['BLOCK_SIZE']
-            player_height = self.config['BLOCK_SIZE'] * 2
             if self.check_collision(self.player['x'], self.player['y'] + 1, player_width, player_height):
                 self.player['on_ground'] = True
         
-        # Ограничение мира по горизонтали
-        world_width = self.config['WORLD_WIDTH'] * self.config['BLOCK_SIZE']
-        self.player['x'] = max(0, min(self.player['x'], world_width - self.config['BLOCK_SIZE']))
-        
-        # Обновление камеры
-        self.camera_x = self.player['x'] - self.config['SCREEN_WIDTH'] // 2
-        self.camera_y = self.player['y'] - self.config['SCREEN_HEIGHT'] // 2
+        # Ограничение мира по горизонтали (у бесконечного мира границ нет)
+        if self.world.width is not None:
+            world_width = self.world.width * self.config['BLOCK_SIZE']
+            self.player['x'] = max(0, min(self.player['x'], world_width - self.config['BLOCK_SIZE']))
+    
+    def view_size(self):
+        """Сколько пикселей мира видно на экране при текущем масштабе (ширина, высота)"""
+        return self.config['SCREEN_WIDTH'] / self.zoom, self.config['SCREEN_HEIGHT'] / self.zoom
+    
+    def min_zoom(self):
+        """Самое сильное отдаление: ZOOM_MIN, а если он не задан - пока конечный мир не поместится по ширине"""
+        if self.config.get('ZOOM_MIN') is not None:
+            return self.config['ZOOM_MIN']
+        if self.world.width is None:
+            return 1 / 8
+        return min(1.0, self.config['SCREEN_WIDTH'] / (self.world.width * self.config['BLOCK_SIZE']))
+    
+    def set_zoom(self, zoom):
+        """Меняет масштаб камеры (в пределах ZOOM_MIN - ZOOM_MAX)"""
+        zoom = max(self.min_zoom(), min(self.config.get('ZOOM_MAX', 2), zoom))
+        block_pixels = self.config['BLOCK_SIZE'] * zoom
+        if block_pixels >= self.renderer.lod_block_pixels: # Блоки рисуются картинками - размер в целых пикселях
+            zoom = round(block_pixels) / self.config['BLOCK_SIZE']
+        self.zoom = zoom
+    
+    def change_zoom(self, steps):
+        """Приближает (steps > 0) или отдаляет камеру на steps шагов по ZOOM_STEP"""
+        # Масштаб всегда ZOOM_STEP в целой степени - иначе округление до целых пикселей накапливается
+        step = self.config.get('ZOOM_STEP', 1.5)
+        self.set_zoom(step ** (round(math.log(self.zoom, step)) + steps))
+    
+    def update_camera(self, player_x, player_y):
+        """Обновляет камеру так, чтобы игрок был в центре экрана"""
+        view_width, view_height = self.view_size()
+        self.camera_x = player_x - view_width / 2
+        self.camera_y = player_y - view_height / 2
         
-        # Ограничение камеры
-        self.camera_x = max(0, min(self.camera_x, 
-                                 world_width - self.config['SCREEN_WIDTH']))
+        # Ограничение камеры (мир меньше экрана - посередине экрана)
+        if self.world.width is not None:
+            world_width = self.world.width * self.config['BLOCK_SIZE']
+            if world_width > view_width:
+                self.camera_x = max(0, min(self.camera_x, world_width - view_width))
+            else:
+                self.camera_x = (world_width - view_width) / 2
         
-        world_height = self.config['WORLD_HEIGHT'] * self.config['BLOCK_SIZE']
-        self.camera_y = max(0, min(self.camera_y, 
-                                 world_height - self.config['SCREEN_HEIGHT']))
+        world_height = self.world.height * self.config['BLOCK_SIZE']
+        if world_height > view_height:
+            self.camera_y = max(0, min(self.camera_y, world_height - view_height))
+        else:
+            self.camera_y = (world_height - view_height) / 2
     
-    def run(self):
-        """Запускает весь игровой цикл"""
-        running = True
-        
-        while running:
-            running = self.handle_events()
-
-            self.update_player()
+    def update_entities(self):
+        """Шаг физики мобов: просчитываются только мобы не дальше MOB_SIM_DISTANCE блоков от экрана"""
+        block_size = self.config['BLOCK_SIZE']
+        x0 = int(self.camera_x // block_size) - self.mob_sim_distance
+        x1 = int((self.camera_x + self.view_size()[0]) // block_size) + 1 + self.mob_sim_distance
+        self.entities.step(self.world, x0, x1, self.physics_scale)
+    
+    def update_physics(self, frame_time, keys=None):
+        """Просчитывает физику фиксированными шагами за прошедшее время кадра
 
-            self.renderer.draw_world(self.world, self.camera_x, self.camera_y)
-            self.renderer.draw_player(self.player, self.camera_x, self.camera_y)
+        Возвращает долю следующего шага (от 0 до 1), на которую нужно сдвинуть картинку
+        между предыдущей и текущей позицией игрока.
+        """
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        
+        self.physics_time += frame_time
+        steps = 0
+        while self.physics_time >= self.physics_step and steps < self.max_physics_steps:
+            self.previous_position = (self.player['x'], self.player['y'])
+            self.update_player(keys)
+            self.update_entities()
+            self.physics_time -= self.physics_step
+            steps += 1
+        
+        if steps == self.max_physics_steps: # Не успеваем - отбрасываем отставание, чтобы игра не "догоняла" вечно
+            self.physics_time = min(self.physics_time, self.physics_step)
+        return self.physics_time / self.physics_step
+    
+    def run_frame(self, events=None, keys=None, frame_time=None):
+        """Выполняет один кадр игры (возвращает False, если игру нужно закрыть)
 
+        frame_time - сколько секунд прошло с прошлого кадра (по умолчанию - по реальным часам).
+        """
+        profiler = self.profiler
+        profiler.begin_frame()
+        
+        now = time.perf_counter()
+        if frame_time is None:
+            frame_time = now - self.last_frame_time if self.last_frame_time is not None else 0.0
+        self.last_frame_time = now
+        
+        if events is None:
+            events = pygame.event.get()
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if self.input_recorder is not None:
+            self.input_recorder.record(frame_time, events, keys)
+        
+        with profiler.section('events'):
+            running = self.handle_events(events)
+        
+        with profiler.section('physics'):
+            alpha = self.update_physics(frame_time, keys)
+            
+            # Картинку рисуем между двумя последними шагами физики - так движение плавное при любом FPS
+            previous_x, previous_y = self.previous_position
+            render_x = previous_x + (self.player['x'] - previous_x) * alpha
+            render_y = previous_y + (self.player['y'] - previous_y) * alpha
+            self.update_camera(render_x, render_y)
+        
+        if self.network is not None:
+            with profiler.section('network'):
+                self.update_network()
+        
+        with profiler.section('blocks'):
+            if self.network is None: # В сетевой игре блоки падают на сервере
+                self.falling_blocks.update(frame_time)
+        
+        with profiler.section('navigation'): # Поиски путей из очереди, пока не кончится время
+            self.navigation.update(self.navigation_budget)
+        
+        with profiler.section('streaming'): # Подгрузка чанков рядом с камерой
+            self.world.update((self.camera_x + self.view_size()[0] / 2) // self.config['BLOCK_SIZE'])
+        
+        for name, callback in self.frame_hooks: # Функции модов
+            with profiler.section(name):
+                callback(self)
+        
+        with profiler.section('world'):
+            self.renderer.draw_world(self.world, self.camera_x, self.camera_y, self.zoom)
+        
+        with profiler.section('mobs'):
+            _, mob_x, mob_y = self.entities.positions(alpha)
+            self.renderer.draw_entities(mob_x, mob_y, self.entities.width, self.entities.height,
+                                        self.camera_x, self.camera_y, self.zoom)
+        
+        with profiler.section('player'):
+            if self.network is not None: # Другие игроки
+                color = self.config.get('REMOTE_PLAYER_COLOR', (70, 110, 200))
+                for x, y in self.network.remote_positions():
+                    self.renderer.draw_player(dict(self.player, x=x, y=y, color=color),
+                                              self.camera_x, self.camera_y, self.zoom)
+            self.renderer.draw_player(dict(self.player, x=render_x, y=render_y),
+                                      self.camera_x, self.camera_y, self.zoom)
+        
+        with profiler.section('hud'):
             fps = int(self.clock.get_fps())
             
             self.renderer.draw_hud(self.player, self.selected_block, 
                                  self.inventory, fps, self.blocks)
             
+            if self.show_minimap:
+                self.renderer.draw_minimap(self.player)
+            
             if self.error_message:
                 self.renderer.draw_error(self.error_message)
             
+            if profiler.enabled:
+                self.renderer.draw_profiler(profiler)
+        
+        with profiler.section('flip'):
             pygame.display.flip()
-            self.clock.tick(self.config['FPS'])
\ No newline at end of file
+        
+        if self.time_to_first_frame is None:
+            now = time.perf_counter()
+            self.time_to_first_frame = now - self.start_time
+            self.startup.add('first_frame', self.ready_time, now - self.ready_time)
+        
+        with profiler.section('save'):
+            self.autosave()
+        
+        profiler.end_frame()
+        return running
+    
+    def run(self):
+        """Запускает весь игровой цикл"""
+        try:
+            running = self.run_frame()
+            print(self.startup.summary())
+            while running:
+                self.clock.tick(self.config['FPS'])
+                running = self.run_frame()
+        finally:
+            if self.save_tracker.unsaved: # Сохраняемся при выходе из игры
+                self.save_game()
+            if self.input_recorder is not None:
+                self.input_recorder.close()
+            if self.network is not None:
+                self.network.close()
+            self.world.close()
\ No newline at end of file
@@ -0,0 +1,248 @@
+import numpy as np
+from game.physics import sweep_boxes_x, sweep_boxes_y
+
+# Мобы и другие сущности. Вместо словаря на каждого моба (как у игрока) все данные лежат
+# в общих массивах numpy: x[i], y[i], vx[i], vy[i] ... - i-й элемент каждого массива относится к i-му мобу.
+# Тогда гравитация, ходьба и столкновения с блоками считаются одной операцией сразу для всех мобов.
+# Просчитываются только мобы рядом с камерой (остальные "замирают", пока игрок далеко).
+#
+# Чтобы быстро находить мобов в прямоугольнике (мобы рядом с мобом, мобы в клетке, куда ставят блок),
+# используется пространственный хэш: мир делится на клетки CELL x CELL пикселей, а мобы
+# сортируются по номеру клетки. Поиск проверяет только мобов из клеток, которые задевает прямоугольник.
+# Тем же хэшем ищутся столкновения мобов друг с другом: моб, шагнувший в другого, отступает и разворачивается
+
+ROW_KEYS = 1 << 20 # Ключ клетки хэша = столбец * ROW_KEYS + строка
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        """Инициализация (cell_size - размер клетки хэша в пикселях)"""
+        self.cell_size = cell_size
+        self.keys = np.empty(0, dtype=np.int64) # Ключи клеток по возрастанию
+        self.ids = np.empty(0, dtype=np.int64) # Номера сущностей в том же порядке
+
+    def cell_keys(self, xs, ys):
+        columns = np.floor_divide(xs, self.cell_size).astype(np.int64)
+        rows = np.clip(np.floor_divide(ys, self.cell_size).astype(np.int64), 0, ROW_KEYS - 1)
+        return columns * ROW_KEYS + rows
+
+    def build(self, ids, xs, ys):
+        """Раскладывает сущности ids с левыми верхними углами (xs, ys) по клеткам"""
+        keys = self.cell_keys(xs, ys)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ids = ids[order]
+
+    def candidates(self, x0, y0, x1, y1):
+        """Сущности, левый верхний угол которых лежит в клетках, задевающих прямоугольник [x0, x1) x [y0, y1)"""
+        size = self.cell_size
+        row0 = max(0, int(y0 // size))
+        row1 = min(ROW_KEYS - 1, int((y1 - 1) // size))
+        if row1 < row0:
+            return self.ids[:0]
+        found = []
+        for column in range(int(x0 // size), int((x1 - 1) // size) + 1):
+            start, end = np.searchsorted(self.keys, (column * ROW_KEYS + row0, column * ROW_KEYS + row1 + 1))
+            if start < end:
+                found.append(self.ids[start:end])
+        if not found:
+            return self.ids[:0]
+        return np.concatenate(found)
+
+    def pairs(self, xs, ys):
+        """Пары (a, b) номеров прямоугольников, левые верхние углы которых в одной или соседних клетках
+
+        Каждая пара - один раз. Если клетка хэша не меньше размеров прямоугольника,
+        пересекающиеся прямоугольники всегда попадают в пары.
+        """
+        keys = self.cell_keys(xs, ys)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        index = np.arange(len(keys))
+        # Ключи целые, поэтому конец клетки k - это начало клетки k + 1
+        below = np.searchsorted(keys, keys + 1)
+        below_end = np.searchsorted(keys, keys + 2)
+        right = [np.searchsorted(keys, keys + ROW_KEYS + offset) for offset in (-1, 0, 1, 2)]
+        first, second = [], []
+        # Та же клетка (только следующие по порядку - без себя и без повторов) и половина соседних:
+        # ниже, справа сверху, справа, справа снизу - справа они идут подряд одним диапазоном ключей
+        for start, end in ((index + 1, below), (below, below_end), (right[0], right[3])):
+            counts = np.maximum(end - start, 0)
+            a = np.repeat(index, counts)
+            b = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            first.append(order[a])
+            second.append(order[b])
+        return np.concatenate(first), np.concatenate(second)
+
+
+class Entities:
+    def __init__(self, block_size, width, height, speed=2, gravity=0.8, jump_power=12,
+                 turn_chance=0.002, capacity=256, seed=None):
+        """Инициализация
+
+        width, height - размер каждой сущности в пикселях, speed и jump_power - как у игрока
+        (пиксели за кадр при 60 FPS), turn_chance - вероятность развернуться на каждом шаге.
+        """
+        self.block_size = block_size
+        self.width = width
+        self.height = height
+        self.speed = speed
+        self.gravity = gravity
+        self.jump_power = jump_power
+        self.turn_chance = turn_chance
+        self.max_fall = block_size - 1 # За шаг нельзя пролететь больше блока - иначе проскочим сквозь пол
+        self.rng = np.random.default_rng(seed)
+        self.count = 0 # Сколько ячеек массивов занято (включая удаленных мобов)
+        self.free = [] # Ячейки удаленных мобов - их займут новые
+        self.allocate(capacity)
+        self.hash = SpatialHash(max(width, height, block_size) * 2)
+        self.hash_dirty = True # Мобы сдвинулись - хэш нужно пересобрать перед поиском
+        self.contact_hash = SpatialHash(max(width, height)) # Для столкновений хватает клеток в размер моба
+
+    def allocate(self, capacity):
+        """Создает (или увеличивает) массивы под capacity сущностей"""
+        def grow(name, dtype, fill=0):
+            array = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+        for name in ('x', 'y', 'vx', 'vy', 'prev_x', 'prev_y'):
+            grow(name, np.float64)
+        grow('direction', np.int8, 1) # -1 - идет влево, 1 - вправо
+        grow('kind', np.uint8) # Тип сущности (для модов)
+        grow('alive', np.bool_)
+        grow('on_ground', np.bool_)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def spawn(self, x, y, direction=1, kind=0):
+        """Добавляет сущность и возвращает её номер"""
+        return int(self.spawn_many([x], [y], [direction], kind)[0])
+
+    def spawn_many(self, xs, ys, directions=1, kind=0):
+        """Добавляет сразу много сущностей и возвращает их номера"""
+        xs = np.asarray(xs, dtype=np.float64)
+        n = len(xs)
+        reused = [self.free.pop() for _ in range(min(n, len(self.free)))]
+        new = n - len(reused)
+        if self.count + new > self.capacity:
+            self.allocate(max(self.capacity * 2, self.count + new))
+        ids = np.array(reused + list(range(self.count, self.count + new)), dtype=np.int64)
+        self.count += new
+        self.x[ids] = self.prev_x[ids] = xs
+        self.y[ids] = self.prev_y[ids] = ys
+        self.vx[ids] = 0
+        self.vy[ids] = 0
+        self.direction[ids] = directions
+        self.kind[ids] = kind
+        self.alive[ids] = True
+        self.on_ground[ids] = False
+        self.hash_dirty = True
+        return ids
+
+    def remove(self, index):
+        """Удаляет сущность (её ячейку займет следующая новая)"""
+        if self.alive[index]:
+            self.alive[index] = False
+            self.free.append(int(index))
+            self.hash_dirty = True
+
+    def active(self, x0, x1):
+        """Номера живых сущностей, левый край которых в столбцах мира [x0, x1)"""
+        n = self.count
+        x = self.x[:n]
+        return np.flatnonzero(self.alive[:n] & (x >= x0 * self.block_size) & (x < x1 * self.block_size))
+
+    def step(self, world, x0, x1, scale=1.0):
+        """Один шаг физики для сущностей в столбцах [x0, x1) (scale - как physics_scale у игрока)"""
+        ids = self.active(x0, x1)
+        n = self.count
+        self.prev_x[:n] = self.x[:n] # Для плавной отрисовки между шагами
+        self.prev_y[:n] = self.y[:n]
+        if len(ids) == 0:
+            return
+        block_size = self.block_size
+        width, height = self.width, self.height
+        # Моб у края участка задевает и соседние столбцы - берем их с запасом на его ширину и шаг,
+        # иначе столбцы за краем участка считались бы стеной
+        pad = int(width // block_size) + 2
+        x0, x1 = x0 - pad, x1 + pad
+        if world.width is not None: # Конечный мир: за его края столбцы не берем (там стена)
+            x0, x1 = max(x0, 0), min(x1, world.width)
+        solid = world.solid_region(x0, 0, x1, world.height)
+        x, y = self.x[ids], self.y[ids]
+        direction = self.direction[ids]
+        on_ground = self.on_ground[ids]
+
+        turn = self.rng.random(len(ids)) < self.turn_chance # Иногда мобы сами разворачиваются
+        direction = np.where(turn, -direction, direction)
+
+        # Ходьба: упершись в стену на земле - прыгаем, а если и в прыжке не получилось - разворачиваемся
+        dx = np.clip(direction * self.speed * scale, 1 - block_size, block_size - 1)
+        x, blocked = sweep_boxes_x(solid, x0, x, y, width, height, dx, block_size)
+        x, direction = self.separate(self.x[ids], x, y, direction)
+        vy = self.vy[ids]
+        jump = blocked & on_ground
+        vy = np.where(jump, -self.jump_power, vy)
+        direction = np.where(blocked & ~on_ground & (vy >= 0), -direction, direction)
+
+        # Гравитация
+        vy = np.minimum(vy + self.gravity * scale, self.max_fall)
+        dy = np.clip(vy * scale, 1 - block_size, block_size - 1)
+        y, hit = sweep_boxes_y(solid, x0, x, y, width, height, dy, block_size)
+        on_ground = hit & (dy > 0)
+        vy = np.where(hit, 0, vy)
+
+        self.x[ids], self.y[ids] = x, y
+        self.vx[ids] = dx
+        self.vy[ids] = vy
+        self.direction[ids] = direction
+        self.on_ground[ids] = on_ground
+        self.hash_dirty = True
+
+    def separate(self, old_x, x, y, direction):
+        """Столкновения мобов друг с другом: кто после шага вошел в другого моба, шагая к нему,
+        возвращается на прежнее место; оба разворачиваются друг от друга
+        """
+        a, b = self.contact_hash.pairs(x, y)
+        overlap = np.abs(x[a] - x[b]) < self.width
+        overlap &= np.abs(y[a] - y[b]) < self.height
+        a, b = a[overlap], b[overlap]
+        if len(a) == 0:
+            return x, direction
+        side = np.sign(x[b] - x[a]) # Где b относительно a
+        side = np.where(side == 0, np.where(b > a, 1, -1), side) # В одном столбце: моб с большим номером уходит вправо
+        x, direction = x.copy(), direction.copy()
+        for mob, other_side in ((a, side), (b, -side)):
+            towards = direction[mob] == other_side
+            x[mob[towards]] = old_x[mob[towards]]
+            away = other_side != 0
+            direction[mob[away]] = -other_side[away]
+        return x, direction
+
+    def query(self, x, y, width, height):
+        """Номера живых сущностей, пересекающихся с прямоугольником (x, y, width, height) в пикселях"""
+        if self.hash_dirty:
+            ids = np.flatnonzero(self.alive[:self.count])
+            self.hash.build(ids, self.x[ids], self.y[ids])
+            self.hash_dirty = False
+        # Сущность хранится в клетке своего левого верхнего угла, поэтому область поиска
+        # расширяется влево и вверх на размер сущности
+        ids = self.hash.candidates(x - self.width + 1, y - self.height + 1, x + width, y + height)
+        ex, ey = self.x[ids], self.y[ids]
+        overlap = (ex < x + width) & (ex + self.width > x) & (ey < y + height) & (ey + self.height > y)
+        return ids[overlap]
+
+    def neighbors(self, index):
+        """Другие сущности, пересекающиеся с сущностью index"""
+        ids = self.query(self.x[index], self.y[index], self.width, self.height)
+        return ids[ids != index]
+
+    def positions(self, alpha=1.0):
+        """Номера живых сущностей и их позиции между двумя последними шагами (alpha - доля шага)"""
+        ids = np.flatnonzero(self.alive[:self.count])
+        x = self.prev_x[ids] + (self.x[ids] - self.prev_x[ids]) * alpha
+        y = self.prev_y[ids] + (self.y[ids] - self.prev_y[ids]) * alpha
+        return ids, x, y
\ No newline at end of file
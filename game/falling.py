@@ -0,0 +1,96 @@
+import numpy as np
+from game.world import AIR
+
+# Падающие блоки (песок, гравий - всё, у чего в BLOCKS указано 'gravity': True).
+# Мир не просматривается целиком: проверяются только "активные" клетки - те, рядом с которыми
+# что-то изменилось. Блок, под которым пусто, падает на одну клетку за тик, причем
+# вся стопка падающих блоков над ним сдвигается одной операцией над столбцом.
+# В клетку, занятую игроком или мобом, блок не падает: он ждет, пока она освободится
+
+class FallingBlocks:
+    def __init__(self, world, max_updates=2048, tick_rate=20, max_ticks=2, occupied=None):
+        """Инициализация
+
+        max_updates - сколько блоков может сдвинуться за один тик (остальные подождут следующего).
+        tick_rate - тиков в секунду (с такой скоростью в клетках в секунду падают блоки).
+        max_ticks - сколько тиков можно "догнать" за один медленный кадр.
+        occupied(x, y) - занята ли клетка игроком или мобом (None - никто не мешает падать).
+        """
+        self.world = world
+        self.occupied = occupied
+        self.gravity = world.registry.gravity
+        self.max_updates = max_updates
+        self.tick_time = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.time = 0.0 # Накопленное, но еще не просчитанное время
+        self.active = set() # Клетки (x, y), которые нужно проверить на следующем тике
+        self.moving = False # Мир меняется самими падающими блоками - такие изменения не будят клетки
+        world.add_listener(self.on_world_changed)
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Будит падающие блоки в измененном участке и прямо над ним (они могли лишиться опоры)"""
+        if self.moving:
+            return
+        if len(self.gravity) != len(self.world.registry.gravity): # В реестре появились новые блоки
+            self.gravity = self.world.registry.gravity
+        top = max(0, y0 - 1)
+        region = self.world.get_region(x0, top, x1, y1)
+        if region.size == 0:
+            return
+        ys, xs = np.nonzero(self.gravity[region])
+        if len(ys):
+            x_start = max(x0, 0) if self.world.width is not None else x0
+            self.active.update(zip((xs + x_start).tolist(), (ys + top).tolist()))
+
+    def update(self, frame_time):
+        """Вызывается каждый кадр: делает столько тиков, сколько успело накопиться времени"""
+        if not self.active:
+            self.time = 0.0
+            return
+        self.time += frame_time
+        ticks = 0
+        while self.time >= self.tick_time and ticks < self.max_ticks:
+            self.tick()
+            self.time -= self.tick_time
+            ticks += 1
+        if ticks == self.max_ticks:
+            self.time = min(self.time, self.tick_time)
+
+    def tick(self):
+        """Один шаг падения: сдвигает вниз блоки, под которыми пусто"""
+        world = self.world
+        budget = self.max_updates
+        cells = sorted(self.active, key=lambda cell: -cell[1]) # Снизу вверх: нижний блок освобождает место верхним
+        self.active = set()
+        moved = {} # Столбец -> верхняя строка уже сдвинутой в этом тике стопки
+        self.moving = True
+        try:
+            for i, (x, y) in enumerate(cells):
+                if budget <= 0: # Лимит тика исчерпан - остальные клетки ждут следующего тика
+                    self.active.update(cells[i:])
+                    break
+                if moved.get(x, world.height) <= y: # Эту клетку уже сдвинули вместе со стопкой
+                    continue
+                if y + 1 >= world.height or world.get_id(x, y + 1) != AIR:
+                    continue
+                if self.occupied is not None and self.occupied(x, y + 1): # Внизу стоит игрок или моб - ждем
+                    self.active.add((x, y))
+                    continue
+                column = world.get_region(x, 0, x + 1, y + 1)[:, 0]
+                if not self.gravity[column[y]]:
+                    continue
+                # Верх стопки падающих блоков, лежащей на клетке (x, y)
+                solid_above = np.flatnonzero(~self.gravity[column])
+                top = int(solid_above[-1]) + 1 if len(solid_above) else 0
+                top = max(top, y + 1 - budget)
+                shifted = np.empty((y + 2 - top, 1), dtype=column.dtype)
+                shifted[0, 0] = AIR
+                shifted[1:, 0] = column[top:y + 1]
+                world.set_region(x, top, shifted)
+                budget -= y + 1 - top
+                moved[x] = top
+                self.active.add((x, y + 1)) # Стопка продолжит падать на следующем тике
+                if top > 0:
+                    self.active.add((x, top - 1)) # Если лимит оборвал стопку - её верх тоже должен упасть
+        finally:
+            self.moving = False
\ No newline at end of file
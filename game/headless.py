@@ -0,0 +1,58 @@
+import os
+import time
+import pygame
+
+# Запуск игры без окна: SDL рисует в память (драйвер "dummy"), а нажатия клавиш и мыши
+# подаются по заранее написанному сценарию. Нужен для замеров производительности
+
+PHASES = ['events', 'physics', 'world', 'player', 'hud', 'flip'] # Этапы одного кадра (участки профилировщика)
+
+def setup_headless():
+    """Включает отрисовку без окна (вызывать до создания GameEngine)"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+class KeyState:
+    """Состояние клавиатуры для сценария - ведет себя как результат pygame.key.get_pressed()"""
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+def key_event(key, down=True):
+    """Создает событие нажатия (или отпускания) клавиши"""
+    return pygame.event.Event(pygame.KEYDOWN if down else pygame.KEYUP, key=key)
+
+def click_event(pos, button=1):
+    """Создает событие нажатия кнопки мыши в точке экрана"""
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+
+def run_frames(engine, frames, script=None, frame_times=None):
+    """Прогоняет frames кадров игры по сценарию и возвращает замеры по этапам кадра
+
+    script(frame, engine) возвращает пару (список событий, KeyState) для очередного кадра.
+    frame_times - игровое время каждого кадра (по умолчанию все кадры длятся 1 / FPS).
+    """
+    profiler = engine.profiler
+    profiler.history = frames
+    profiler.samples.clear()
+    profiler.enabled = True
+    for phase in PHASES:
+        profiler.register_section(phase)
+
+    frame_time = 1.0 / engine.config['FPS'] # Игровое время кадра фиксировано - прогон повторяем
+    start = time.perf_counter()
+    for frame in range(frames):
+        events, keys = script(frame, engine) if script else ([], KeyState())
+        engine.run_frame(events, keys, frame_times[frame] if frame_times else frame_time)
+        engine.clock.tick() # Без ограничения FPS - только для счетчика в UI
+    total = time.perf_counter() - start
+
+    stats = profiler.stats()
+    return {
+        'frames': frames,
+        'fps': frames / total if total else 0.0,
+        'frame': stats.pop('frame'),
+        'phases': stats,
+    }
\ No newline at end of file
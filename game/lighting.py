@@ -0,0 +1,115 @@
+import numpy as np
+from collections import OrderedDict
+
+# Освещение: свет неба и светящихся блоков ('light' в BLOCKS), уровни от 0 до MAX_LIGHT.
+# Свет неба идет сверху вниз без ослабления до первого твердого блока, а дальше свет
+# расходится волной (поиск в ширину), теряя 1 уровень на каждой клетке. Сквозь твердые
+# блоки свет проходит хуже - так освещены несколько верхних блоков земли, а глубже темно.
+#
+# Свет хранится полосами (чанками) шириной CHUNK_SIZE столбцов на всю высоту мира.
+# Свет клетки зависит только от блоков не дальше MAX_LIGHT клеток по горизонтали, поэтому
+# полоса считается отдельно (с запасом по MAX_LIGHT столбцов с каждой стороны), а изменение
+# блока пересчитывает только полосы рядом с ним. Пересчет сообщает, у каких чанков
+# изменился свет, и только эти чанки перерисовываются заранее затемненными картинками блоков
+
+MAX_LIGHT = 15
+
+def propagate_light(solid, emit, solid_falloff=3):
+    """Считает свет участка по сетке твердости solid[y, x] и яркости светящихся блоков emit[y, x]
+
+    Каждый проход волны - одна операция numpy над всем участком, а не цикл по клеткам.
+    """
+    sky = np.logical_and.accumulate(~solid, axis=0) # Клетки, над которыми открытое небо
+    light = np.maximum(sky.astype(np.int16) * MAX_LIGHT, emit.astype(np.int16))
+    # Сколько света теряется при выходе из клетки (кроме 1 уровня за шаг): твердые блоки гасят свет быстрее
+    loss = np.where(solid & (emit == 0), solid_falloff - 1, 0).astype(np.int16) + 1
+    for _ in range(MAX_LIGHT):
+        source = light - loss
+        spread = np.zeros_like(light)
+        np.maximum(spread[1:, :], source[:-1, :], out=spread[1:, :])
+        np.maximum(spread[:-1, :], source[1:, :], out=spread[:-1, :])
+        np.maximum(spread[:, 1:], source[:, :-1], out=spread[:, 1:])
+        np.maximum(spread[:, :-1], source[:, 1:], out=spread[:, :-1])
+        updated = np.maximum(light, spread)
+        if np.array_equal(updated, light): # Волна остановилась раньше
+            break
+        light = updated
+    return light.astype(np.uint8)
+
+
+class Lighting:
+    def __init__(self, world, chunk_size, max_bytes=16 * 1024 * 1024):
+        """Инициализация (max_bytes - сколько памяти можно занять картами света)"""
+        self.world = world
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.maps = OrderedDict() # Номер полосы -> light[y, x], в порядке последнего использования
+        self.stale = set() # Полосы, которые нужно пересчитать из-за изменений мира
+        self.listeners = [] # callback(chunk_x, chunk_y) - свет в чанке изменился
+        world.add_listener(self.on_world_changed)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Отмечает устаревшими полосы, до которых может дойти изменение света"""
+        size = self.chunk_size
+        for strip in range((x0 - MAX_LIGHT) // size, (x1 - 1 + MAX_LIGHT) // size + 1):
+            if strip in self.maps:
+                self.stale.add(strip)
+            else: # Карты света нет, но картинки чанков полосы могли остаться в кэше - их тоже нужно перерисовать
+                for chunk_y in range((self.world.height + size - 1) // size):
+                    self.notify(strip, chunk_y)
+
+    def notify(self, strip, chunk_y):
+        for callback in self.listeners:
+            callback(strip, chunk_y)
+
+    def compute(self, strip):
+        """Считает свет полосы strip"""
+        size = self.chunk_size
+        x0 = strip * size - MAX_LIGHT
+        x1 = (strip + 1) * size + MAX_LIGHT
+        height = self.world.height
+        solid = self.world.solid_region(x0, 0, x1, height)
+        emit = np.zeros(solid.shape, dtype=np.uint8)
+        cx0, cx1 = self.world.clip_columns(x0, x1)
+        if cx0 < cx1:
+            emit[:, cx0 - x0:cx1 - x0] = self.world.registry.light[self.world.get_region(cx0, 0, cx1, height)]
+        return propagate_light(solid, emit)[:, MAX_LIGHT:MAX_LIGHT + size]
+
+    def get_map(self, strip):
+        """Возвращает свет полосы (считает его при первом обращении)"""
+        light = self.maps.get(strip)
+        if light is None:
+            light = self.maps[strip] = self.compute(strip)
+            self.stale.discard(strip)
+            self.evict()
+        else:
+            self.maps.move_to_end(strip)
+        return light
+
+    def get_chunk_light(self, chunk_x, chunk_y):
+        """Свет клеток чанка: light[y, x] от 0 до MAX_LIGHT"""
+        size = self.chunk_size
+        return self.get_map(chunk_x)[chunk_y * size:(chunk_y + 1) * size]
+
+    def update(self):
+        """Пересчитывает устаревшие полосы и сообщает, в каких чанках изменился свет"""
+        size = self.chunk_size
+        for strip in list(self.stale):
+            self.stale.discard(strip)
+            old = self.maps.get(strip)
+            if old is None:
+                continue
+            light = self.maps[strip] = self.compute(strip)
+            changed = np.flatnonzero((light != old).any(axis=1))
+            for chunk_y in np.unique(changed // size).tolist():
+                self.notify(strip, chunk_y)
+
+    def evict(self):
+        """Забывает давно не использованные карты света сверх лимита памяти"""
+        strip_bytes = self.world.height * self.chunk_size
+        while len(self.maps) > 1 and len(self.maps) * strip_bytes > self.max_bytes:
+            strip, _ = self.maps.popitem(last=False)
+            self.stale.discard(strip)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import numpy as np
+import pygame
+from game.world import AIR
+
+# Миникарта: картинка "один пиксель - один блок" для полосы мира вокруг игрока (MINIMAP_BLOCKS
+# столбцов на всю высоту мира). Картинка строится целиком одним surfarray.blit_array из таблицы
+# цветов блоков, а изменения мира перекрашивают только пиксели измененных клеток.
+# На экран попадает только окно из MINIMAP_ROWS строк вокруг игрока, чтобы высокий мир не
+# растягивал миникарту на весь экран. Увеличенная картинка окна для панели UI хранится готовой
+# и пересчитывается только после изменений, поэтому каждый кадр миникарта - это одно
+# копирование картинки и точка игрока
+
+class Minimap:
+    def __init__(self, world, get_colors, blocks, rows, scale):
+        """Инициализация (get_colors() - цвета блоков по ID, blocks x rows - размер окна в блоках, scale - пикселей экрана на блок)"""
+        self.world = world
+        self.get_colors = get_colors
+        self.blocks = blocks
+        self.rows = min(rows, world.height)
+        self.scale = scale
+        self.x0 = None # Первый столбец полосы на картинке (None - картинка еще не строилась)
+        self.y0 = 0 # Первая строка окна, которое видно на экране
+        self.surface = pygame.Surface((blocks, world.height)).convert() # surface[x, y] - цвет клетки (x0 + x, y)
+        self.view = None # Увеличенная картинка для панели UI
+        world.add_listener(self.on_world_changed)
+
+    def cell_colors(self, x0, y0, x1, y1):
+        """Цвета клеток участка [x0, x1) x [y0, y1) (вне мира - цвет неба): rgb[x, y] как у surfarray"""
+        ids = np.full((y1 - y0, x1 - x0), AIR, dtype=self.world.registry.dtype)
+        cx0 = x0 if self.world.width is None else max(0, x0)
+        region = self.world.get_region(x0, y0, x1, y1)
+        ids[:region.shape[0], cx0 - x0:cx0 - x0 + region.shape[1]] = region
+        return self.get_colors()[ids].astype(np.uint8).transpose(1, 0, 2)
+
+    def build(self, x0):
+        """Строит картинку заново для полосы, начинающейся со столбца x0"""
+        self.x0 = x0
+        pygame.surfarray.blit_array(self.surface, self.cell_colors(x0, 0, x0 + self.blocks, self.world.height))
+        self.view = None
+
+    def clear(self):
+        """Забывает картинку (например, после загрузки новых текстур - цвета блоков поменялись)"""
+        self.x0 = None
+        self.view = None
+
+    def update(self, center_x, center_y):
+        """Сдвигает полосу и окно, если клетка (center_x, center_y) (игрок) ушла от их середины дальше, чем на четверть размера"""
+        x0 = center_x - self.blocks // 2
+        if self.world.width is not None: # Полоса конечного мира не заходит за его края
+            x0 = max(0, min(x0, self.world.width - self.blocks))
+        if self.x0 is None or (x0 != self.x0 and abs(center_x - (self.x0 + self.blocks // 2)) > self.blocks // 4):
+            self.build(x0)
+        y0 = max(0, min(center_y - self.rows // 2, self.world.height - self.rows))
+        if y0 != self.y0 and abs(center_y - (self.y0 + self.rows // 2)) > self.rows // 4:
+            self.y0 = y0
+            self.view = None
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Перекрашивает пиксели измененных клеток, попавших на картинку"""
+        if self.x0 is None:
+            return
+        x0, x1 = max(x0, self.x0), min(x1, self.x0 + self.blocks)
+        y0, y1 = max(y0, 0), min(y1, self.world.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        pixels = pygame.surfarray.pixels3d(self.surface)
+        pixels[x0 - self.x0:x1 - self.x0, y0:y1] = self.cell_colors(x0, y0, x1, y1)
+        del pixels # Картинка заблокирована, пока на её пиксели есть ссылка
+        if y0 < self.y0 + self.rows and y1 > self.y0: # Изменилось видимое окно
+            self.view = None
+
+    def get_view(self):
+        """Увеличенная картинка окна для панели UI (пересчитывается только после изменений)"""
+        if self.view is None:
+            window = self.surface.subsurface((0, self.y0, self.blocks, self.rows))
+            self.view = pygame.transform.scale(window, (self.blocks * self.scale, self.rows * self.scale))
+        return self.view
\ No newline at end of file
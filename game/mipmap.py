@@ -0,0 +1,97 @@
+import numpy as np
+import pygame
+from game.chunk_cache import ChunkCache
+from game.world import AIR
+
+# Уменьшенные картинки мира для сильно отдаленной камеры: рисовать каждый блок картинкой
+# при отдалении слишком дорого (блоков на экране становится в разы больше), поэтому мир
+# рисуется готовыми картинками, где один пиксель - средний цвет квадрата блоков.
+# Уровень level: один пиксель - квадрат 2**level x 2**level блоков. Картинки уровня хранятся
+# кусками TILE x TILE пикселей и строятся при первом показе прямо из клеток мира.
+# Изменение мира не перерисовывает куски целиком: на каждом уже построенном уровне
+# пересчитываются только пиксели над измененными клетками
+
+TILE = 64 # Размер куска картинки в пикселях
+
+class WorldMipmaps:
+    def __init__(self, world, color_of, sky_color, max_bytes):
+        """Инициализация (color_of(блок) - цвет блока (R, G, B), воздух и все вне мира - цвет неба)"""
+        self.world = world
+        self.color_of = color_of
+        self.sky_color = sky_color
+        self.colors = np.zeros((0, 3), dtype=np.uint32) # colors[ID блока] - цвет блока
+        self.cache = ChunkCache(max_bytes) # (уровень, x куска, y куска) -> Surface
+        self.levels = set() # Уровни, куски которых уже строились
+        world.add_listener(self.on_world_changed)
+
+    def get_colors(self):
+        """Цвета блоков по ID (дополняются, если в реестре появились новые блоки)"""
+        names = self.world.registry.names
+        if len(self.colors) != len(names):
+            colors = [self.color_of(name)[:3] for name in names[len(self.colors):]]
+            self.colors = np.concatenate([self.colors, np.array(colors, dtype=np.uint32).reshape(-1, 3)])
+            self.colors[AIR] = self.sky_color
+        return self.colors
+
+    def clear(self):
+        """Забывает все картинки и цвета блоков (например, после загрузки новых текстур)"""
+        self.colors = np.zeros((0, 3), dtype=np.uint32)
+        self.cache.clear()
+        self.levels.clear()
+
+    def average(self, level, x0, y0, x1, y1):
+        """Цвета пикселей уровня level над блоками [x0, x1) x [y0, y1) (границы кратны 2**level): rgb[y, x]"""
+        scale = 1 << level
+        ids = np.zeros((y1 - y0, x1 - x0), dtype=self.world.registry.dtype) # Вне мира - воздух (цвет неба)
+        cx0 = x0 if self.world.width is None else max(0, x0)
+        cy0 = max(0, y0)
+        region = self.world.get_region(x0, y0, x1, y1)
+        ids[cy0 - y0:cy0 - y0 + region.shape[0], cx0 - x0:cx0 - x0 + region.shape[1]] = region
+        rgb = self.get_colors()[ids]
+        height, width = ids.shape
+        rgb = rgb.reshape(height // scale, scale, width // scale, scale, 3).sum(axis=(1, 3))
+        return (rgb // (scale * scale)).astype(np.uint8)
+
+    def paint(self, surface, level, tile_x, tile_y, x0, y0, x1, y1):
+        """Перерисовывает пиксели куска над блоками [x0, x1) x [y0, y1) (границы кратны 2**level)"""
+        # Ниже и выше мира (и за краями конечного мира) только небо - его не считаем
+        scale = 1 << level
+        y0, y1 = max(y0, 0), min(y1, (self.world.height + scale - 1) // scale * scale)
+        if self.world.width is not None:
+            x0, x1 = max(x0, 0), min(x1, (self.world.width + scale - 1) // scale * scale)
+        if x0 >= x1 or y0 >= y1:
+            return
+        rgb = self.average(level, x0, y0, x1, y1)
+        px, py = x0 // scale - tile_x * TILE, y0 // scale - tile_y * TILE
+        pixels = pygame.surfarray.pixels3d(surface) # pixels[x, y] - прямо пиксели картинки
+        pixels[px:px + rgb.shape[1], py:py + rgb.shape[0]] = rgb.transpose(1, 0, 2)
+        del pixels # Картинка заблокирована, пока на её пиксели есть ссылка
+
+    def get_tile(self, level, tile_x, tile_y):
+        """Кусок картинки уровня level (строит его при первом обращении)"""
+        key = (level, tile_x, tile_y)
+        surface = self.cache.get(key)
+        if surface is None:
+            surface = pygame.Surface((TILE, TILE)).convert()
+            surface.fill(self.sky_color)
+            blocks = TILE << level # Сколько блоков покрывает кусок
+            self.paint(surface, level, tile_x, tile_y, tile_x * blocks, tile_y * blocks,
+                       (tile_x + 1) * blocks, (tile_y + 1) * blocks)
+            self.cache.put(key, surface)
+            self.levels.add(level)
+        return surface
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Пересчитывает пиксели над измененным участком во всех уже построенных кусках"""
+        for level in self.levels:
+            scale = 1 << level
+            blocks = TILE << level
+            ax0, ay0 = x0 // scale * scale, y0 // scale * scale
+            ax1, ay1 = -(-x1 // scale) * scale, -(-y1 // scale) * scale
+            for tile_y in range(ay0 // blocks, (ay1 - 1) // blocks + 1):
+                for tile_x in range(ax0 // blocks, (ax1 - 1) // blocks + 1):
+                    key = (level, tile_x, tile_y)
+                    if key in self.cache:
+                        self.paint(self.cache.get(key), level, tile_x, tile_y,
+                                   max(ax0, tile_x * blocks), max(ay0, tile_y * blocks),
+                                   min(ax1, (tile_x + 1) * blocks), min(ay1, (tile_y + 1) * blocks))
\ No newline at end of file
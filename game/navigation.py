@@ -0,0 +1,243 @@
+import heapq
+import time
+import numpy as np
+from collections import OrderedDict
+
+# Навигация по миру для ИИ мобов: граф "где можно стоять и куда оттуда можно попасть".
+# Узел графа - клетка (x, y), в которой может стоять существо высотой agent_height блоков:
+# сама клетка и клетки над ней пустые, а под ней твердый блок. Ребра ведут в соседние столбцы:
+#   шаг    - в соседнюю клетку на той же высоте,
+#   прыжок - на уступ выше, но не выше высоты прыжка (считается из JUMP_POWER и GRAVITY),
+#   падение - с края вниз до первого твердого блока.
+#
+# Граф не строится для всего мира заранее: узлы считаются полосами по STRIP столбцов при первом
+# обращении, а ребра узла - когда поиск пути впервые до него доходит. Изменение блока сбрасывает
+# только полосы и ребра рядом с ним (ребра столбца зависят от соседних столбцов), а также
+# найденные пути, поиск которых проходил через эти столбцы. Полосы (и ребра их столбцов)
+# хранятся не дольше, чем позволяет лимит памяти: давно не нужные забываются и при
+# следующем обращении считаются заново, поэтому в бесконечном мире память не растет с пройденным путем.
+#
+# Пути ищутся алгоритмом A* не сразу, а в очереди: каждый кадр update() продолжает поиски,
+# пока не кончится выделенное время, поэтому сотня запросов в одном кадре не вызывает рывка
+
+STRIP = 16 # Ширина полосы узлов в столбцах
+STEPS_PER_CHECK = 16 # Сколько узлов раскрывает поиск между проверками времени
+
+def jump_height(jump_power, gravity, scale=1.0):
+    """Высота прыжка в пикселях - так же, как её набирает игрок шагами физики"""
+    velocity = -jump_power
+    height = 0.0
+    while True:
+        velocity += gravity * scale
+        if velocity >= 0:
+            return height
+        height -= velocity * scale
+
+
+class PathRequest:
+    def __init__(self, start, goal):
+        """Запрос пути из узла start в узел goal"""
+        self.start = start
+        self.goal = goal
+        self.done = False
+        self.path = None # Список узлов от start до goal (None - пути нет)
+        self.search = None # Незаконченный поиск (генератор)
+        self.first = self.last = None # Крайние столбцы, узлы которых поиск уже раскрыл
+
+
+class Navigation:
+    def __init__(self, world, jump_blocks, agent_height=2, max_fall=None, max_nodes=20000, cache_size=256,
+                 max_bytes=8 * 1024 * 1024):
+        """Инициализация
+
+        jump_blocks - на сколько блоков можно запрыгнуть, agent_height - рост существа в блоках,
+        max_fall - с какой высоты можно спрыгнуть (None - с любой), max_nodes - предел узлов одного поиска.
+        max_bytes - сколько памяти можно занять полосами узлов.
+        """
+        self.world = world
+        self.jump_blocks = jump_blocks
+        self.agent_height = agent_height
+        self.max_fall = max_fall
+        self.max_nodes = max_nodes
+        self.cache_size = cache_size
+        self.max_bytes = max_bytes
+        self.strips = OrderedDict() # Номер полосы -> (solid[y, x], stand[y, x]), в порядке последнего использования
+        self.edges = {} # Столбец -> {строка: [(x, y, цена), ...]}
+        self.paths = OrderedDict() # (start, goal) -> (путь, первый столбец поиска, последний столбец поиска)
+        self.queue = [] # Запросы, которые еще ищутся
+        self.pending = {} # (start, goal) -> запрос из очереди (одинаковые запросы ищутся один раз)
+        world.add_listener(self.on_world_changed)
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Чинит граф рядом с измененными столбцами [x0, x1)"""
+        for strip in range(x0 // STRIP, (x1 - 1) // STRIP + 1):
+            self.strips.pop(strip, None)
+        for x in range(x0 - 1, x1 + 1): # Ребра соседних столбцов ведут в измененные
+            self.edges.pop(x, None)
+        for key, (_, first, last) in list(self.paths.items()):
+            if first <= x1 and last >= x0 - 1:
+                del self.paths[key]
+        for request in self.queue: # Поиск, раскрывший узлы рядом с изменением, начинаем заново
+            if request.first is not None and request.first - 1 <= x1 and request.last + 1 >= x0 - 1:
+                request.search = None
+
+    def get_strip(self, strip):
+        """Твердость клеток и клетки, где можно стоять, для полосы strip"""
+        data = self.strips.get(strip)
+        if data is None:
+            height = self.world.height
+            solid = self.world.solid_region(strip * STRIP, 0, (strip + 1) * STRIP, height)
+            clear = ~solid # Клетка и agent_height - 1 клеток над ней пустые (выше мира - пусто)
+            for i in range(1, self.agent_height):
+                clear[i:] &= ~solid[:-i]
+            stand = np.zeros_like(solid)
+            stand[:-1] = clear[:-1] & solid[1:] # Под ногами твердый блок
+            data = self.strips[strip] = (solid, stand)
+            self.evict()
+        else:
+            self.strips.move_to_end(strip)
+        return data
+
+    def evict(self):
+        """Забывает давно не использованные полосы сверх лимита памяти вместе с ребрами их столбцов"""
+        strip_bytes = 2 * self.world.height * STRIP
+        while len(self.strips) > 1 and len(self.strips) * strip_bytes > self.max_bytes:
+            strip, _ = self.strips.popitem(last=False)
+            for x in range(strip * STRIP, (strip + 1) * STRIP):
+                self.edges.pop(x, None)
+
+    def is_solid(self, x, y):
+        if y < 0:
+            return False
+        if y >= self.world.height:
+            return True
+        return bool(self.get_strip(x // STRIP)[0][y, x % STRIP])
+
+    def can_stand(self, x, y):
+        if not 0 <= y < self.world.height:
+            return False
+        return bool(self.get_strip(x // STRIP)[1][y, x % STRIP])
+
+    def nearest_node(self, x, y):
+        """Ближайшая клетка, где можно стоять, в столбце x не выше строки y (None - нет такой)"""
+        stand = self.get_strip(x // STRIP)[1][max(y, 0):, x % STRIP]
+        below = np.flatnonzero(stand)
+        return (x, max(y, 0) + int(below[0])) if len(below) else None
+
+    def get_edges(self, x, y):
+        """Ребра из узла (x, y): [(x, y, цена), ...]"""
+        column = self.edges.setdefault(x, {})
+        edges = column.get(y)
+        if edges is None:
+            edges = column[y] = self.build_edges(x, y)
+        return edges
+
+    def build_edges(self, x, y):
+        """Куда можно попасть из (x, y) за одно движение в соседний столбец"""
+        edges = []
+        height = self.agent_height
+        for nx in (x - 1, x + 1):
+            if self.can_stand(nx, y): # Шаг
+                edges.append((nx, y, 1.0))
+                continue
+            # Прыжок на уступ: над головой должно хватать места на всю высоту прыжка
+            for rise in range(1, self.jump_blocks + 1):
+                if self.is_solid(x, y - height + 1 - rise):
+                    break
+                if self.can_stand(nx, y - rise):
+                    edges.append((nx, y - rise, 1.0 + rise))
+                    break
+            # Падение: сходим с края, если в соседнем столбце на нашей высоте свободно
+            if any(self.is_solid(nx, y - i) for i in range(height)):
+                continue
+            depth = 1
+            while not self.is_solid(nx, y + depth):
+                if self.max_fall is not None and depth > self.max_fall:
+                    depth = None
+                    break
+                depth += 1
+            if depth is not None and y + depth < self.world.height:
+                edges.append((nx, y + depth - 1, 1.0 + 0.5 * (depth - 1)))
+        return edges
+
+    def find_path(self, start, goal):
+        """Ищет путь сразу (без очереди) и возвращает список узлов или None"""
+        cached = self.paths.get((start, goal))
+        if cached is not None:
+            return cached[0]
+        request = PathRequest(start, goal)
+        self.run(request, None)
+        return request.path
+
+    def request(self, start, goal):
+        """Ставит поиск пути в очередь и возвращает PathRequest (готов, когда request.done)"""
+        key = (start, goal)
+        if key in self.pending:
+            return self.pending[key]
+        request = PathRequest(start, goal)
+        cached = self.paths.get(key)
+        if cached is not None:
+            self.paths.move_to_end(key)
+            request.path, request.done = cached[0], True
+            return request
+        self.queue.append(request)
+        self.pending[key] = request
+        return request
+
+    def update(self, budget):
+        """Продолжает поиски из очереди, пока не пройдет budget секунд"""
+        deadline = time.perf_counter() + budget
+        while self.queue and time.perf_counter() < deadline:
+            request = self.queue[0]
+            if self.run(request, deadline):
+                self.queue.pop(0)
+                del self.pending[(request.start, request.goal)]
+
+    def run(self, request, deadline):
+        """Продолжает поиск до конца или до deadline (None - без ограничения); True - поиск закончен"""
+        if request.search is None:
+            request.first = request.last = None
+            request.search = self.search(request)
+        for _ in request.search:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+        return request.done
+
+    def search(self, request):
+        """A* для запроса; генератор, который отдает управление каждые STEPS_PER_CHECK узлов"""
+        start, goal = request.start, request.goal
+        path = None
+        if start is None or goal is None: # Клетки, где можно стоять, не нашлось (nearest_node вернул None)
+            request.done = True
+            return
+        first = last = request.first = request.last = start[0]
+        if self.can_stand(*start) and self.can_stand(*goal):
+            came = {start: None}
+            cost = {start: 0.0}
+            heap = [(abs(goal[0] - start[0]), start)]
+            expanded = 0
+            while heap and expanded < self.max_nodes:
+                _, node = heapq.heappop(heap)
+                if node == goal:
+                    path = []
+                    while node is not None:
+                        path.append(node)
+                        node = came[node]
+                    path.reverse()
+                    break
+                expanded += 1
+                first, last = min(first, node[0]), max(last, node[0])
+                request.first, request.last = first, last
+                for nx, ny, price in self.get_edges(*node):
+                    new_cost = cost[node] + price
+                    if new_cost < cost.get((nx, ny), float('inf')):
+                        cost[(nx, ny)] = new_cost
+                        came[(nx, ny)] = node
+                        # Каждое ребро ведет в соседний столбец и стоит не меньше 1 - оценка не завышена
+                        heapq.heappush(heap, (new_cost + abs(goal[0] - nx), (nx, ny)))
+                if expanded % STEPS_PER_CHECK == 0:
+                    yield
+        self.paths[(start, goal)] = (path, first - 1, last + 1)
+        while len(self.paths) > self.cache_size:
+            self.paths.popitem(last=False)
+        request.path, request.done = path, True
\ No newline at end of file
@@ -0,0 +1,591 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import time
+import zlib
+import numpy as np
+from game.falling import FallingBlocks
+from game.save import WORLD_KEYS, SaveError, SaveFile, SaveTracker, write_save
+from game.streaming import StreamingWorld
+from game.terrain import TerrainGenerator
+from game.world import AIR, World
+
+# Игра по сети: сервер (python3 server.py) хранит общий мир, игроки подключаются к нему
+# (SERVER в mods/my_config.py). Мир строится генератором по зерну, поэтому при входе игрок
+# получает только настройки мира и чанки, которые уже кто-то изменил, - а не весь мир.
+# Дальше сервер NET_TICK_HZ раз в секунду рассылает одним сообщением все изменившиеся за тик
+# участки (прямоугольники клеток, как их записал мир) и позиции игроков, которые сдвинулись
+# (в четвертях пикселя). Клиент записывает каждый участок одним set_region. Трафик зависит от
+# того, сколько строят и ходят, а не от размера мира. Измененные чанки общего мира сервер
+# записывает в SERVER_SAVE_FILE (тем же форматом, что и сохранение игры) раз в AUTOSAVE_SECONDS
+# и при остановке, а после перезапуска продолжает мир из этого файла.
+#
+# Свой игрок и свои правки мира у клиента применяются сразу, не дожидаясь сервера (предсказание):
+# сервер проверяет каждую правку и отвечает на неё автору сообщением REJECTED с настоящими
+# значениями клеток, которые не прошли (клетку уже занял другой игрок), - или пустым, если правка
+# принята. Ответы приходят в порядке правок, поэтому клиент точно знает, какую из них отклонили, и
+# возвращает потраченные или полученные за неё блоки. Других игроков клиент рисует плавно между
+# двумя последними позициями.
+#
+# Сообщение: длина данных (uint32), тип (1 байт), данные
+
+MESSAGE = struct.Struct('<IB')
+HELLO, WELCOME, CHUNK, READY, EDIT, BLOCKS, MOVE, PLAYERS, LEAVE, REGION, REJECTED = range(1, 12)
+EDIT_ENTRY = struct.Struct('<iHH') # x, y, ID блока
+REGION_HEADER = struct.Struct('<iHHH') # x0, y0, высота, ширина участка (за ними - сжатые ID блоков)
+POSITION = struct.Struct('<ii') # x, y в четвертях пикселя
+PLAYER_ENTRY = struct.Struct('<Hii') # номер игрока, x, y
+CHUNK_HEADER = struct.Struct('<q') # номер чанка
+POSITION_SCALE = 4 # Позиции передаются с точностью до 1/4 пикселя
+COMPRESS_FROM = 256 # Пачки правок длиннее стольких байт сжимаются
+MAX_SEND_BUFFER = 4 * 1024 * 1024 # Клиент, который не успевает принимать столько данных, отключается
+MAX_MESSAGE = 64 * 1024 * 1024
+MAX_REGION_CELLS = 1 << 20 # Правка участка больше стольких клеток отправляется несколькими сообщениями
+
+class NetworkError(Exception):
+    """Не удалось подключиться к серверу или сервер прислал что-то непонятное"""
+
+
+def pack(kind, payload=b''):
+    return MESSAGE.pack(len(payload), kind) + payload
+
+def pack_cells(xs, ys, ids):
+    """Пачка клеток: число клеток, затем массивы x, y и ID (сжатые, если пачка большая)"""
+    data = (struct.pack('<I', len(xs)) + np.asarray(xs, dtype='<i4').tobytes() +
+            np.asarray(ys, dtype='<u2').tobytes() + np.asarray(ids, dtype='<u2').tobytes())
+    if len(data) >= COMPRESS_FROM:
+        return b'\1' + zlib.compress(data, 1)
+    return b'\0' + data
+
+def pack_regions(regions):
+    """Пачка участков [(x0, y0, cells[y, x])]: подряд заголовок REGION_HEADER и ID клеток (сжатые, если пачка большая)"""
+    data = b''.join(REGION_HEADER.pack(x0, y0, *cells.shape) + np.ascontiguousarray(cells, dtype='<u2').tobytes()
+                    for x0, y0, cells in regions)
+    if len(data) >= COMPRESS_FROM:
+        return b'\1' + zlib.compress(data, 1)
+    return b'\0' + data
+
+def unpack_regions(payload):
+    data = zlib.decompress(payload[1:]) if payload[0] else payload[1:]
+    regions = []
+    pos = 0
+    while pos < len(data):
+        x0, y0, height, width = REGION_HEADER.unpack_from(data, pos)
+        pos += REGION_HEADER.size
+        cells = np.frombuffer(data, dtype='<u2', count=height * width, offset=pos).reshape(height, width)
+        regions.append((x0, y0, cells))
+        pos += height * width * 2
+    return regions
+
+def unpack_cells(payload):
+    data = zlib.decompress(payload[1:]) if payload[0] else payload[1:]
+    (count,) = struct.unpack_from('<I', data)
+    xs = np.frombuffer(data, dtype='<i4', count=count, offset=4)
+    ys = np.frombuffer(data, dtype='<u2', count=count, offset=4 + 4 * count)
+    ids = np.frombuffer(data, dtype='<u2', count=count, offset=4 + 6 * count)
+    return xs, ys, ids
+
+def cell_rects(xs, ys, ids):
+    """Собирает пачку клеток в прямоугольники [(x0, y0, cells[y, x])], чтобы записать каждый одним set_region
+
+    Подряд идущие клетки строки становятся отрезком, одинаковые отрезки соседних строк - одним
+    прямоугольником. Если клетка встречается в пачке несколько раз, остается последнее значение.
+    """
+    if len(xs) == 0:
+        return []
+    order = np.lexsort((xs, ys)) # Устойчивая сортировка по строкам, затем по столбцам
+    xs, ys, ids = xs[order].astype(np.int64), ys[order].astype(np.int64), ids[order]
+    last = np.ones(len(xs), dtype=bool)
+    last[:-1] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    xs, ys, ids = xs[last], ys[last], ids[last]
+    breaks = np.flatnonzero((np.diff(xs) != 1) | (np.diff(ys) != 0)) + 1
+    starts = [0] + breaks.tolist()
+    ends = breaks.tolist() + [len(xs)]
+    rects = []
+    growing = {} # (x0, x1) -> [x0, y0, последняя строка, отрезки ID по строкам]
+    for start, end in zip(starts, ends):
+        x0, x1, y = int(xs[start]), int(xs[end - 1]) + 1, int(ys[start])
+        rect = growing.get((x0, x1))
+        if rect is not None and rect[2] == y - 1:
+            rect[2] = y
+            rect[3].append(ids[start:end])
+            continue
+        if rect is not None:
+            rects.append(rect)
+        growing[(x0, x1)] = [x0, y, y, [ids[start:end]]]
+    rects.extend(growing.values())
+    return [(x0, y0, np.concatenate(rows).reshape(len(rows), -1)) for x0, y0, _, rows in rects]
+
+def quantize(x, y):
+    return int(round(x * POSITION_SCALE)), int(round(y * POSITION_SCALE))
+
+def create_world(config, registry, stored_chunk=None):
+    """Мир сервера: тот же генератор и те же настройки, что и у игроков
+
+    stored_chunk(номер чанка) -> cells или None - измененные чанки из сохранения сервера.
+    """
+    seed = config.get('WORLD_SEED')
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    height = config['WORLD_HEIGHT']
+    chunk_size = config.get('CHUNK_SIZE', 16)
+    generator = TerrainGenerator(seed, height, registry, config)
+    if config.get('INFINITE_WORLD', False):
+        world = StreamingWorld(height, registry, generator, chunk_size,
+                               memory_budget=config.get('WORLD_MEMORY_MB', 64) * 1024 * 1024)
+        world.chunk_source = stored_chunk
+        return world, seed
+
+    def generate_columns(x0, x1):
+        saved = stored_chunk(x0 // chunk_size) if stored_chunk is not None else None
+        if saved is not None:
+            return saved[:, :x1 - x0]
+        return generator.generate(x0, x1)
+
+    world = World(config['WORLD_WIDTH'], height, registry)
+    world.set_source(generate_columns, chunk_size)
+    return world, seed
+
+
+class ServerClient:
+    """Подключенный к серверу игрок"""
+    def __init__(self, player_id, writer):
+        self.id = player_id
+        self.writer = writer
+        self.position = None # Последняя присланная позиция (в четвертях пикселя)
+        self.sent_position = None # Позиция, которую уже разослали остальным
+
+    def send(self, data):
+        if self.writer.is_closing():
+            return
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > MAX_SEND_BUFFER: # Не успевает принимать
+            self.writer.close()
+
+
+class GameServer:
+    def __init__(self, config, registry, tick_rate=20, save_path=None):
+        """Инициализация (мир создается сразу по настройкам config)
+
+        save_path - файл, в котором сервер хранит общий мир (None - мир живет, пока работает сервер).
+        Если файл уже есть, мир продолжается из него с тем же зерном и настройками.
+        """
+        self.config = config
+        self.registry = registry
+        self.save_path = save_path
+        self.save_file = None
+        if save_path and os.path.exists(save_path):
+            self.save_file = SaveFile(save_path, registry) # Испорченный файл - SaveError: не затираем его новым миром
+            config = dict(config, **self.save_file.meta['world'], CHUNK_SIZE=self.save_file.chunk_size)
+        self.world, seed = create_world(config, registry, self.save_file.read_chunk if self.save_file else None)
+        self.chunk_size = config.get('CHUNK_SIZE', 16)
+        self.world_info = dict({key: config.get(key) for key in WORLD_KEYS},
+                               WORLD_SEED=seed, CHUNK_SIZE=self.chunk_size)
+        # Какие чанки отличаются от сгенерированных: их получают входящие игроки и их же записывает save
+        self.tracker = SaveTracker(self.world, self.chunk_size, self.save_file.index if self.save_file else ())
+        self.autosave_interval = config.get('AUTOSAVE_SECONDS', 60)
+        self.last_save_time = time.perf_counter()
+        self.falling_blocks = FallingBlocks(self.world, config.get('BLOCK_UPDATES_PER_TICK', 2048),
+                                            config.get('BLOCK_TICK_HZ', 20), occupied=self.cell_occupied)
+        self.tick_time = 1.0 / tick_rate
+        self.clients = {} # Номер игрока -> ServerClient
+        self.next_id = 1
+        self.changed = [] # Участки мира (x0, y0, x1, y1), изменившиеся за текущий тик
+        self.server = None
+        self.world.add_listener(self.on_world_changed, edits_only=True) # Загруженные чанки игроки строят сами
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        self.changed.append((x0, y0, x1, y1))
+
+    def cell_occupied(self, x, y):
+        """Занята ли клетка каким-нибудь игроком (по последней присланной им позиции)"""
+        block_size = self.config['BLOCK_SIZE']
+        left, top = x * block_size * POSITION_SCALE, y * block_size * POSITION_SCALE
+        size = block_size * POSITION_SCALE
+        for client in self.clients.values():
+            if client.position is not None:
+                px, py = client.position
+                if px < left + size and px + size > left and py < top + size and py + 2 * size > top:
+                    return True
+        return False
+
+    async def start(self, host='127.0.0.1', port=5000):
+        """Начинает принимать игроков и запускает тики"""
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.tick_task = asyncio.create_task(self.run_ticks())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.tick_task.cancel()
+        for client in list(self.clients.values()):
+            client.writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+        self.save()
+        self.world.close()
+        if self.save_file is not None:
+            self.save_file.close()
+
+    def save(self):
+        """Записывает измененные с прошлого сохранения чанки общего мира в save_path"""
+        self.last_save_time = time.perf_counter()
+        if not self.save_path or not self.tracker.unsaved:
+            return False
+        meta = {'world': {key: self.world_info[key] for key in WORLD_KEYS}}
+        try:
+            written = write_save(self.save_path, self.tracker, meta, self.registry, self.save_file)
+            if self.save_file is None: # Первое сохранение - дальше будем дописывать в этот файл
+                self.save_file = SaveFile(self.save_path, self.registry)
+        except (OSError, SaveError) as e:
+            print(f"Не удалось сохранить мир: {e}")
+            return False
+        print(f"Мир сохранен: чанков записано - {written}")
+        return True
+
+    async def handle_client(self, reader, writer):
+        """Один подключенный игрок: приветствие, снимок мира и затем его сообщения"""
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = None
+        try:
+            kind, _ = await self.read_message(reader)
+            if kind != HELLO:
+                return
+            client = ServerClient(self.next_id, writer)
+            self.next_id += 1
+            self.send_snapshot(client)
+            self.clients[client.id] = client # С этого момента игрок получает все правки мира
+            while True:
+                kind, payload = await self.read_message(reader)
+                if kind == EDIT:
+                    self.handle_edit(client, *EDIT_ENTRY.unpack(payload))
+                elif kind == MOVE:
+                    client.position = POSITION.unpack(payload)
+                elif kind == REGION:
+                    self.handle_region(client, payload)
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error, zlib.error, ValueError):
+            # Оборвалась связь или игрок прислал испорченное сообщение - отключаем его
+            pass
+        finally:
+            if client is not None and self.clients.pop(client.id, None) is not None:
+                self.broadcast(pack(LEAVE, struct.pack('<H', client.id)))
+            writer.close()
+
+    async def read_message(self, reader):
+        length, kind = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+        if length > MAX_MESSAGE:
+            raise ConnectionError('слишком длинное сообщение')
+        return kind, await reader.readexactly(length)
+
+    def send_snapshot(self, client):
+        """Настройки мира, измененные чанки и позиции остальных игроков"""
+        welcome = {'id': client.id, 'world': self.world_info, 'blocks': self.registry.names,
+                   'tick_rate': 1.0 / self.tick_time}
+        data = [pack(WELCOME, json.dumps(welcome, ensure_ascii=False).encode('utf-8'))]
+        for chunk_x in sorted(self.tracker.modified):
+            cells = self.tracker.chunk_cells(chunk_x)
+            data.append(pack(CHUNK, CHUNK_HEADER.pack(chunk_x) + zlib.compress(cells.tobytes(), 1)))
+        players = [PLAYER_ENTRY.pack(other.id, *other.sent_position)
+                   for other in self.clients.values() if other.sent_position is not None]
+        if players:
+            data.append(pack(PLAYERS, b''.join(players)))
+        data.append(pack(READY))
+        client.send(b''.join(data))
+
+    def handle_edit(self, client, x, y, block_id):
+        """Проверяет правку игрока: ставить можно только в воздух, ломать - только ломаемые блоки"""
+        world = self.world
+        valid = world.in_bounds(x, y) and block_id < len(self.registry.names)
+        if valid:
+            current = world.get_id(x, y)
+            if block_id == AIR:
+                valid = current != AIR and bool(self.registry.breakable[current])
+            else:
+                valid = current == AIR
+        if valid:
+            world.set_id(x, y, block_id) # Попадет в рассылку следующего тика
+            client.send(pack(REJECTED, pack_cells([], [], [])))
+        elif world.in_bounds(x, y): # Предсказание игрока не сбылось - присылаем настоящую клетку
+            client.send(pack(REJECTED, pack_cells([x], [y], [world.get_id(x, y)])))
+        else:
+            client.send(pack(REJECTED, pack_cells([], [], [])))
+
+    def handle_region(self, client, payload):
+        """Правка участка (заливка, вставка, отмена) по тем же правилам, что и handle_edit
+
+        Клетку можно менять, только если в ней воздух или ломаемый блок (сломать и поставить новый).
+        Отклоненные клетки остаются как есть, и игрок получает их настоящие значения.
+        """
+        x0, y0, height, width = REGION_HEADER.unpack_from(payload)
+        if height * width > MAX_REGION_CELLS:
+            raise ValueError('слишком большой участок')
+        if height == 0 or width == 0 or y0 + height > self.world.height or (
+                self.world.width is not None and (x0 < 0 or x0 + width > self.world.width)):
+            client.send(pack(REJECTED, pack_cells([], [], [])))
+            return
+        # Размер распакованных данных известен заранее - больше не распаковываем
+        data = zlib.decompressobj().decompress(payload[REGION_HEADER.size:], height * width * 2)
+        cells = np.frombuffer(data, dtype='<u2').reshape(height, width) # Не тот размер - ValueError
+        if (cells >= len(self.registry.names)).any():
+            raise ValueError('неизвестный блок в правке участка')
+        old = np.array(self.world.get_region(x0, y0, x0 + width, y0 + height))
+        new = cells.astype(self.registry.dtype)
+        changed = old != new
+        rejected = changed & (old != AIR) & ~self.registry.breakable[old]
+        new[rejected] = old[rejected]
+        ys, xs = np.nonzero(rejected)
+        client.send(pack(REJECTED, pack_cells(xs + x0, ys + y0, old[rejected])))
+        if (changed & ~rejected).any():
+            self.world.set_region(x0, y0, new)
+
+    async def run_ticks(self):
+        next_tick = time.perf_counter()
+        while True:
+            next_tick += self.tick_time
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+            self.tick(self.tick_time)
+
+    def tick(self, tick_time):
+        """Один тик сервера: падающие блоки и рассылка накопившихся изменений"""
+        self.falling_blocks.update(tick_time)
+        if self.world.width is None: # Бесконечный мир: выгружаем давно не нужные чанки
+            self.world.evict()
+        if self.autosave_interval and time.perf_counter() - self.last_save_time >= self.autosave_interval:
+            self.save()
+        data = self.pack_changes() + self.pack_positions()
+        if data:
+            self.broadcast(data)
+
+    def pack_changes(self):
+        """Все участки, изменившиеся за тик, одним сообщением (с нынешними значениями клеток)"""
+        if not self.changed:
+            return b''
+        regions = []
+        for region in dict.fromkeys(self.changed): # Один и тот же участок мог меняться несколько раз за тик
+            x0, y0, x1, y1 = region
+            cells = self.world.get_region(x0, y0, x1, y1)
+            if cells.size:
+                x_start = max(x0, 0) if self.world.width is not None else x0
+                regions.append((x_start, max(y0, 0), cells))
+        self.changed = []
+        if not regions:
+            return b''
+        return pack(BLOCKS, pack_regions(regions))
+
+    def pack_positions(self):
+        """Позиции игроков, которые сдвинулись с прошлого тика"""
+        entries = []
+        for client in self.clients.values():
+            if client.position is not None and client.position != client.sent_position:
+                client.sent_position = client.position
+                entries.append(PLAYER_ENTRY.pack(client.id, *client.position))
+        return pack(PLAYERS, b''.join(entries)) if entries else b''
+
+    def broadcast(self, data):
+        for client in list(self.clients.values()):
+            client.send(data)
+
+
+class RemotePlayer:
+    """Другой игрок: две последние позиции от сервера - между ними он рисуется плавно"""
+    def __init__(self, x, y):
+        self.previous = self.current = (x, y)
+        self.received = time.perf_counter()
+
+    def move(self, x, y):
+        self.previous = self.current
+        self.current = (x, y)
+        self.received = time.perf_counter()
+
+    def position(self, interval):
+        alpha = min(1.0, (time.perf_counter() - self.received) / interval)
+        (px, py), (cx, cy) = self.previous, self.current
+        return px + (cx - px) * alpha, py + (cy - py) * alpha
+
+
+class NetworkClient:
+    def __init__(self, address, registry, timeout=10):
+        """Подключается к серверу 'хост:порт' и получает снимок мира (ждет его не дольше timeout секунд)"""
+        host, _, port = address.rpartition(':')
+        self.registry = registry
+        self.buffer = bytearray()
+        self.players = {} # Номер игрока -> RemotePlayer
+        self.chunks = {} # Номер чанка -> cells измененных чанков из снимка
+        self.incoming = [] # Участки (x0, y0, cells), которые еще не применены к миру
+        self.pending = [] # Правки без ответа сервера, по порядку отправки: (x0, y0, old, cells) или None, если инвентарь не менялся
+        self.restore = {} # Как вернуть инвентарь за отклоненные правки: {блок: +/-сколько}
+        self.outgoing = bytearray() # Еще не отправленные данные
+        self.sent_position = None
+        self.last_move = 0.0
+        try:
+            self.sock = socket.create_connection((host or '127.0.0.1', int(port)), timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.sendall(pack(HELLO))
+            self.receive_snapshot()
+        except (OSError, ValueError) as e:
+            raise NetworkError(f"Не удалось подключиться к {address}: {e}")
+        self.sock.setblocking(False)
+
+    def receive_snapshot(self):
+        welcome = None
+        while True:
+            for kind, payload in self.read_messages(block=True):
+                if kind == WELCOME:
+                    welcome = json.loads(payload.decode('utf-8'))
+                    if welcome['blocks'] != self.registry.names:
+                        raise NetworkError("на сервере другой набор блоков (mods/my_blocks.py)")
+                    self.id = welcome['id']
+                    self.world = welcome['world'] # Настройки мира сервера (с зерном)
+                    self.chunk_size = self.world['CHUNK_SIZE']
+                    self.tick_time = 1.0 / welcome['tick_rate']
+                elif kind == CHUNK:
+                    (chunk_x,) = CHUNK_HEADER.unpack_from(payload)
+                    cells = np.frombuffer(zlib.decompress(payload[CHUNK_HEADER.size:]), dtype=self.registry.dtype)
+                    self.chunks[chunk_x] = cells.reshape(self.world['WORLD_HEIGHT'], self.chunk_size).copy()
+                elif kind == READY:
+                    if welcome is None:
+                        raise NetworkError("сервер не прислал настройки мира")
+                    return
+                else:
+                    self.handle(kind, payload)
+
+    def read_messages(self, block=False):
+        """Читает из сокета всё, что пришло, и возвращает готовые сообщения [(тип, данные)]"""
+        while True:
+            try:
+                data = self.sock.recv(1 << 16)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                raise NetworkError(f"связь с сервером прервалась: {e}")
+            if not data:
+                raise NetworkError("сервер закрыл соединение")
+            self.buffer += data
+            if block or len(data) < 1 << 16:
+                break
+        messages = []
+        pos = 0
+        while len(self.buffer) - pos >= MESSAGE.size:
+            length, kind = MESSAGE.unpack_from(self.buffer, pos)
+            if len(self.buffer) - pos - MESSAGE.size < length:
+                break
+            start = pos + MESSAGE.size
+            messages.append((kind, bytes(self.buffer[start:start + length])))
+            pos = start + length
+        del self.buffer[:pos]
+        return messages
+
+    def handle(self, kind, payload):
+        if kind == BLOCKS:
+            self.incoming.extend(unpack_regions(payload))
+        elif kind == REJECTED: # Ответ на самую старую правку без ответа
+            xs, ys, ids = unpack_cells(payload)
+            self.incoming.extend(cell_rects(xs, ys, ids))
+            edit = self.pending.pop(0) if self.pending else None
+            if edit is not None and len(xs):
+                self.refund(edit, xs, ys)
+        elif kind == PLAYERS:
+            for player_id, x, y in PLAYER_ENTRY.iter_unpack(payload):
+                if player_id == self.id:
+                    continue
+                x, y = x / POSITION_SCALE, y / POSITION_SCALE
+                player = self.players.get(player_id)
+                if player is None:
+                    self.players[player_id] = RemotePlayer(x, y)
+                else:
+                    player.move(x, y)
+        elif kind == LEAVE:
+            (player_id,) = struct.unpack('<H', payload)
+            self.players.pop(player_id, None)
+
+    def send(self, data):
+        self.outgoing += data
+        self.flush()
+
+    def flush(self):
+        """Отправляет, сколько примет сокет (остальное - в следующем кадре)"""
+        if not self.outgoing:
+            return
+        try:
+            sent = self.sock.send(self.outgoing)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            raise NetworkError(f"связь с сервером прервалась: {e}")
+        del self.outgoing[:sent]
+
+    def poll(self, world):
+        """Вызывается каждый кадр: принимает сообщения сервера и применяет правки мира
+
+        Возвращает, как вернуть инвентарь за правки, которые сервер отклонил: {блок: +/-сколько}.
+        """
+        self.flush()
+        for kind, payload in self.read_messages():
+            self.handle(kind, payload)
+        for x0, y0, cells in self.incoming: # Каждый участок - один set_region и одно оповещение подписчиков
+            cells = cells.astype(self.registry.dtype)
+            current = world.get_region(x0, y0, x0 + cells.shape[1], y0 + cells.shape[0])
+            if current.shape != cells.shape or not np.array_equal(current, cells): # Свою правку мы уже поставили сами
+                world.set_region(x0, y0, cells)
+        self.incoming = []
+        restore, self.restore = self.restore, {}
+        return {name: count for name, count in restore.items() if count}
+
+    def refund(self, edit, xs, ys):
+        """Возвращает инвентарь за отклоненные клетки (xs, ys) правки: сломанные в них блоки забираем, поставленные отдаем"""
+        x0, y0, old, cells = edit
+        height, width = cells.shape
+        xs, ys = xs.astype(np.int64) - x0, ys.astype(np.int64) - y0
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        before, after = old[ys[inside], xs[inside]], cells[ys[inside], xs[inside]]
+        changed = before != after
+        size = len(self.registry.names)
+        delta = (np.bincount(after[changed], minlength=size).astype(np.int64) -
+                 np.bincount(before[changed], minlength=size))
+        for block_id in np.flatnonzero(delta).tolist():
+            if block_id != AIR:
+                name = self.registry.names[block_id]
+                self.restore[name] = self.restore.get(name, 0) + int(delta[block_id])
+
+    def send_edit(self, x, y, block_id, old_id=None):
+        """Отправляет правку клетки (old_id - что в ней стояло, если правка меняла инвентарь: он вернется, если сервер её отклонит)"""
+        self.send(pack(EDIT, EDIT_ENTRY.pack(x, y, block_id)))
+        self.pending.append(None if old_id is None else (x, y, np.array([[old_id]]), np.array([[block_id]])))
+
+    def send_region(self, x0, y0, cells, old=None):
+        """Отправляет правку участка (old - прежние клетки, если правка тратила и пополняла инвентарь)
+
+        Большой участок режется на куски не больше MAX_REGION_CELLS клеток (и не больше 65535 по
+        каждой стороне - столько вмещает REGION_HEADER); сервер отвечает на каждый кусок отдельно.
+        """
+        height, width = cells.shape
+        rows = min(height, 0xFFFF)
+        columns = max(1, min(width, 0xFFFF, MAX_REGION_CELLS // max(rows, 1)))
+        for top in range(0, height, rows):
+            for left in range(0, width, columns):
+                piece = cells[top:top + rows, left:left + columns]
+                data = zlib.compress(np.ascontiguousarray(piece, dtype='<u2').tobytes(), 1)
+                self.send(pack(REGION, REGION_HEADER.pack(x0 + left, y0 + top, *piece.shape) + data))
+                self.pending.append(None if old is None else
+                                    (x0 + left, y0 + top, old[top:top + rows, left:left + columns], piece))
+
+    def send_move(self, x, y):
+        """Отправляет позицию игрока не чаще одного раза за тик сервера и только если она изменилась"""
+        now = time.perf_counter()
+        position = quantize(x, y)
+        if position == self.sent_position or now - self.last_move < self.tick_time:
+            return
+        self.sent_position = position
+        self.last_move = now
+        self.send(pack(MOVE, POSITION.pack(*position)))
+
+    def remote_positions(self):
+        """Позиции других игроков для отрисовки"""
+        return [player.position(self.tick_time) for player in self.players.values()]
+
+    def close(self):
+        self.sock.close()
\ No newline at end of file
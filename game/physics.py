@@ -0,0 +1,126 @@
+import numpy as np
+
+# Столкновения прямоугольников с блоками мира методом "swept AABB":
+# вместо того чтобы двигать объект по 1 пикселю и каждый раз проверять столкновение,
+# за один проход находим первый твердый блок на пути и сразу ставим объект вплотную к нему.
+# Функции не зависят от игрока, поэтому подходят и для мобов, и для падающих блоков
+
+def sweep_x(world, x, y, width, height, dx, block_size):
+    """Двигает прямоугольник по горизонтали на dx
+
+    Возвращает (новый x, было ли столкновение).
+    """
+    if dx == 0:
+        return x, False
+    top = int(y // block_size)
+    bottom = int((y + height - 1) // block_size)
+
+    if dx > 0:
+        first = int((x + width - 1) // block_size) + 1 # Первый столбец правее текущего края
+        last = int((x + width - 1 + dx) // block_size) # Столбец, в который попадет правый край
+        if last < first:
+            return x + dx, False
+        hits = world.solid_region(first, top, last + 1, bottom + 1).any(axis=0)
+        if not hits.any():
+            return x + dx, False
+        column = first + int(np.argmax(hits)) # Ближайший твердый столбец
+        return column * block_size - width, True
+
+    first = int(x // block_size) - 1 # Первый столбец левее текущего края
+    last = int((x + dx) // block_size)
+    if last > first:
+        return x + dx, False
+    hits = world.solid_region(last, top, first + 1, bottom + 1).any(axis=0)
+    if not hits.any():
+        return x + dx, False
+    column = last + len(hits) - 1 - int(np.argmax(hits[::-1])) # Ближайший твердый столбец слева
+    return (column + 1) * block_size, True
+
+def sweep_y(world, x, y, width, height, dy, block_size):
+    """Двигает прямоугольник по вертикали на dy
+
+    Возвращает (новый y, было ли столкновение).
+    """
+    if dy == 0:
+        return y, False
+    left = int(x // block_size)
+    right = int((x + width - 1) // block_size)
+
+    if dy > 0:
+        first = int((y + height - 1) // block_size) + 1 # Первая строка ниже текущего края
+        last = int((y + height - 1 + dy) // block_size)
+        if last < first:
+            return y + dy, False
+        hits = world.solid_region(left, first, right + 1, last + 1).any(axis=1)
+        if not hits.any():
+            return y + dy, False
+        row = first + int(np.argmax(hits))
+        return row * block_size - height, True
+
+    first = int(y // block_size) - 1 # Первая строка выше текущего края
+    last = int((y + dy) // block_size)
+    if last > first:
+        return y + dy, False
+    hits = world.solid_region(left, last, right + 1, first + 1).any(axis=1)
+    if not hits.any():
+        return y + dy, False
+    row = last + len(hits) - 1 - int(np.argmax(hits[::-1]))
+    return (row + 1) * block_size, True
+
+# --- Те же проверки сразу для множества прямоугольников одного размера (мобы) ---
+# Здесь объект за шаг сдвигается меньше чем на блок, поэтому проверяется только одна
+# новая строка или столбец клеток, в которые входит его передний край
+
+def solid_cells(solid, origin_x, columns, rows):
+    """Твердость клеток (columns[i], rows[i]) по сетке solid[y, x] участка мира, начинающегося со столбца origin_x
+
+    Столбцы за пределами участка и строки ниже мира считаются твердыми (стена и дно), выше мира - пусто.
+    """
+    height, width = solid.shape
+    local = columns - origin_x
+    inside = (local >= 0) & (local < width) & (rows >= 0) & (rows < height)
+    result = (local < 0) | (local >= width) | (rows >= height)
+    result[inside] = solid[rows[inside], local[inside]]
+    return result
+
+def sweep_boxes_x(solid, origin_x, xs, ys, width, height, dxs, block_size):
+    """Двигает прямоугольники width x height по горизонтали на dxs (|dx| < block_size)
+
+    Возвращает (новые x, массив столкновений).
+    """
+    new_xs = xs + dxs
+    right = dxs > 0
+    edge = np.where(right, new_xs + width - 1, new_xs) // block_size # Столбец переднего края после шага
+    old_edge = np.where(right, xs + width - 1, xs) // block_size
+    columns = edge.astype(np.int64)
+    top = (ys // block_size).astype(np.int64)
+    bottom = ((ys + height - 1) // block_size).astype(np.int64)
+    hits = np.zeros(len(xs), dtype=bool)
+    for row in range(int(height - 1) // block_size + 2): # Сколько строк может задевать прямоугольник
+        rows = top + row
+        hits |= (rows <= bottom) & solid_cells(solid, origin_x, columns, rows)
+    hits &= edge != old_edge # Край не перешел в новый столбец - столкновения быть не может
+    new_xs = np.where(hits & right, columns * block_size - width, new_xs)
+    new_xs = np.where(hits & ~right, (columns + 1) * block_size, new_xs)
+    return new_xs, hits
+
+def sweep_boxes_y(solid, origin_x, xs, ys, width, height, dys, block_size):
+    """Двигает прямоугольники width x height по вертикали на dys (|dy| < block_size)
+
+    Возвращает (новые y, массив столкновений).
+    """
+    new_ys = ys + dys
+    down = dys > 0
+    edge = np.where(down, new_ys + height - 1, new_ys) // block_size
+    old_edge = np.where(down, ys + height - 1, ys) // block_size
+    rows = edge.astype(np.int64)
+    left = (xs // block_size).astype(np.int64)
+    right = ((xs + width - 1) // block_size).astype(np.int64)
+    hits = np.zeros(len(xs), dtype=bool)
+    for column in range(int(width - 1) // block_size + 2):
+        columns = left + column
+        hits |= (columns <= right) & solid_cells(solid, origin_x, columns, rows)
+    hits &= edge != old_edge
+    new_ys = np.where(hits & down, rows * block_size - height, new_ys)
+    new_ys = np.where(hits & ~down, (rows + 1) * block_size, new_ys)
+    return new_ys, hits
\ No newline at end of file
@@ -0,0 +1,176 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Профилировщик кадра: замеряет, сколько времени занимает каждый этап игрового цикла
+# Моды могут замерять и свои участки кода:
+#     with engine.profiler.section('мой_мод'):
+#         ...
+# Пока профилировщик выключен, section() почти ничего не стоит
+
+def percentile(values, fraction):
+    """Возвращает перцентиль (fraction от 0 до 1) отсортированного списка"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+def summarize(samples):
+    """Считает среднее, медиану, 99-й перцентиль и максимум (в миллисекундах)"""
+    ordered = sorted(samples)
+    return {
+        'mean_ms': sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+class _NullSection:
+    """Пустой замер - используется, когда профилировщик выключен"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = _NullSection()
+
+class _Section:
+    """Замер одного участка кода"""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class FrameProfiler:
+    def __init__(self, history=300, enabled=False):
+        """Инициализация (history - сколько последних кадров хранить)"""
+        self.history = history
+        self.enabled = enabled
+        self.sections = {} # Название участка -> Section (переиспользуются между кадрами)
+        self.samples = {} # Название участка -> последние замеры (в секундах) по кадрам
+        self.current = {} # Замеры текущего кадра
+        self.frame_start = None
+
+    def section(self, name):
+        """Возвращает замер участка кода для использования в with"""
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+        return section
+
+    def register_section(self, name):
+        """Заранее добавляет участок, чтобы он появился в отчете даже без замеров"""
+        self.samples.setdefault(name, deque(maxlen=self.history))
+
+    def add(self, name, seconds):
+        """Добавляет время к участку в текущем кадре"""
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        """Начало кадра"""
+        if self.enabled:
+            self.current.clear()
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Конец кадра: сохраняет замеры кадра в историю"""
+        if not self.enabled or self.frame_start is None:
+            return
+        self.current['frame'] = time.perf_counter() - self.frame_start
+        for name in self.current:
+            self.register_section(name)
+        for name, samples in self.samples.items():
+            samples.append(self.current.get(name, 0.0))
+        self.frame_start = None
+
+    def toggle(self):
+        """Включает или выключает профилировщик"""
+        self.enabled = not self.enabled
+        self.frame_start = None
+
+    def reset(self):
+        """Забывает все собранные замеры"""
+        for samples in self.samples.values():
+            samples.clear()
+        self.current.clear()
+
+    def stats(self):
+        """Статистика по каждому участку"""
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+    def export_json(self, path):
+        """Сохраняет статистику и историю замеров в JSON"""
+        data = {
+            'frames': len(self.samples.get('frame', ())),
+            'stats': self.stats(),
+            'samples_ms': {name: [value * 1000 for value in samples]
+                           for name, samples in self.samples.items()},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def export_csv(self, path):
+        """Сохраняет историю замеров в CSV: одна строка - один кадр, столбцы - участки (мс)"""
+        names = list(self.samples.keys())
+        rows = max((len(samples) for samples in self.samples.values()), default=0)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            for i in range(rows):
+                row = []
+                for name in names:
+                    samples = self.samples[name]
+                    index = i - (rows - len(samples)) # Участки, добавленные позже, короче - выравниваем по концу
+                    row.append(f"{samples[index] * 1000:.4f}" if index >= 0 else '')
+                writer.writerow(row)
+
+class StartupProfiler:
+    """Замеры запуска игры: сколько времени заняли импорт, инициализация, текстуры, мир и т.д."""
+    def __init__(self):
+        self.phases = [] # (название этапа, время начала, длительность в секундах)
+
+    @contextmanager
+    def phase(self, name):
+        """Замеряет этап запуска (используется в with)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter() - start)
+
+    def add(self, name, start, seconds):
+        """Добавляет уже замеренный этап"""
+        self.phases.append((name, start, seconds))
+
+    def report(self):
+        """Этапы запуска по порядку: название -> миллисекунды"""
+        return {name: seconds * 1000 for name, start, seconds in sorted(self.phases, key=lambda phase: phase[1])}
+
+    def total(self):
+        """Время от начала первого этапа до конца последнего (в секундах)"""
+        if not self.phases:
+            return 0.0
+        return (max(start + seconds for _, start, seconds in self.phases) -
+                min(start for _, start, _ in self.phases))
+
+    def summary(self):
+        """Строка с этапами запуска для вывода в консоль"""
+        parts = ', '.join(f"{name} {ms:.0f}" for name, ms in self.report().items())
+        return f"Запуск (мс): {parts}; всего {self.total() * 1000:.0f}"
\ No newline at end of file
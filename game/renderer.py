@@ -1,5 +1,12 @@
+import math
+import numpy as np
 import pygame
-from game.utils import draw_text, load_image
+from game.chunk_cache import ChunkCache
+from game.lighting import MAX_LIGHT, Lighting
+from game.minimap import Minimap
+from game.mipmap import TILE, WorldMipmaps
+from game.textures import TextureLoader
+from game.utils import draw_text, render_text
 
 class Renderer:
     def __init__(self, config):
@@ -11,31 +18,157 @@ class Renderer:
         pygame.display.set_caption(config['GAME_TITLE'])
         
         self.block_textures = {}
+        self.missing_textures = set() # Блоки, текстуру которых загрузить не удалось (рисуются заглушкой)
+        self.texture_loader = TextureLoader(config['BLOCK_SIZE'], config.get('TEXTURE_CACHE_DIR'),
+                                            config.get('TEXTURE_WORKERS'))
         
-    def load_block_texture(self, block_type, texture_path):
-        try:
-            texture = load_image(texture_path, (self.config['BLOCK_SIZE'], self.config['BLOCK_SIZE']))
-            self.block_textures[block_type] = texture
-        except Exception as e:
-            print(f"Не удалось загрузить текстуру для {block_type}: {e}. Подгружаем RGB-текстуру!")
-            texture = pygame.Surface((self.config['BLOCK_SIZE'], self.config['BLOCK_SIZE']), pygame.SRCALPHA)
-            texture.fill((100, 100, 100))
-            pygame.draw.rect(texture, (50, 50, 50), texture.get_rect(), 2)
-            self.block_textures[block_type] = texture
-    
-    def draw_block(self, x, y, block_type):
-        """Отрисовка блока"""
-        x_int = int(x)
-        y_int = int(y)
+        # Атлас: картинки всех блоков (текстуры и цветные заглушки) на одной поверхности.
+        # tiles[ID блока] - кусок атласа для этого блока, tile_by_name - то же по названию
+        self.atlas = None
+        self.tiles = []
+        self.tile_by_name = {}
+        self.tile_dests = {} # (высота, ширина) участка -> координаты клеток на картинке чанка
+        self.hud_tiles = {} # Картинки блоков для панели UI (всегда размером BLOCK_SIZE)
+        
+        # Масштаб: атлас и чанки рисуются с блоком в block_pixels пикселей. Если блок на экране
+        # меньше LOD_BLOCK_PIXELS пикселей, мир рисуется уменьшенными картинками (mipmaps)
+        self.block_pixels = config['BLOCK_SIZE']
+        self.lod_block_pixels = config.get('LOD_BLOCK_PIXELS', 6)
+        self.mipmaps = None # Уменьшенные картинки мира (создаются вместе с подпиской на мир)
+        self.lod_view = None # Поверхность, на которую собираются куски уменьшенных картинок
+        self.minimap = None # Миникарта (создается вместе с подпиской на мир)
+        
+        # Кэш готовых картинок чанков мира
+        self.chunk_size = config.get('CHUNK_SIZE', 16)
+        self.chunk_cache = ChunkCache(config.get('CHUNK_CACHE_MB', 64) * 1024 * 1024)
+        self.world = None # Мир, изменения которого отслеживает кэш чанков
+        self.lighting = None # Освещение мира (создается вместе с подпиской на мир)
+        # Яркость картинки блока для каждого уровня света (255 - без затемнения)
+        max_darkness = config.get('MAX_DARKNESS', 210)
+        self.light_levels = [255 - max_darkness * (MAX_LIGHT - level) // MAX_LIGHT for level in range(MAX_LIGHT + 1)]
+        self.lit_tiles = [] # lit_tiles[уровень света * число блоков + ID] - затемненные картинки блоков
+        self.mob_surface = None # Картинка моба
         
+        # Панель UI рисуется на отдельную поверхность и перерисовывается только при изменениях
+        self.hud_surface = None
+        self.hud_dirty = True
+        # Координаты и FPS обновляются не чаще, чем раз в HUD_STATS_INTERVAL миллисекунд
+        self.stats_interval = config.get('HUD_STATS_INTERVAL', 250)
+        self.stats_updated_at = None
+        self.stats_surfaces = []
+        self.profiler_surface = None
+        self.profiler_updated_at = None
+        
+    def load_block_textures(self, textures):
+        """Загружает текстуры {блок: путь к файлу} сразу пачкой (в несколько потоков)"""
+        loaded, errors = self.texture_loader.load_all(textures)
+        for block_type, error in errors.items():
+            print(f"Не удалось загрузить текстуру для {block_type}: {error}. Подгружаем RGB-текстуру!")
+        self.block_textures.update(loaded)
+        self.missing_textures.difference_update(loaded)
+        self.missing_textures.update(errors)
+        self.invalidate_atlas()
+    
+    def load_block_texture(self, block_type, texture_path):
+        self.load_block_textures({block_type: texture_path})
+    
+    def make_missing_texture(self):
+        """Заглушка для текстуры, которую не удалось загрузить"""
+        texture = pygame.Surface((self.config['BLOCK_SIZE'], self.config['BLOCK_SIZE']), pygame.SRCALPHA)
+        texture.fill((100, 100, 100))
+        pygame.draw.rect(texture, (50, 50, 50), texture.get_rect(), 2)
+        return texture
+    
+    def invalidate_atlas(self):
+        """Сбрасывает атлас и готовые чанки (например, после загрузки новой текстуры)"""
+        self.atlas = None
+        self.tiles = []
+        self.tile_by_name = {}
+        self.lit_tiles = []
+        self.hud_tiles = {}
+        self.chunk_cache.clear() # Уже нарисованные чанки используют старую текстуру
+        if self.mipmaps is not None: # Цвета блоков на уменьшенных картинках и миникарте тоже берутся из текстур
+            self.mipmaps.clear()
+            self.minimap.clear()
+    
+    def set_block_pixels(self, block_pixels):
+        """Меняет размер блока на экране: атлас и чанки перерисовываются под новый масштаб"""
+        if block_pixels == self.block_pixels:
+            return
+        self.block_pixels = block_pixels
+        self.atlas = None
+        self.tiles = []
+        self.tile_by_name = {}
+        self.lit_tiles = []
+        self.tile_dests = {}
+        self.chunk_cache.clear()
+    
+    def make_block_tile(self, block_type, block_size=None):
+        """Рисует картинку блока размером в клетку: текстуру или цветной квадрат с рамкой"""
+        if block_size is None:
+            block_size = self.config['BLOCK_SIZE']
+        tile = pygame.Surface((block_size, block_size), pygame.SRCALPHA)
         if block_type in self.block_textures:
-            self.screen.blit(self.block_textures[block_type], (x_int, y_int))
+            texture = self.block_textures[block_type]
+        elif block_type in self.missing_textures: # Заглушка создается только когда блок впервые рисуется
+            texture = self.make_missing_texture()
         else:
             color = self.get_block_color(block_type)
-            pygame.draw.rect(self.screen, color, 
-                           (x_int, y_int, self.config['BLOCK_SIZE'], self.config['BLOCK_SIZE']))
-            pygame.draw.rect(self.screen, (color[0]//2, color[1]//2, color[2]//2), 
-                           (x_int, y_int, self.config['BLOCK_SIZE'], self.config['BLOCK_SIZE']), 2)
+            tile.fill(color)
+            border = max(1, round(2 * block_size / self.config['BLOCK_SIZE'])) # Рамка уменьшается вместе с блоком
+            pygame.draw.rect(tile, (color[0]//2, color[1]//2, color[2]//2), tile.get_rect(), border)
+            return tile
+        if texture.get_size() != (block_size, block_size): # Другой масштаб - текстура уменьшается под него
+            texture = pygame.transform.smoothscale(texture, (block_size, block_size))
+        tile.blit(texture, (0, 0))
+        return tile
+    
+    def build_atlas(self, names):
+        """Собирает атлас из картинок блоков в порядке их ID"""
+        block_size = self.block_pixels
+        self.atlas = pygame.Surface((block_size * len(names), block_size), pygame.SRCALPHA).convert_alpha()
+        self.tiles = []
+        for block_id, name in enumerate(names):
+            self.atlas.blit(self.make_block_tile(name, block_size), (block_id * block_size, 0))
+            self.tiles.append(self.atlas.subsurface((block_id * block_size, 0, block_size, block_size)))
+        self.tile_by_name = dict(zip(names, self.tiles))
+    
+    def get_tiles(self, registry):
+        """Возвращает картинки блоков по ID (пересобирает атлас, если в реестре появились новые блоки)"""
+        if len(self.tiles) != len(registry.names):
+            self.build_atlas(registry.names)
+        return self.tiles
+    
+    def get_lit_tiles(self, registry):
+        """Картинки блоков для всех уровней света: атлас, у которого строка - уровень света"""
+        tiles = self.get_tiles(registry)
+        if len(self.lit_tiles) != len(tiles) * (MAX_LIGHT + 1):
+            block_size = self.block_pixels
+            atlas = pygame.Surface((block_size * len(tiles), block_size * (MAX_LIGHT + 1)), pygame.SRCALPHA).convert_alpha()
+            for level, brightness in enumerate(self.light_levels):
+                atlas.blit(self.atlas, (0, level * block_size))
+                row = (0, level * block_size, atlas.get_width(), block_size)
+                atlas.fill((brightness, brightness, brightness), row, special_flags=pygame.BLEND_RGB_MULT)
+            self.lit_tiles = [atlas.subsurface((block_id * block_size, level * block_size, block_size, block_size))
+                              for level in range(MAX_LIGHT + 1) for block_id in range(len(tiles))]
+        return self.lit_tiles
+    
+    def get_tile_dests(self, height, width):
+        """Координаты клеток участка height x width на картинке чанка (построчно)"""
+        dests = self.tile_dests.get((height, width))
+        if dests is None:
+            block_size = self.block_pixels
+            dests = [(x * block_size, y * block_size) for y in range(height) for x in range(width)]
+            self.tile_dests[(height, width)] = dests
+        return dests
+    
+    def draw_block(self, x, y, block_type, surface=None):
+        """Отрисовка блока"""
+        surface = surface or self.screen
+        tile = self.hud_tiles.get(block_type)
+        if tile is None: # Панель UI не масштабируется - её картинки блоков не берутся из атласа
+            tile = self.hud_tiles[block_type] = self.make_block_tile(block_type)
+        surface.blit(tile, (int(x), int(y)))
     
     def get_block_color(self, block_type):
         """Отрисовка текстуры блока"""
@@ -48,95 +181,321 @@ class Renderer:
             'leaf': (50, 150, 50),
             'glass': (150, 200, 255),
             'brick': (200, 100, 100),
+            'sand': (220, 200, 120),
+            'gravel': (130, 120, 115),
+            'torch': (255, 200, 80),
         }
         return colors.get(block_type, (255, 0, 255))  # Для неизвестных блоков
     
-    def draw_world(self, world, camera_x, camera_y):
-        """Отрисовка мира"""
+    def attach_world(self, world):
+        """Подписывается на изменения мира, чтобы вовремя перерисовывать чанки"""
+        if self.world is world:
+            return
+        self.world = world
+        self.chunk_cache.clear()
+        world.add_listener(self.on_world_changed)
+        if self.config.get('LIGHTING', True):
+            self.lighting = Lighting(world, self.chunk_size, self.config.get('LIGHT_CACHE_MB', 16) * 1024 * 1024)
+            self.lighting.add_listener(self.on_light_changed)
+        self.mipmaps = WorldMipmaps(world, self.get_average_color, self.config['SKY_COLOR'],
+                                    self.config.get('LOD_CACHE_MB', 16) * 1024 * 1024)
+        self.minimap = Minimap(world, self.mipmaps.get_colors, self.config.get('MINIMAP_BLOCKS', 128),
+                               self.config.get('MINIMAP_ROWS', 64), self.config.get('MINIMAP_SCALE', 2))
+    
+    def get_average_color(self, block_type):
+        """Средний цвет картинки блока (им блок рисуется на уменьшенных картинках мира)"""
+        return tuple(pygame.transform.average_color(self.make_block_tile(block_type)))[:3]
+    
+    def on_world_changed(self, x0, y0, x1, y1):
+        """Отмечает устаревшими все чанки, задетые изменением участка мира"""
+        if self.world is None:
+            return
+        size = self.chunk_size
+        for chunk_y in range(y0 // size, (y1 - 1) // size + 1):
+            for chunk_x in range(x0 // size, (x1 - 1) // size + 1):
+                self.chunk_cache.mark_dirty((chunk_x, chunk_y))
+    
+    def on_light_changed(self, chunk_x, chunk_y):
+        """Отмечает устаревшим чанк, у которого изменилось освещение"""
+        self.chunk_cache.mark_dirty((chunk_x, chunk_y))
+    
+    def render_chunk(self, world, chunk_x, chunk_y, surface=None):
+        """Рисует один чанк мира на отдельную поверхность"""
+        block_size = self.block_pixels
+        size = self.chunk_size
+        if surface is None:
+            surface = pygame.Surface((size * block_size, size * block_size)).convert()
+        surface.fill(self.config['SKY_COLOR']) # За границами мира видно небо
+        
+        start_x = chunk_x * size
+        start_y = chunk_y * size
+        region = world.get_region(start_x, start_y, start_x + size, start_y + size)
+        if region.size:
+            # Все клетки чанка рисуются одним вызовом blits кусками атласа
+            height, width = region.shape
+            if self.lighting is None:
+                tiles = self.get_tiles(world.registry)
+                indices = region.ravel()
+            else: # Картинка блока сразу берется затемненной по свету клетки
+                tiles = self.get_lit_tiles(world.registry)
+                light = self.lighting.get_chunk_light(chunk_x, chunk_y)[:height, :width]
+                indices = (light.astype(np.intp) * len(world.registry.names) + region).ravel()
+            dests = self.get_tile_dests(height, width)
+            surface.blits(zip(map(tiles.__getitem__, indices.tolist()), dests), doreturn=False)
+        return surface
+    
+    def get_chunk_surface(self, world, chunk_x, chunk_y):
+        """Возвращает готовую картинку чанка (рисует её, если её нет или она устарела)"""
+        key = (chunk_x, chunk_y)
+        surface = self.chunk_cache.get(key)
+        if surface is None:
+            surface = self.render_chunk(world, chunk_x, chunk_y)
+            self.chunk_cache.put(key, surface)
+        elif self.chunk_cache.is_dirty(key):
+            self.render_chunk(world, chunk_x, chunk_y, surface)
+            self.chunk_cache.put(key, surface)
+        return surface
+    
+    def draw_world(self, world, camera_x, camera_y, zoom=1.0):
+        """Отрисовка мира (zoom - масштаб камеры, 1 - блок размером BLOCK_SIZE пикселей)"""
+        self.attach_world(world)
+        if self.lighting is not None:
+            self.lighting.update() # Пересчет света после изменений мира (помечает чанки для перерисовки)
         self.screen.fill(self.config['SKY_COLOR'])
         
-        # Отрисовка блоков
-        block_size = self.config['BLOCK_SIZE']
+        if self.config['BLOCK_SIZE'] * zoom < self.lod_block_pixels: # Блоки слишком мелкие - уменьшенные картинки
+            self.draw_world_lod(world, camera_x, camera_y, zoom)
+            return
+        self.set_block_pixels(max(1, round(self.config['BLOCK_SIZE'] * zoom)))
+        camera_x = camera_x * self.block_pixels / self.config['BLOCK_SIZE'] # Камера в пикселях экрана
+        camera_y = camera_y * self.block_pixels / self.config['BLOCK_SIZE']
+        
+        # Отрисовка видимых чанков
+        block_size = self.block_pixels
         screen_width = self.config['SCREEN_WIDTH']
         screen_height = self.config['SCREEN_HEIGHT']
+        chunk_pixels = self.chunk_size * block_size
+        
+        first_column, last_column = world.clip_columns(int(camera_x // block_size),
+                                                       int((camera_x + screen_width) // block_size) + 1)
+        start_x = first_column // self.chunk_size
+        end_x = (last_column - 1) // self.chunk_size
+        start_y = max(0, int(camera_y // chunk_pixels))
+        end_y = min((world.height - 1) // self.chunk_size, int((camera_y + screen_height) // chunk_pixels))
+        
+        visible = set()
+        blits = []
+        for chunk_y in range(start_y, end_y + 1):
+            for chunk_x in range(start_x, end_x + 1):
+                surface = self.get_chunk_surface(world, chunk_x, chunk_y)
+                blits.append((surface, (int(chunk_x * chunk_pixels - camera_x),
+                                        int(chunk_y * chunk_pixels - camera_y))))
+                visible.add((chunk_x, chunk_y))
+        self.screen.blits(blits, doreturn=False)
         
-        start_x = max(0, int(camera_x // block_size) - 1)
-        end_x = min(len(world[0]), int((camera_x + screen_width) // block_size) + 2)
-        start_y = max(0, int(camera_y // block_size) - 1)
-        end_y = min(len(world), int((camera_y + screen_height) // block_size) + 2)
-        
-        for y in range(start_y, end_y):
-            for x in range(start_x, end_x):
-                block = world[y][x]
-                screen_x = x * block_size - camera_x
-                screen_y = y * block_size - camera_y
-                
-                screen_x_int = int(screen_x)
-                screen_y_int = int(screen_y)
-                
-                if (-block_size <= screen_x_int <= screen_width and
-                    -block_size <= screen_y_int <= screen_height):
-                    self.draw_block(screen_x_int, screen_y_int, block)
-    
-    def draw_player(self, player, camera_x, camera_y):
+        self.chunk_cache.evict(keep=visible)
+    
+    def draw_world_lod(self, world, camera_x, camera_y, zoom):
+        """Отрисовка мира уменьшенными картинками: один их пиксель занимает на экране от 1 до 2 пикселей"""
+        block_pixels = self.config['BLOCK_SIZE'] * zoom # Пикселей экрана на блок (меньше LOD_BLOCK_PIXELS)
+        level = max(0, math.ceil(-math.log2(block_pixels)))
+        scale = (1 << level) * block_pixels # Пикселей экрана на пиксель уровня
+        blocks = TILE << level # Сколько блоков покрывает кусок картинки
+        
+        # Куски собираются без масштабирования на поверхность view, и она один раз растягивается на экран
+        left = camera_x / self.config['BLOCK_SIZE'] / (1 << level) # Камера в пикселях уровня
+        top = camera_y / self.config['BLOCK_SIZE'] / (1 << level)
+        origin_x, origin_y = math.floor(left), math.floor(top)
+        view_width = int(self.config['SCREEN_WIDTH'] / scale) + 2
+        view_height = int(self.config['SCREEN_HEIGHT'] / scale) + 2
+        if self.lod_view is None or self.lod_view.get_size() != (view_width, view_height):
+            self.lod_view = pygame.Surface((view_width, view_height)).convert()
+        view = self.lod_view
+        view.fill(self.config['SKY_COLOR'])
+        
+        first_x, last_x = origin_x // TILE, (origin_x + view_width - 1) // TILE
+        if world.width is not None:
+            first_x, last_x = max(first_x, 0), min(last_x, (world.width - 1) // blocks)
+        first_y = max(origin_y // TILE, 0)
+        last_y = min((origin_y + view_height - 1) // TILE, (world.height - 1) // blocks)
+        visible = set()
+        blits = []
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                blits.append((self.mipmaps.get_tile(level, tile_x, tile_y),
+                              (tile_x * TILE - origin_x, tile_y * TILE - origin_y)))
+                visible.add((level, tile_x, tile_y))
+        view.blits(blits, doreturn=False)
+        self.mipmaps.cache.evict(keep=visible)
+        
+        scaled = pygame.transform.scale(view, (round(view_width * scale), round(view_height * scale)))
+        self.screen.blit(scaled, (round((origin_x - left) * scale), round((origin_y - top) * scale)))
+    
+    def draw_player(self, player, camera_x, camera_y, zoom=1.0):
         """Отрисовка игрока"""
-        screen_x = int(player['x'] - camera_x)
-        screen_y = int(player['y'] - camera_y)
+        screen_x = int((player['x'] - camera_x) * zoom)
+        screen_y = int((player['y'] - camera_y) * zoom)
+        block_size = max(1, round(self.config['BLOCK_SIZE'] * zoom))
 
         pygame.draw.rect(self.screen, player['color'], # Тело игрока
                         (screen_x, screen_y, 
-                         self.config['BLOCK_SIZE'], 
-                         self.config['BLOCK_SIZE'] * 2))
+                         block_size, 
+                         block_size * 2))
         
         # Глаза (Белым блоком)
-        eye_size = self.config['BLOCK_SIZE'] // 4
+        eye_size = block_size // 4
         pygame.draw.rect(self.screen, (255, 255, 255), 
                         (screen_x + eye_size, screen_y + eye_size, 
                          eye_size, eye_size))
         pygame.draw.rect(self.screen, (255, 255, 255),
-                        (screen_x + self.config['BLOCK_SIZE'] - eye_size*2, 
+                        (screen_x + block_size - eye_size*2, 
                          screen_y + eye_size, eye_size, eye_size))
+
+    def get_mob_surface(self, width, height):
+        """Картинка моба (рисуется один раз и потом только копируется)"""
+        if self.mob_surface is None or self.mob_surface.get_size() != (width, height):
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(self.config.get('MOB_COLOR', (90, 160, 70)))
+            eye_size = max(1, width // 5)
+            surface.fill((0, 0, 0), (eye_size, eye_size, eye_size, eye_size))
+            surface.fill((0, 0, 0), (width - eye_size * 2, eye_size, eye_size, eye_size))
+            self.mob_surface = surface
+        return self.mob_surface
+
+    def draw_entities(self, xs, ys, width, height, camera_x, camera_y, zoom=1.0):
+        """Отрисовка мобов с позициями (xs, ys): только видимые, одним вызовом blits"""
+        screen_x = ((xs - camera_x) * zoom).astype(np.int64)
+        screen_y = ((ys - camera_y) * zoom).astype(np.int64)
+        width, height = max(1, round(width * zoom)), max(1, round(height * zoom))
+        visible = ((screen_x > -width) & (screen_x < self.config['SCREEN_WIDTH']) &
+                   (screen_y > -height) & (screen_y < self.config['SCREEN_HEIGHT']))
+        if not visible.any():
+            return
+        surface = self.get_mob_surface(width, height)
+        dests = zip(screen_x[visible].tolist(), screen_y[visible].tolist())
+        self.screen.blits([(surface, dest) for dest in dests], doreturn=False)
+
+    def invalidate_hud(self):
+        """Отмечает панель UI как устаревшую (изменился инвентарь или выбранный блок)"""
+        self.hud_dirty = True
     
-    def draw_hud(self, player, selected_block, inventory, fps, blocks):
-        """Отрисовка UI"""
-        # Панель выбора блока
+    def render_hud_panel(self, selected_block, inventory, blocks):
+        """Рисует нижнюю панель UI на отдельную поверхность"""
         panel_height = 60
-        pygame.draw.rect(self.screen, (50, 50, 50, 200), 
-                        (0, self.config['SCREEN_HEIGHT'] - panel_height, 
-                         self.config['SCREEN_WIDTH'], panel_height))
+        if self.hud_surface is None:
+            self.hud_surface = pygame.Surface((self.config['SCREEN_WIDTH'], panel_height)).convert()
+        surface = self.hud_surface
+        
+        # Панель выбора блока
+        surface.fill((50, 50, 50))
         
         # Отображение выбранного блока
         selected_x = 20
-        selected_y = self.config['SCREEN_HEIGHT'] - panel_height + 10
+        selected_y = 10
         color = (255, 255, 255) if inventory.get(selected_block, 0) > 0 else (255, 0, 0) # В зависимости от количества выбранного блока
-        pygame.draw.rect(self.screen, color, 
+        pygame.draw.rect(surface, color, 
                         (selected_x - 2, selected_y - 2, 
                          44, 44), 2)
-        self.draw_block(selected_x, selected_y, selected_block)
+        self.draw_block(selected_x, selected_y, selected_block, surface)
         
         # Название выбранного блока
         block_info = blocks.get(selected_block, {})
         block_name = block_info.get('name', selected_block)
-        draw_text(self.screen, f"Выбран: {block_name}", 
+        draw_text(surface, f"Выбран: {block_name}", 
                  (selected_x + 50, selected_y + 10), 24, (255, 255, 255))
         
-        # Координаты игрока
-        draw_text(self.screen, f"X: {int(player['x'])} Y: {int(player['y'])}", 
-                 (10, 10), 20, (255, 255, 255))
-        
-        # FPS
-        draw_text(self.screen, f"FPS: {fps}", 
-                 (self.config['SCREEN_WIDTH'] - 100, 10), 20, (255, 255, 255))
-        
         # Инвентарь
         inv_x = 210
         for i, (block_type, count) in enumerate(inventory.items()):
             block_color = (255, 255, 255) if count > 0 else (255, 0, 0)
             text_color = (255, 255, 0) if count > 0 else (255, 0, 0)
             if selected_block == block_type:
-                    pygame.draw.rect(self.screen, block_color, 
+                    pygame.draw.rect(surface, block_color, 
                         (inv_x + i * 60 - 2, selected_y - 2, 
                          44, 44), 2)
-            self.draw_block(inv_x + i * 60, selected_y, block_type)
-            draw_text(self.screen, str(count),
-                        (inv_x + i * 60 + 30, selected_y + 30), 16, text_color)
\ No newline at end of file
+            self.draw_block(inv_x + i * 60, selected_y, block_type, surface)
+            draw_text(surface, str(count),
+                        (inv_x + i * 60 + 30, selected_y + 30), 16, text_color)
+        
+        self.hud_dirty = False
+    
+    def update_stats(self, player, fps):
+        """Обновляет надписи с координатами игрока и FPS (не чаще заданного интервала)"""
+        now = pygame.time.get_ticks()
+        if self.stats_updated_at is not None and now - self.stats_updated_at < self.stats_interval:
+            return
+        self.stats_updated_at = now
+        self.stats_surfaces = [
+            # Координаты игрока
+            (render_text(f"X: {int(player['x'])} Y: {int(player['y'])}", 20, (255, 255, 255)), (10, 10)),
+            # FPS
+            (render_text(f"FPS: {fps}", 20, (255, 255, 255)), (self.config['SCREEN_WIDTH'] - 100, 10)),
+        ]
+    
+    def draw_hud(self, player, selected_block, inventory, fps, blocks):
+        """Отрисовка UI"""
+        if self.hud_dirty or self.hud_surface is None:
+            self.render_hud_panel(selected_block, inventory, blocks)
+        self.screen.blit(self.hud_surface, (0, self.config['SCREEN_HEIGHT'] - self.hud_surface.get_height()))
+        
+        self.update_stats(player, fps)
+        self.screen.blits(self.stats_surfaces, doreturn=False)
+    
+    def draw_minimap(self, player):
+        """Отрисовка миникарты в правом верхнем углу (под FPS) с точкой игрока"""
+        block_size = self.config['BLOCK_SIZE']
+        block_x, block_y = int(player['x'] // block_size), int(player['y'] // block_size)
+        self.minimap.update(block_x, block_y)
+        view = self.minimap.get_view()
+        x = self.config['SCREEN_WIDTH'] - view.get_width() - 10
+        y = 35
+        self.screen.blit(view, (x, y))
+        pygame.draw.rect(self.screen, (255, 255, 255), (x - 1, y - 1, view.get_width() + 2, view.get_height() + 2), 1)
+        scale = self.minimap.scale
+        dot = max(2, scale)
+        pygame.draw.rect(self.screen, player['color'],
+                         (x + (block_x - self.minimap.x0) * scale, y + (block_y - self.minimap.y0) * scale, dot, dot * 2))
+    
+    def draw_error(self, message):
+        """Отрисовка сообщения об ошибке над панелью UI"""
+        text = render_text(message, 20, (255, 255, 255))
+        y = self.config['SCREEN_HEIGHT'] - 60 - text.get_height() - 16
+        pygame.draw.rect(self.screen, (150, 30, 30), (0, y, self.config['SCREEN_WIDTH'], text.get_height() + 12))
+        self.screen.blit(text, (10, y + 6))
+
+    def draw_profiler(self, profiler):
+        """Отрисовка окна профилировщика: время каждого этапа кадра и гистограмма последних кадров"""
+        now = pygame.time.get_ticks()
+        if self.profiler_surface is None or now - self.profiler_updated_at >= self.stats_interval:
+            self.profiler_updated_at = now
+            self.profiler_surface = self.render_profiler(profiler)
+        self.screen.blit(self.profiler_surface, (10, 40))
+    
+    def render_profiler(self, profiler):
+        """Рисует окно профилировщика на отдельную поверхность"""
+        row_height = 18
+        graph_width = 120
+        stats = profiler.stats()
+        surface = pygame.Surface((400, 30 + row_height * len(stats)), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for text, x in (("Этап", 8), ("сред.", 110), ("p99 мс", 170)):
+            draw_text(surface, text, (x, 8), 20, (255, 255, 255))
+        
+        budget = 1.0 / self.config['FPS'] # Время одного кадра при заданном FPS - высота гистограммы
+        for i, (name, stat) in enumerate(stats.items()):
+            y = 28 + i * row_height
+            color = (255, 255, 0) if name == 'frame' else (255, 255, 255)
+            draw_text(surface, name[:14], (8, y), 18, color)
+            draw_text(surface, f"{stat['mean_ms']:.2f}", (110, y), 18, color)
+            draw_text(surface, f"{stat['p99_ms']:.2f}", (170, y), 18, color)
+            
+            # Гистограмма последних кадров: один столбик - один кадр
+            samples = list(profiler.samples[name])[-graph_width:]
+            graph_x = 400 - graph_width - 8
+            for j, value in enumerate(samples):
+                height = min(row_height - 4, int(value / budget * (row_height - 4)))
+                if height > 0:
+                    color = (100, 220, 100) if value < budget else (230, 80, 80)
+                    pygame.draw.line(surface, color, (graph_x + j, y + row_height - 4),
+                                     (graph_x + j, y + row_height - 4 - height))
+        return surface
\ No newline at end of file
@@ -0,0 +1,116 @@
+import json
+import struct
+import zlib
+import pygame
+from game.headless import KeyState
+
+# Запись и повтор ввода игрока. Каждый кадр записывается: сколько он длился, какие клавиши
+# движения были зажаты и какие события пришли (нажатия клавиш, кнопок мыши, закрытие окна).
+# Вместе с настройками игры (в них и зерно мира) этого достаточно, чтобы повторить ту же игру
+# кадр в кадр - без окна и без ожидания, с максимальной скоростью (python3 benchmark.py --replay файл).
+#
+# Формат файла: MAGIC, длина и текст заголовка (JSON с настройками), затем сжатые zlib кадры:
+#   кадр    - время кадра (float64 - ровно то же число, что получила игра), маска зажатых клавиш (1 байт), число событий (1 байт);
+#   событие - тип (1 байт) и данные: код клавиши (int32) или позиция мыши (2 x int16) и кнопка (1 байт)
+
+MAGIC = b'BCINPUT1'
+FRAME = struct.Struct('<dBB')
+KEY = struct.Struct('<i')
+MOUSE = struct.Struct('<hhB')
+
+# Клавиши, состояние которых читает игра каждый шаг (через pygame.key.get_pressed())
+TRACKED_KEYS = [pygame.K_a, pygame.K_LEFT, pygame.K_d, pygame.K_RIGHT,
+                pygame.K_w, pygame.K_UP, pygame.K_SPACE]
+
+# Типы событий в файле
+QUIT, KEYDOWN, KEYUP, MOUSEBUTTONDOWN = range(4)
+
+class ReplayError(Exception):
+    """Файл записи поврежден или имеет другой формат"""
+
+
+class InputRecorder:
+    def __init__(self, path, header):
+        """Открывает файл записи (header - настройки, с которыми начата игра)"""
+        self.file = open(path, 'wb')
+        text = json.dumps(header, ensure_ascii=False, default=str).encode('utf-8')
+        self.file.write(MAGIC + struct.pack('<I', len(text)) + text)
+        self.compressor = zlib.compressobj(9)
+        self.frames = 0
+
+    def record(self, frame_time, events, keys):
+        """Записывает один кадр"""
+        mask = 0
+        for bit, key in enumerate(TRACKED_KEYS):
+            if keys[key]:
+                mask |= 1 << bit
+        data = []
+        for event in events:
+            if event.type == pygame.QUIT:
+                data.append(bytes((QUIT,)))
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                data.append(bytes((KEYDOWN if event.type == pygame.KEYDOWN else KEYUP,)) + KEY.pack(event.key))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                data.append(bytes((MOUSEBUTTONDOWN,)) + MOUSE.pack(event.pos[0], event.pos[1], event.button))
+            if len(data) == 255: # Больше событий за кадр в формат не помещается
+                break
+        self.file.write(self.compressor.compress(FRAME.pack(frame_time, mask, len(data)) + b''.join(data)))
+        self.frames += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.write(self.compressor.flush())
+            self.file.close()
+            self.file = None
+
+
+class InputReplay:
+    def __init__(self, path):
+        """Читает запись целиком"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ReplayError(f"{path}: это не запись ввода")
+        start = len(MAGIC) + 4
+        (length,) = struct.unpack_from('<I', data, len(MAGIC))
+        self.header = json.loads(data[start:start + length].decode('utf-8'))
+        try:
+            frames = zlib.decompressobj().decompress(data[start + length:]) # Без конца потока - запись прервалась
+        except zlib.error as e:
+            raise ReplayError(f"{path}: {e}")
+        self.frame_times = [] # Время каждого кадра
+        self.keys = [] # Зажатые клавиши (KeyState) каждого кадра
+        self.events = [] # События каждого кадра
+        pos = 0
+        while pos < len(frames):
+            try:
+                frame_time, mask, count = FRAME.unpack_from(frames, pos)
+                pos += FRAME.size
+                events = []
+                for _ in range(count):
+                    kind = frames[pos]
+                    pos += 1
+                    if kind == QUIT:
+                        events.append(pygame.event.Event(pygame.QUIT))
+                    elif kind in (KEYDOWN, KEYUP):
+                        (key,) = KEY.unpack_from(frames, pos)
+                        pos += KEY.size
+                        events.append(pygame.event.Event(pygame.KEYDOWN if kind == KEYDOWN else pygame.KEYUP, key=key))
+                    elif kind == MOUSEBUTTONDOWN:
+                        x, y, button = MOUSE.unpack_from(frames, pos)
+                        pos += MOUSE.size
+                        events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y), button=button))
+                    else:
+                        raise ReplayError(f"{path}: неизвестное событие {kind}")
+            except (struct.error, IndexError): # Последний кадр записан не до конца
+                break
+            self.frame_times.append(frame_time)
+            self.keys.append(KeyState(key for bit, key in enumerate(TRACKED_KEYS) if mask & (1 << bit)))
+            self.events.append(events)
+
+    def __len__(self):
+        return len(self.frame_times)
+
+    def script(self, frame, engine):
+        """Сценарий для run_frames: события и клавиши записанного кадра"""
+        return self.events[frame], self.keys[frame]
\ No newline at end of file
@@ -0,0 +1,187 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+
+# Сохранение мира, игрока и инвентаря в один двоичный файл.
+#
+# Мир строится генератором по зерну, поэтому в файл попадают только чанки (полосы столбцов),
+# которые игрок изменил. Устройство файла:
+#   заголовок (HEADER) | сжатые zlib чанки ... | оглавление чанков | метаданные (JSON)
+# Заголовок хранит, где лежат оглавление и метаданные. Оглавление - список записей
+# (номер чанка, смещение, длина). Файл открывается через mmap, и чанк распаковывается
+# только тогда, когда он действительно нужен.
+# Повторное сохранение дописывает в конец файла только чанки, изменившиеся с прошлого раза,
+# новое оглавление и метаданные, а затем переписывает заголовок
+
+MAGIC = b'BCWORLD\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIIQIQI') # magic, версия, размер ID в байтах, высота, размер чанка,
+                                      # смещение оглавления, число чанков, смещение метаданных, длина метаданных
+INDEX_ENTRY = struct.Struct('<qQI') # номер чанка, смещение, длина
+WORLD_KEYS = ('WORLD_SEED', 'WORLD_WIDTH', 'WORLD_HEIGHT', 'INFINITE_WORLD',
+              'TERRAIN_AMPLITUDE', 'CAVES', 'TREE_CHANCE') # Настройки, от которых зависит генерация мира
+COMPACT_RATIO = 0.5 # Если больше половины файла - устаревшие данные, файл переписывается целиком
+
+
+class SaveError(Exception):
+    """Файл сохранения поврежден или не подходит к игре"""
+
+
+class SaveFile:
+    """Открытое для чтения сохранение"""
+    def __init__(self, path, registry=None):
+        self.path = path
+        self.registry = registry
+        self.lock = threading.Lock() # Чанки читаются и из фонового потока бесконечного мира
+        self.file = self.data = None
+        self.open()
+
+    def open(self):
+        """Открывает файл через mmap и читает оглавление"""
+        self.file = open(self.path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.read_header()
+            if self.registry is not None:
+                self.set_registry(self.registry)
+        except (ValueError, KeyError, struct.error, SaveError) as e:
+            self.close()
+            raise SaveError(f"Не удалось прочитать сохранение {self.path}: {e}")
+
+    def read_header(self):
+        """Читает заголовок, оглавление и метаданные"""
+        if len(self.data) < HEADER.size:
+            raise SaveError("файл слишком короткий")
+        (magic, version, self.itemsize, self.height, self.chunk_size,
+         index_offset, index_count, meta_offset, meta_length) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SaveError("неизвестный формат")
+        self.index = {}
+        for i in range(index_count):
+            chunk_x, offset, length = INDEX_ENTRY.unpack_from(self.data, index_offset + i * INDEX_ENTRY.size)
+            self.index[chunk_x] = (offset, length)
+        self.meta = json.loads(bytes(self.data[meta_offset:meta_offset + meta_length]).decode('utf-8'))
+        # Устаревшие данные: старые версии чанков, оглавлений и метаданных от прошлых сохранений
+        live = HEADER.size + sum(length for _, length in self.index.values()) + index_count * INDEX_ENTRY.size
+        self.stale_bytes = len(self.data) - live - meta_length
+
+    def set_registry(self, registry):
+        """Готовит таблицу перевода ID блоков из файла в ID текущего реестра блоков"""
+        self.registry = registry
+        self.dtype = np.uint8 if self.itemsize == 1 else np.uint16
+        self.lookup = np.array([registry.get_id(name) for name in self.meta['blocks']], dtype=registry.dtype)
+
+    def read_chunk(self, chunk_x):
+        """Распаковывает чанк (None - если его нет в сохранении)"""
+        with self.lock:
+            entry = self.index.get(chunk_x)
+            if entry is None:
+                return None
+            offset, length = entry
+            data = zlib.decompress(self.data[offset:offset + length])
+        raw = np.frombuffer(data, dtype=self.dtype)
+        return self.lookup[raw.reshape(self.height, self.chunk_size)]
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class SaveTracker:
+    """Следит за изменениями мира, чтобы сохранять только измененные чанки"""
+    def __init__(self, world, chunk_size, modified=()):
+        self.world = world
+        self.chunk_size = chunk_size
+        self.modified = set(modified) # Чанки, которые отличаются от сгенерированных
+        self.unsaved = set() # Чанки, изменившиеся после последнего сохранения
+        world.add_listener(self.on_world_changed, edits_only=True) # Загрузка чанка - не изменение
+
+    def on_world_changed(self, x0, y0, x1, y1):
+        for chunk_x in range(x0 // self.chunk_size, (x1 - 1) // self.chunk_size + 1):
+            self.modified.add(chunk_x)
+            self.unsaved.add(chunk_x)
+
+    def chunk_cells(self, chunk_x):
+        """Возвращает полосу мира для чанка (столбцы за границей конечного мира заполняются воздухом)"""
+        x0 = chunk_x * self.chunk_size
+        cells = self.world.get_region(x0, 0, x0 + self.chunk_size, self.world.height)
+        if cells.shape[1] < self.chunk_size: # Последний неполный чанк конечного мира
+            full = np.zeros((self.world.height, self.chunk_size), dtype=cells.dtype)
+            full[:, :cells.shape[1]] = cells
+            cells = full
+        return cells
+
+
+def write_save(path, tracker, meta, registry, previous=None):
+    """Записывает сохранение
+
+    previous - открытое прошлое сохранение этого же файла: тогда в конец файла дописываются
+    только чанки из tracker.unsaved, а previous переоткрывается и сразу видит новое сохранение.
+    Возвращает число записанных чанков.
+    """
+    meta = dict(meta, blocks=registry.names)
+    itemsize = np.dtype(registry.dtype).itemsize
+    height, chunk_size = tracker.world.height, tracker.chunk_size
+    if previous is not None and (previous.path != path or not os.path.exists(path)):
+        previous = None
+
+    incremental = (previous is not None and previous.chunk_size == chunk_size and previous.height == height and
+                   previous.itemsize == itemsize and previous.meta.get('blocks') == registry.names)
+    if incremental: # Не переписываем файл, если в нем почти нет устаревших данных
+        incremental = previous.stale_bytes <= os.path.getsize(path) * COMPACT_RATIO
+
+    if incremental:
+        index = dict(previous.index)
+        chunks = sorted(tracker.unsaved)
+        mode, start = 'r+b', os.path.getsize(path)
+    else:
+        index = {}
+        chunks = sorted(tracker.modified)
+        mode, start = 'wb', HEADER.size
+
+    # Сжимаем чанки заранее: чтение мира может ждать фоновый поток, которому нужен previous.lock
+    payloads = [(chunk_x, zlib.compress(tracker.chunk_cells(chunk_x).tobytes(), 6)) for chunk_x in chunks]
+
+    with open(path if incremental else path + '.tmp', mode) as f:
+        if not incremental:
+            f.write(b'\0' * HEADER.size) # Место под заголовок
+        f.seek(start)
+        offset = start
+        for chunk_x, payload in payloads:
+            f.write(payload)
+            index[chunk_x] = (offset, len(payload))
+            offset += len(payload)
+
+        index_offset = offset
+        for chunk_x, (chunk_offset, length) in sorted(index.items()):
+            f.write(INDEX_ENTRY.pack(chunk_x, chunk_offset, length))
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        meta_offset = index_offset + len(index) * INDEX_ENTRY.size
+        f.write(meta_bytes)
+        f.flush()
+
+        # Заголовок пишется последним: пока он старый, файл указывает на прежнее целое сохранение
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, itemsize, height, chunk_size,
+                            index_offset, len(index), meta_offset, len(meta_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+
+    if previous is not None:
+        with previous.lock:
+            previous.close() # На Windows открытый файл нельзя заменить
+            if not incremental:
+                os.replace(path + '.tmp', path)
+            previous.open()
+    elif not incremental:
+        os.replace(path + '.tmp', path)
+    tracker.unsaved.clear()
+    return len(chunks)
\ No newline at end of file
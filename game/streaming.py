@@ -0,0 +1,286 @@
+import os
+import shutil
+import tempfile
+import zlib
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from game.world import AIR, WorldRow
+
+# Бесконечный по горизонтали мир. Он хранится полосами (чанками) шириной CHUNK_SIZE столбцов
+# на всю высоту мира. В памяти держатся только чанки рядом с камерой: новые чанки генерируются
+# (или читаются с диска) в фоновом потоке заранее, а далекие выгружаются.
+# Измененные игроком чанки перед выгрузкой сохраняются на диск, остальные просто забываются -
+# генератор по тому же зерну всегда построит их заново точно такими же
+
+class Chunk:
+    """Полоса мира шириной в чанк"""
+    __slots__ = ('cells', 'solid', 'modified', 'dirty')
+
+    def __init__(self, cells, solid, modified=False):
+        self.cells = cells # cells[y, x] - ID блоков
+        self.solid = solid # solid[y, x] - твердость блоков
+        self.modified = modified # Отличается ли чанк от сгенерированного (тогда его нельзя просто забыть)
+        self.dirty = False # Менялся ли чанк после последней записи на диск
+
+
+class StreamingWorld:
+    def __init__(self, height, registry, generator, chunk_size=16, memory_budget=64 * 1024 * 1024,
+                 view_distance=4, cache_dir=None):
+        """Инициализация
+
+        view_distance - сколько чанков по обе стороны от камеры держать загруженными заранее.
+        cache_dir - папка для выгруженных чанков (по умолчанию - временная папка).
+        """
+        self.width = None # Ширина не ограничена
+        self.height = height
+        self.registry = registry
+        self.generator = generator
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.view_distance = view_distance
+        self.listeners = [] # (функция, только правки) - вызываются при изменении мира
+
+        self.chunks = OrderedDict() # Номер чанка -> Chunk, в порядке последнего использования
+        self.pending = {} # Номер чанка -> Future фоновой загрузки
+        self.writing = {} # Номер чанка -> cells, которые еще записываются на диск
+        self.stored = set() # Чанки, сохраненные на диск
+        self.focus = 0 # Чанк, рядом с которым сейчас камера
+        self.chunk_source = None # Функция (номер чанка) -> cells или None, например, чтение из сохранения
+
+        if cache_dir is None:
+            self.temp_dir = tempfile.mkdtemp(prefix='world_chunks_')
+            cache_dir = self.temp_dir
+        else:
+            self.temp_dir = None
+            os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='world-stream')
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return WorldRow(self, y)
+
+    # --- Чанки ---
+
+    def chunk_of(self, x):
+        """Номер чанка, в котором лежит столбец x"""
+        return x // self.chunk_size
+
+    def chunk_bytes(self):
+        """Сколько памяти занимает один чанк"""
+        return self.height * self.chunk_size * (np.dtype(self.registry.dtype).itemsize + 1)
+
+    def chunk_path(self, chunk_x):
+        return os.path.join(self.cache_dir, f'chunk_{chunk_x}.bin')
+
+    def produce_chunk(self, chunk_x):
+        """Возвращает (cells, modified) чанка: из памяти, с диска, из chunk_source или от генератора
+
+        Вызывается и из фонового потока, поэтому не трогает словарь загруженных чанков.
+        """
+        cells = self.writing.get(chunk_x)
+        if cells is not None: # Еще записывается на диск - берем копию из памяти
+            return cells.copy(), True
+        if chunk_x in self.stored:
+            with open(self.chunk_path(chunk_x), 'rb') as f:
+                data = zlib.decompress(f.read())
+            cells = np.frombuffer(data, dtype=self.registry.dtype).reshape(self.height, self.chunk_size).copy()
+            return cells, True
+        if self.chunk_source is not None:
+            cells = self.chunk_source(chunk_x)
+            if cells is not None:
+                return cells, True
+        x0 = chunk_x * self.chunk_size
+        return self.generator.generate(x0, x0 + self.chunk_size), False
+
+    def write_chunk(self, chunk_x, cells):
+        """Записывает чанк на диск (выполняется в фоновом потоке)"""
+        with open(self.chunk_path(chunk_x), 'wb') as f:
+            f.write(zlib.compress(cells.tobytes(), 1))
+        self.stored.add(chunk_x)
+        self.writing.pop(chunk_x, None)
+
+    def add_chunk(self, chunk_x, cells, modified):
+        """Кладет чанк в память"""
+        chunk = Chunk(cells, self.registry.solid[cells], modified)
+        self.chunks[chunk_x] = chunk
+        return chunk
+
+    def get_chunk(self, chunk_x):
+        """Возвращает чанк (если его нет в памяти - загружает сразу, не дожидаясь фонового потока)"""
+        chunk = self.chunks.get(chunk_x)
+        if chunk is not None:
+            self.chunks.move_to_end(chunk_x)
+            return chunk
+        future = self.pending.pop(chunk_x, None)
+        cells, modified = future.result() if future is not None else self.produce_chunk(chunk_x)
+        return self.add_chunk(chunk_x, cells, modified)
+
+    def is_loaded(self, chunk_x):
+        return chunk_x in self.chunks
+
+    def update(self, focus_x):
+        """Вызывается каждый кадр: заранее загружает чанки рядом со столбцом focus_x и выгружает далекие"""
+        self.focus = self.chunk_of(int(focus_x))
+
+        # Забираем чанки, которые фоновый поток уже подготовил
+        for chunk_x, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[chunk_x]
+                if chunk_x not in self.chunks:
+                    cells, modified = future.result()
+                    self.add_chunk(chunk_x, cells, modified)
+                    x0 = chunk_x * self.chunk_size
+                    self.notify(x0, 0, x0 + self.chunk_size, self.height, loaded=True) # Появился новый кусок мира (не правка)
+
+        # Заказываем загрузку ближайших чанков
+        for chunk_x in range(self.focus - self.view_distance, self.focus + self.view_distance + 1):
+            if chunk_x not in self.chunks and chunk_x not in self.pending:
+                self.pending[chunk_x] = self.executor.submit(self.produce_chunk, chunk_x)
+
+        self.evict()
+
+    def evict(self):
+        """Выгружает давно не использованные чанки, пока мир не уложится в лимит памяти"""
+        limit = max(1, self.memory_budget // self.chunk_bytes())
+        if len(self.chunks) <= limit:
+            return
+        # Чанки рядом с камерой не трогаем, остальные выгружаем начиная с самых давно использованных
+        far = [chunk_x for chunk_x in self.chunks if abs(chunk_x - self.focus) > self.view_distance]
+        for chunk_x in far[:len(self.chunks) - limit]:
+            chunk = self.chunks.pop(chunk_x)
+            if chunk.dirty:
+                self.writing[chunk_x] = chunk.cells
+                self.executor.submit(self.write_chunk, chunk_x, chunk.cells)
+
+    def resident_bytes(self):
+        """Сколько памяти сейчас занимают загруженные чанки"""
+        return len(self.chunks) * self.chunk_bytes()
+
+    def close(self):
+        """Останавливает фоновый поток и удаляет временные файлы"""
+        self.executor.shutdown(wait=True)
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    # --- Тот же интерфейс, что и у World ---
+
+    def in_bounds(self, x, y):
+        """Проверяет, находится ли клетка внутри мира (по горизонтали мир бесконечен)"""
+        return 0 <= y < self.height
+
+    def clip_columns(self, x0, x1):
+        """Обрезает диапазон столбцов по границам мира"""
+        return x0, x1
+
+    def get_id(self, x, y):
+        """Возвращает ID блока в клетке (выше и ниже мира - воздух)"""
+        if not 0 <= y < self.height:
+            return AIR
+        chunk_x = x // self.chunk_size
+        return int(self.get_chunk(chunk_x).cells[y, x - chunk_x * self.chunk_size])
+
+    def get_block(self, x, y):
+        """Возвращает название блока в клетке"""
+        return self.registry.names[self.get_id(x, y)]
+
+    def set_block(self, x, y, block_type):
+        """Ставит блок в клетку по названию"""
+        self.set_id(x, y, self.registry.get_id(block_type))
+
+    def set_id(self, x, y, block_id):
+        """Ставит блок в клетку по ID"""
+        if not 0 <= y < self.height:
+            raise IndexError((x, y))
+        chunk_x = x // self.chunk_size
+        chunk = self.get_chunk(chunk_x)
+        chunk.cells[y, x - chunk_x * self.chunk_size] = block_id
+        chunk.modified = chunk.dirty = True
+        self.notify(x, y, x + 1, y + 1)
+
+    def set_region(self, x0, y0, cells):
+        """Записывает массив ID cells[y, x] в мир, начиная с клетки (x0, y0), и один раз сообщает об изменении"""
+        height, width = cells.shape
+        if not (0 <= y0 and y0 + height <= self.height):
+            raise IndexError((x0, y0, x0 + width, y0 + height))
+        size = self.chunk_size
+        for chunk_x in range(x0 // size, (x0 + width - 1) // size + 1):
+            chunk = self.get_chunk(chunk_x)
+            start = max(x0, chunk_x * size)
+            end = min(x0 + width, (chunk_x + 1) * size)
+            chunk.cells[y0:y0 + height, start - chunk_x * size:end - chunk_x * size] = cells[:, start - x0:end - x0]
+            chunk.modified = chunk.dirty = True
+        self.notify(x0, y0, x0 + width, y0 + height)
+    
+    def gather(self, name, x0, y0, x1, y1):
+        """Собирает участок [x0, x1) x [y0, y1) массива name ('cells' или 'solid') из нескольких чанков"""
+        size = self.chunk_size
+        first, last = x0 // size, (x1 - 1) // size
+        if first == last: # Участок внутри одного чанка - возвращаем его без копирования
+            array = getattr(self.get_chunk(first), name)
+            return array[y0:y1, x0 - first * size:x1 - first * size]
+        parts = []
+        for chunk_x in range(first, last + 1):
+            array = getattr(self.get_chunk(chunk_x), name)
+            start = max(x0, chunk_x * size) - chunk_x * size
+            end = min(x1, (chunk_x + 1) * size) - chunk_x * size
+            parts.append(array[y0:y1, start:end])
+        return np.concatenate(parts, axis=1)
+
+    def get_region(self, x0, y0, x1, y1):
+        """Возвращает участок мира [x0, x1) x [y0, y1) (по вертикали обрезанный по границам)"""
+        y0, y1 = max(0, y0), min(self.height, y1)
+        if x0 >= x1 or y0 >= y1:
+            return np.zeros((0, 0), dtype=self.registry.dtype)
+        return self.gather('cells', x0, y0, x1, y1)
+
+    def is_solid(self, x, y):
+        """Проверяет, твердый ли блок в клетке"""
+        if not 0 <= y < self.height:
+            return False
+        chunk_x = x // self.chunk_size
+        return bool(self.get_chunk(chunk_x).solid[y, x - chunk_x * self.chunk_size])
+
+    def solid_region(self, x0, y0, x1, y1):
+        """Возвращает сетку твердости участка ровно заданного размера (выше и ниже мира - пусто)"""
+        region = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=bool)
+        cy0, cy1 = max(0, y0), min(self.height, y1)
+        if x0 < x1 and cy0 < cy1:
+            region[cy0 - y0:cy1 - y0, :] = self.gather('solid', x0, cy0, x1, cy1)
+        return region
+
+    def any_solid(self, x0, y0, x1, y1):
+        """Есть ли хоть один твердый блок в участке [x0, x1) x [y0, y1)"""
+        return bool(self.solid_region(x0, y0, x1, y1).any())
+
+    def count(self, block_type):
+        """Считает количество блоков указанного типа в загруженной части мира"""
+        block_id = self.registry.ids.get(block_type)
+        if block_id is None:
+            return 0
+        return sum(int(np.count_nonzero(chunk.cells == block_id)) for chunk in self.chunks.values())
+
+    def add_listener(self, callback, edits_only=False):
+        """Подписка на изменения мира: callback(x0, y0, x1, y1) получает измененный участок
+
+        edits_only - сообщать только о правках блоков, а не о загрузке чанков.
+        """
+        self.listeners.append((callback, edits_only))
+
+    def notify(self, x0, y0, x1, y1, loaded=False):
+        """Сообщает подписчикам, что участок [x0, x1) x [y0, y1) изменился (loaded - чанк загружен, а не изменен)"""
+        size = self.chunk_size
+        for chunk_x in range(x0 // size, (x1 - 1) // size + 1):
+            chunk = self.chunks.get(chunk_x)
+            if chunk is not None: # Пересчитываем твердость измененных клеток
+                start = max(x0, chunk_x * size) - chunk_x * size
+                end = min(x1, (chunk_x + 1) * size) - chunk_x * size
+                chunk.solid[y0:y1, start:end] = self.registry.solid[chunk.cells[y0:y1, start:end]]
+        for callback, edits_only in self.listeners:
+            if not (loaded and edits_only):
+                callback(x0, y0, x1, y1)
\ No newline at end of file
@@ -0,0 +1,178 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from game.world import AIR
+
+# Генератор местности: холмы, слои земли и камня, пещеры и деревья.
+# Всё считается numpy-операциями сразу над целыми столбцами, а не циклами по клеткам.
+# Шум зависит только от зерна (seed) и мировых координат, поэтому любой участок мира
+# можно сгенерировать отдельно - и он совпадет с тем же участком целого мира
+
+# Форма кроны дерева: смещения листвы (dx, dy) относительно верхушки ствола
+LEAF_OFFSETS = [(dx, dy) for dy in range(-2, 1) for dx in range(-2, 3) if abs(dx) + abs(dy) < 4]
+TREE_HEIGHT = 5
+TREE_SPACING = 6 # На каждые 6 столбцов - не больше одного дерева, чтобы кроны не слипались
+
+def hash_coords(seed, xs, ys=None):
+    """Детерминированный "случайный" хэш целых координат -> числа от 0 до 1"""
+    h = np.asarray(xs, dtype=np.int64).view(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    if ys is not None:
+        h = h ^ (np.asarray(ys, dtype=np.int64).view(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F))
+    h = h ^ np.uint64(seed * 0x165667B19E3779F9 & 0xFFFFFFFFFFFFFFFF)
+    # Перемешивание битов (как в splitmix64)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    h = h ^ (h >> np.uint64(31))
+    return (h >> np.uint64(40)).astype(np.float32) / np.float32(1 << 24)
+
+def smoothstep(t):
+    return t * t * (3 - 2 * t)
+
+def value_noise_1d(seed, xs, scale):
+    """Плавный шум вдоль одной оси (значения от 0 до 1)"""
+    position = xs / scale
+    cell = np.floor(position).astype(np.int64)
+    t = smoothstep((position - cell).astype(np.float32))
+    left = hash_coords(seed, cell)
+    right = hash_coords(seed, cell + 1)
+    return left + (right - left) * t
+
+def value_noise_2d(seed, x0, x1, height, scale):
+    """Плавный шум на участке столбцов [x0, x1) высотой height (значения от 0 до 1)
+
+    Шум считается только в узлах крупной сетки, а затем интерполируется сначала
+    по горизонтали, потом по вертикали - это намного быстрее, чем хэш в каждой клетке.
+    """
+    lattice_x = np.arange(x0 // scale, (x1 - 1) // scale + 2)
+    lattice_y = np.arange(0, (height - 1) // scale + 2)
+    nodes = hash_coords(seed, lattice_x[None, :], lattice_y[:, None])
+
+    xs = np.arange(x0, x1)
+    column = xs // scale - lattice_x[0]
+    tx = smoothstep(((xs % scale) / scale).astype(np.float32))
+    rows = nodes[:, column] + (nodes[:, column + 1] - nodes[:, column]) * tx
+
+    ys = np.arange(height)
+    row = ys // scale
+    ty = smoothstep(((ys % scale) / scale).astype(np.float32))[:, None]
+    return rows[row] + (rows[row + 1] - rows[row]) * ty
+
+class TerrainGenerator:
+    def __init__(self, seed, height, registry, config=None):
+        """Инициализация (config - настройки мира, см. mods/my_config.py)"""
+        config = config or {}
+        self.seed = seed
+        self.height = height
+        self.ids = {name: registry.get_id(name) for name in ('grass', 'dirt', 'stone', 'wood', 'leaf')}
+        self.dtype = registry.dtype
+        self.amplitude = config.get('TERRAIN_AMPLITUDE', 4) # Высота холмов в блоках (0 - плоский мир)
+        self.caves = config.get('CAVES', True)
+        self.tree_chance = config.get('TREE_CHANCE', 0.5) # Вероятность дерева на каждые TREE_SPACING столбцов
+        self.ground_level = height - 10 # Средний уровень земли
+
+    def surface_heights(self, x0, x1):
+        """Возвращает строку, в которой лежит трава, для каждого столбца [x0, x1)"""
+        xs = np.arange(x0, x1)
+        if self.amplitude == 0:
+            return np.full(len(xs), self.ground_level, dtype=np.int64)
+        # Два слоя шума: пологие холмы и мелкие неровности
+        noise = (value_noise_1d(self.seed, xs, 48.0) * 0.75 +
+                 value_noise_1d(self.seed + 1, xs, 12.0) * 0.25) * 2 - 1
+        heights = self.ground_level - np.round(noise * self.amplitude).astype(np.int64)
+        top_limit = min(TREE_HEIGHT + 4, self.ground_level) # Над холмом должно помещаться дерево
+        return np.clip(heights, top_limit, self.height - 2)
+
+    def tree_columns(self, x0, x1):
+        """Возвращает столбцы [x0, x1), в которых растут деревья"""
+        groups = np.arange(x0 // TREE_SPACING, (x1 - 1) // TREE_SPACING + 1)
+        # В каждой группе столбцов выбираем одно место (не у края группы) и решаем, будет ли там дерево
+        offsets = 1 + (hash_coords(self.seed + 2, groups) * (TREE_SPACING - 2)).astype(np.int64)
+        present = hash_coords(self.seed + 3, groups) < self.tree_chance
+        columns = groups[present] * TREE_SPACING + offsets[present]
+        return columns[(columns >= x0) & (columns < x1)]
+
+    def generate(self, x0, x1):
+        """Генерирует столбцы мира [x0, x1) и возвращает массив cells[y, x]"""
+        width = x1 - x0
+        ids = self.ids
+        rows = np.arange(self.height)[:, None]
+        surface = self.surface_heights(x0, x1)[None, :]
+
+        # Слои: воздух, трава, 4 слоя земли, дальше камень
+        cells = np.full((self.height, width), ids['stone'], dtype=self.dtype)
+        cells[rows < surface + 5] = ids['dirt']
+        cells[rows == surface] = ids['grass']
+        cells[rows < surface] = AIR
+
+        # Пещеры - в камне, не касаясь самого нижнего ряда
+        if self.caves:
+            noise = value_noise_2d(self.seed + 4, x0, x1, self.height, 8)
+            cave = (noise > 0.72) & (rows > surface + 5) & (rows < self.height - 1)
+            cells[cave] = AIR
+
+        self.plant_trees(cells, x0, x1)
+        return cells
+
+    def plant_trees(self, cells, x0, x1):
+        """Сажает деревья в участок [x0, x1), включая кроны деревьев из соседних столбцов"""
+        margin = 2 # Крона выступает на 2 блока в стороны
+        trees = self.tree_columns(x0 - margin, x1 + margin)
+        if len(trees) == 0:
+            return
+        tops = self.surface_heights(x0 - margin, x1 + margin)[trees - (x0 - margin)] - 1 # Клетка над травой
+        width = x1 - x0
+
+        # Ствол
+        for i in range(TREE_HEIGHT):
+            inside = (trees >= x0) & (trees < x1) & (tops - i >= 0)
+            cells[tops[inside] - i, trees[inside] - x0] = self.ids['wood']
+
+        # Листва вокруг ствола (только в воздухе)
+        for dx, dy in LEAF_OFFSETS:
+            xs = trees + dx - x0
+            ys = tops - TREE_HEIGHT + dy
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < self.height)
+            xs, ys = xs[inside], ys[inside]
+            empty = cells[ys, xs] == AIR
+            cells[ys[empty], xs[empty]] = self.ids['leaf']
+
+
+def _generate_into_shared(generator, memory_name, shape, x0, x1):
+    """Генерирует столбцы [x0, x1) в процессе-помощнике и пишет их прямо в общую память"""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        cells = np.ndarray(shape, dtype=generator.dtype, buffer=memory.buf)
+        cells[:, x0:x1] = generator.generate(x0, x1)
+        del cells # Массив должен исчезнуть до закрытия памяти, на которую он смотрит
+    finally:
+        memory.close()
+    return x0, x1
+
+def generate_parallel(generator, cells, workers=None, chunk_width=512):
+    """Генерирует весь мир в cells несколькими процессами
+
+    Мир делится на независимые полосы столбцов по chunk_width. Процессы пишут полосы
+    в общую память без копирования результатов через pickle, а в конце она
+    одним копированием переносится в cells.
+    """
+    workers = workers or os.cpu_count() or 1
+    height, width = cells.shape
+    ranges = [(x0, min(width, x0 + chunk_width)) for x0 in range(0, width, chunk_width)]
+    if workers <= 1 or len(ranges) <= 1:
+        cells[:, :] = generator.generate(0, width)
+        return
+
+    memory = shared_memory.SharedMemory(create=True, size=max(1, cells.nbytes))
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [pool.submit(_generate_into_shared, generator, memory.name, cells.shape, x0, x1)
+                       for x0, x1 in ranges]
+            for future in futures:
+                future.result() # Пробрасываем ошибки из процессов-помощников
+        shared = np.ndarray(cells.shape, dtype=cells.dtype, buffer=memory.buf)
+        cells[:, :] = shared
+        del shared
+    finally:
+        memory.close()
+        memory.unlink()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import os
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+# Загрузка текстур блоков. PNG декодируются и масштабируются в нескольких потоках,
+# а готовые пиксели размером BLOCK_SIZE x BLOCK_SIZE сохраняются в кэш на диске.
+# Ключ кэша - (путь к файлу, время его изменения, BLOCK_SIZE), поэтому измененная
+# текстура или другой размер блока просто дают новый файл кэша
+
+PIXEL_FORMAT = 'RGBA'
+
+class TextureLoader:
+    def __init__(self, block_size, cache_dir=None, workers=None):
+        """Инициализация (cache_dir=None - не использовать кэш на диске)"""
+        self.block_size = block_size
+        self.cache_dir = cache_dir
+        self.workers = workers or min(8, os.cpu_count() or 1)
+
+    def cache_path(self, path):
+        """Путь к файлу кэша для текстуры (None - если кэш выключен)"""
+        if not self.cache_dir:
+            return None
+        key = f"{os.path.abspath(path)}|{os.stat(path).st_mtime_ns}|{self.block_size}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.rgba')
+
+    def decode(self, path):
+        """Возвращает пиксели текстуры в формате RGBA (выполняется в потоке-помощнике)"""
+        size = (self.block_size, self.block_size)
+        cache_path = self.cache_path(path)
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                pixels = f.read()
+            if len(pixels) == self.block_size * self.block_size * 4:
+                return pixels
+
+        image = pygame.transform.scale(pygame.image.load(path), size)
+        pixels = pygame.image.tobytes(image, PIXEL_FORMAT)
+        if cache_path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path + '.tmp', 'wb') as f:
+                f.write(pixels)
+            os.replace(cache_path + '.tmp', cache_path) # Другой запуск не увидит недописанный файл
+        return pixels
+
+    def load_all(self, textures):
+        """Загружает текстуры {блок: путь}
+
+        Возвращает (загруженные {блок: Surface}, ошибки {блок: текст ошибки}).
+        Поверхности создаются уже в главном потоке - convert_alpha нужен экран.
+        """
+        loaded, errors = {}, {}
+        if not textures:
+            return loaded, errors
+        size = (self.block_size, self.block_size)
+        paths = set(textures.values()) # Одна и та же картинка может быть у нескольких блоков
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            futures = {path: pool.submit(self.decode, path) for path in paths}
+            surfaces = {}
+            for path, future in futures.items():
+                try:
+                    surfaces[path] = pygame.image.frombytes(future.result(), size, PIXEL_FORMAT).convert_alpha()
+                except Exception as e:
+                    surfaces[path] = e
+        for block_type, path in textures.items():
+            if isinstance(surfaces[path], Exception):
+                errors[block_type] = str(surfaces[path])
+            else:
+                loaded[block_type] = surfaces[path]
+        return loaded, errors
\ No newline at end of file
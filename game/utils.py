@@ -1,5 +1,6 @@
 import pygame
 import os
+from collections import OrderedDict
 
 # Не стоит здесь что-то менять, хоть этот раздел и находится в /game, о котором я говорил в README
 # Здесь функция для загрузки изображений и отрисовки текста в UI
@@ -16,11 +17,47 @@ def load_image(path, size=None):
         surface.fill((255, 0, 255))
         return surface
 
+# Кэши для текста: поиск и создание шрифта - дорогая операция, поэтому шрифты создаются
+# один раз, а уже отрисованные надписи переиспользуются
+TEXT_CACHE_SIZE = 256 # Сколько готовых надписей хранить в памяти
+
+_font_cache = {} # (название шрифта, размер) -> Font
+_text_cache = OrderedDict() # (текст, размер, цвет, название шрифта) -> Surface
+
+def get_font(font_size, font_name=None):
+    """Возвращает шрифт из кэша (создает его при первом обращении)"""
+    key = (font_name, font_size)
+    font = _font_cache.get(key)
+    if font is None:
+        if not _font_cache: # Шрифты нельзя использовать после pygame.quit(), поэтому забываем их вместе с ним
+            pygame.register_quit(clear_text_cache)
+        if not pygame.font.get_init(): # Модуль шрифтов включается только при первой надписи
+            pygame.font.init()
+        font = pygame.font.SysFont(font_name, font_size)
+        _font_cache[key] = font
+    return font
+
+def clear_text_cache():
+    """Очищает кэши шрифтов и надписей"""
+    _font_cache.clear()
+    _text_cache.clear()
+
+def render_text(text, font_size=24, color=(255, 255, 255), font_name=None):
+    """Возвращает готовую картинку надписи из кэша (рисует её при первом обращении)"""
+    key = (text, font_size, tuple(color), font_name)
+    text_surface = _text_cache.get(key)
+    if text_surface is None:
+        text_surface = get_font(font_size, font_name).render(text, True, color)
+        _text_cache[key] = text_surface
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False) # Удаляем надпись, которая дольше всех не использовалась
+    else:
+        _text_cache.move_to_end(key)
+    return text_surface
+
 def draw_text(surface, text, pos, font_size=24, color=(255, 255, 255)):
     """Отрисовка текста в UI"""
     try:
-        font = pygame.font.SysFont(None, font_size)
-        text_surface = font.render(text, True, color)
-        surface.blit(text_surface, pos)
+        surface.blit(render_text(text, font_size, color), pos)
     except:
         pass
\ No newline at end of file
@@ -0,0 +1,232 @@
+import numpy as np
+
+# Здесь хранится сам мир: вместо списка списков строк ('air', 'grass', ...) используется
+# один непрерывный numpy-массив чисел. Каждый тип блока получает свой ID из реестра блоков
+
+AIR = 0 # ID воздуха всегда равен 0, поэтому пустой мир - это просто массив нулей
+
+
+class BlockRegistry:
+    """Реестр блоков: сопоставляет названия блоков из BLOCKS с целочисленными ID"""
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.names = ['air'] + [name for name in blocks.keys() if name != 'air']
+        self.ids = {name: block_id for block_id, name in enumerate(self.names)}
+        # Для небольшого числа блоков хватает одного байта на клетку
+        self.dtype = np.uint8 if len(self.names) < 256 else np.uint16
+        self.rebuild_tables()
+
+    def rebuild_tables(self):
+        """Пересобирает таблицы свойств блоков (индекс в таблице - ID блока)"""
+        self.solid = np.array([self.is_solid_name(name) for name in self.names], dtype=bool)
+        self.breakable = np.array([bool(self.blocks.get(name, {}).get('breakable'))
+                                   for name in self.names], dtype=bool)
+        self.gravity = np.array([bool(self.blocks.get(name, {}).get('gravity'))
+                                 for name in self.names], dtype=bool) # Падает ли блок, если под ним пусто
+        self.light = np.array([min(15, int(self.blocks.get(name, {}).get('light', 0)))
+                               for name in self.names], dtype=np.uint8) # Яркость свечения блока (0 - не светится)
+
+    def is_solid_name(self, name):
+        """Твердый ли блок (неизвестные блоки считаются твердыми)"""
+        return name != 'air' and self.blocks.get(name, {}).get('solid', True)
+
+    def get_id(self, name):
+        """Возвращает ID блока по названию (незнакомый блок регистрируется на лету)"""
+        block_id = self.ids.get(name)
+        if block_id is None:
+            block_id = self.register(name)
+        return block_id
+
+    def register(self, name):
+        """Добавляет в реестр блок, которого нет в BLOCKS"""
+        if len(self.names) >= np.iinfo(self.dtype).max + 1:
+            raise ValueError(f"Слишком много типов блоков для мира: {name}")
+        self.names.append(name)
+        self.ids[name] = len(self.names) - 1
+        self.rebuild_tables()
+        return self.ids[name]
+
+
+class WorldRow:
+    """Строка мира - позволяет по-прежнему писать world[y][x] с названиями блоков"""
+    def __init__(self, world, y):
+        self.world = world
+        self.y = y
+
+    def __len__(self):
+        return self.world.width
+
+    def __getitem__(self, x):
+        return self.world.get_block(x, self.y)
+
+    def __setitem__(self, x, block_type):
+        self.world.set_block(x, self.y, block_type)
+
+    def __iter__(self):
+        names = self.world.registry.names
+        row = self.world.get_region(0, self.y, self.world.width, self.y + 1)
+        return (names[block_id] for block_id in row[0].tolist())
+
+
+class World:
+    def __init__(self, width, height, registry):
+        """Инициализация"""
+        self.width = width
+        self.height = height
+        self.registry = registry
+        self.cells = np.zeros((height, width), dtype=registry.dtype) # cells[y, x] - ID блока
+        self.solid = np.zeros((height, width), dtype=bool) # solid[y, x] - твердый ли блок (для столкновений)
+        self.listeners = [] # (функция, только правки) - вызываются при изменении мира
+        
+        # Ленивое заполнение: полосы столбцов генерируются при первом обращении к ним
+        self.source = None # source(x0, x1) -> cells[:, x0:x1]
+        self.strip_width = width
+        self.ready = None # ready[i] - заполнена ли i-я полоса
+        self.missing = 0 # Сколько полос еще не заполнено
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return WorldRow(self, y)
+
+    def set_source(self, source, strip_width):
+        """Включает ленивое заполнение мира полосами шириной strip_width столбцов
+
+        Мир не генерируется целиком при запуске: каждая полоса заполняется
+        вызовом source(x0, x1), когда к ней впервые обращаются (отрисовка, столкновения, правки).
+        """
+        self.source = source
+        self.strip_width = strip_width
+        self.ready = np.zeros((self.width + strip_width - 1) // strip_width, dtype=bool)
+        self.missing = len(self.ready)
+    
+    def ensure(self, x0, x1):
+        """Заполняет еще не сгенерированные полосы, задетые столбцами [x0, x1)"""
+        if not self.missing:
+            return
+        first = max(0, x0) // self.strip_width
+        last = (min(self.width, x1) - 1) // self.strip_width
+        for strip in range(first, last + 1):
+            if self.ready[strip]:
+                continue
+            start = strip * self.strip_width
+            end = min(self.width, start + self.strip_width)
+            self.cells[:, start:end] = self.source(start, end)
+            self.solid[:, start:end] = self.registry.solid[self.cells[:, start:end]]
+            self.ready[strip] = True
+            self.missing -= 1
+    
+    def in_bounds(self, x, y):
+        """Проверяет, находится ли клетка внутри мира"""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def clip_columns(self, x0, x1):
+        """Обрезает диапазон столбцов [x0, x1) по границам мира"""
+        return max(0, x0), min(self.width, x1)
+
+    def get_id(self, x, y):
+        """Возвращает ID блока в клетке (за пределами мира - воздух)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.ensure(x, x + 1)
+            return int(self.cells[y, x])
+        return AIR
+
+    def get_block(self, x, y):
+        """Возвращает название блока в клетке"""
+        return self.registry.names[self.get_id(x, y)]
+
+    def set_block(self, x, y, block_type):
+        """Ставит блок в клетку по названию"""
+        self.set_id(x, y, self.registry.get_id(block_type))
+
+    def set_id(self, x, y, block_id):
+        """Ставит блок в клетку по ID"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError((x, y))
+        self.ensure(x, x + 1)
+        self.cells[y, x] = block_id
+        self.notify(x, y, x + 1, y + 1)
+
+    def set_region(self, x0, y0, cells):
+        """Записывает массив ID cells[y, x] в мир, начиная с клетки (x0, y0), и один раз сообщает об изменении"""
+        height, width = cells.shape
+        if not (0 <= x0 and x0 + width <= self.width and 0 <= y0 and y0 + height <= self.height):
+            raise IndexError((x0, y0, x0 + width, y0 + height))
+        self.ensure(x0, x0 + width)
+        self.cells[y0:y0 + height, x0:x0 + width] = cells
+        self.notify(x0, y0, x0 + width, y0 + height)
+    
+    def get_region(self, x0, y0, x1, y1):
+        """Возвращает прямоугольный участок мира [x0, x1) x [y0, y1) (обрезанный по границам)"""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        if x0 >= x1 or y0 >= y1:
+            return self.cells[0:0, 0:0]
+        self.ensure(x0, x1)
+        return self.cells[y0:y1, x0:x1]
+
+    def is_solid(self, x, y):
+        """Проверяет, твердый ли блок в клетке"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.ensure(x, x + 1)
+            return bool(self.solid[y, x])
+        return False
+
+    def any_solid(self, x0, y0, x1, y1):
+        """Есть ли хоть один твердый блок в участке [x0, x1) x [y0, y1)"""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = max(x0, x1), max(y0, y1) # Отрицательные границы в срезах numpy считаются с конца
+        self.ensure(x0, x1)
+        return bool(self.solid[y0:y1, x0:x1].any())
+
+    def solid_region(self, x0, y0, x1, y1):
+        """Возвращает сетку твердости участка [x0, x1) x [y0, y1) ровно заданного размера
+
+        Клетки за пределами мира считаются нетвердыми.
+        """
+        self.ensure(x0, x1)
+        if 0 <= x0 <= x1 <= self.width and 0 <= y0 <= y1 <= self.height:
+            return self.solid[y0:y1, x0:x1]
+        region = np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=bool)
+        cx0, cy0 = max(0, x0), max(0, y0)
+        cx1, cy1 = min(self.width, x1), min(self.height, y1)
+        if cx0 < cx1 and cy0 < cy1:
+            region[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0] = self.solid[cy0:cy1, cx0:cx1]
+        return region
+
+    def rebuild_solid(self):
+        """Пересчитывает сетку твердости для всего мира (после прямой записи в cells)"""
+        self.solid = self.registry.solid[self.cells]
+
+    def count(self, block_type):
+        """Считает количество блоков указанного типа во всём мире"""
+        block_id = self.registry.ids.get(block_type)
+        if block_id is None:
+            return 0
+        self.ensure(0, self.width)
+        return int(np.count_nonzero(self.cells == block_id))
+
+    def update(self, focus_x):
+        """Вызывается каждый кадр (обычному миру делать нечего - он целиком в памяти)"""
+        pass
+
+    def close(self):
+        """Освобождает ресурсы мира"""
+        pass
+
+    def add_listener(self, callback, edits_only=False):
+        """Подписка на изменения мира: callback(x0, y0, x1, y1) получает измененный участок
+
+        edits_only - сообщать только о правках блоков, а не о загрузке новых кусков мира.
+        """
+        self.listeners.append((callback, edits_only))
+
+    def notify(self, x0, y0, x1, y1, loaded=False):
+        """Сообщает подписчикам, что участок [x0, x1) x [y0, y1) изменился (loaded - загружен, а не изменен)"""
+        self.solid[y0:y1, x0:x1] = self.registry.solid[self.cells[y0:y1, x0:x1]]
+        for callback, edits_only in self.listeners:
+            if not (loaded and edits_only):
+                callback(x0, y0, x1, y1)
\ No newline at end of file
@@ -1,3 +1,6 @@
+import time
+STARTED = time.perf_counter() # Время запуска - чтобы замерить, сколько длится импорт модулей
+
 import pygame
 import sys
 import traceback
@@ -6,12 +9,15 @@ from mods.my_config import GAME_CONFIG
 from mods.my_blocks import BLOCKS
 from mods.my_player import PLAYER_CONFIG
 
+IMPORTED = time.perf_counter()
+
 # Не стоит здесь что-то менять
 # Здесь просто создается экземпляр класса игры и происходит её запуск
 
 def main():
     try:
         engine = GameEngine(GAME_CONFIG, BLOCKS, PLAYER_CONFIG)
+        engine.startup.add('import', STARTED, IMPORTED - STARTED)
         engine.run()
     finally:
         pygame.quit()
@@ -45,6 +45,27 @@ BLOCKS = { # Определяется список блоков
         'solid': False,  # Листва не твердая - можно пройти сквозь (аналогично воздуху)
         'texture': 'assets/textures/leaf.png',
     },
+    
+    'sand': {
+        'name': 'Песок',
+        'breakable': True,
+        'solid': True,
+        'gravity': True,  # Падает вниз, если под ним пусто (без текстуры - рисуется цветом)
+    },
+    
+    'gravel': {
+        'name': 'Гравий',
+        'breakable': True,
+        'solid': True,
+        'gravity': True,
+    },
+    
+    'torch': {
+        'name': 'Факел',
+        'breakable': True,
+        'solid': False,
+        'light': 14,  # Яркость света от блока (от 0 до 15; 15 - как дневное небо)
+    },
 
     # Можно добавить новые блоки со своими параметрами. Например:
     # 'brick': {
@@ -52,5 +73,7 @@ BLOCKS = { # Определяется список блоков
     #     'breakable': True,
     #     'solid': True,
     #     'texture': 'path/to/file.png',
+    #     'gravity': False, # Падает ли блок, если под ним пусто (как песок)
+    #     'light': 0, # Светится ли блок (от 0 до 15)
     # }
 }
\ No newline at end of file
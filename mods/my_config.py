@@ -17,10 +17,81 @@ GAME_CONFIG = {
     # Размер мира в блоках
     'WORLD_WIDTH': 100,   # Ширина мира в блоках
     'WORLD_HEIGHT': 50,   # Высота мира в блоках
+    'INFINITE_WORLD': False, # Бесконечный мир по горизонтали (WORLD_WIDTH тогда не используется)
+    'WORLD_MEMORY_MB': 64, # Сколько памяти (в мегабайтах) может занимать загруженная часть бесконечного мира
+    
+    # Сохранение (F5 - сохранить вручную; при выходе игра сохраняется сама)
+    'SAVE_FILE': 'world.save', # Файл сохранения (None - не сохранять игру)
+    'AUTOSAVE_SECONDS': 60, # Как часто сохранять игру автоматически (0 - не сохранять)
+    'RECORD_INPUT': None, # Файл для записи ввода игрока (повтор: python3 benchmark.py --replay файл); игра тогда начинается с нового мира и не сохраняется, сетевая игра не записывается
+    
+    # Игра по сети (сервер: python3 server.py)
+    'SERVER': None,       # Адрес сервера 'хост:порт', например '127.0.0.1:5000' (None - играть одному)
+    'SERVER_PORT': 5000,  # Порт, на котором server.py ждет игроков
+    'SERVER_SAVE_FILE': 'server_world.save', # Файл, в котором server.py хранит общий мир (None - не сохранять)
+    'NET_TICK_HZ': 20,    # Сколько раз в секунду сервер рассылает изменения мира и позиции игроков
+    'REMOTE_PLAYER_COLOR': (70, 110, 200), # Цвет других игроков
+    
+    # Генерация мира
+    'WORLD_SEED': 12345,  # Зерно генерации: одно и то же число - один и тот же мир (None - каждый раз новый мир)
+    'TERRAIN_AMPLITUDE': 4, # Высота холмов в блоках (0 - плоский мир)
+    'CAVES': True,        # Есть ли под землей пещеры
+    'TREE_CHANCE': 0.5,   # Насколько часто растут деревья (от 0 до 1)
+    'LAZY_WORLDGEN': True, # Генерировать части мира только тогда, когда они впервые понадобятся (быстрый запуск)
+    'WORLDGEN_WORKERS': None, # Сколько процессов генерирует большой мир (None - по числу ядер процессора)
+    'PARALLEL_WORLDGEN_CELLS': 4000000, # С какого размера мира (в клетках) включать генерацию в нескольких процессах (при LAZY_WORLDGEN = False)
     
     # Физика мира
     'GRAVITY': 0.8,       # Сила гравитации - чем больше значение, тем сильнее притягивает к земле
     'FPS': 60,            # Кадры в секунду
+    'PHYSICS_HZ': 120,    # Шагов физики в секунду (не зависит от FPS; скорости везде заданы как при 60 кадрах в секунду)
+    'MAX_PHYSICS_STEPS': 8, # Сколько шагов физики можно "догнать" за один медленный кадр
+    'BLOCK_TICK_HZ': 20,  # Скорость падения песка и гравия (клеток в секунду)
+    'BLOCK_UPDATES_PER_TICK': 2048, # Сколько падающих блоков можно сдвинуть за один тик (остальные подождут)
+    
+    # Правка мира участками (fill_region, replace_region, paste_region в GameEngine)
+    'UNDO_LIMIT': 32,     # Сколько последних правок участков можно отменить
+    
+    # Мобы (ходят по миру, упершись в стену - прыгают; просчитываются только рядом с экраном)
+    'MOB_COUNT': 0,       # Сколько мобов появляется вокруг игрока при запуске
+    'MOB_SPEED': 2,       # Скорость ходьбы мобов в пикселях за кадр
+    'MOB_JUMP_POWER': 12, # Сила прыжка мобов
+    'MOB_COLOR': (90, 160, 70), # Цвет мобов (R, G, B)
+    'MOB_SIM_DISTANCE': 32, # На сколько блоков за краями экрана мобы еще двигаются (дальше - замирают)
+    'NAV_BUDGET_MS': 2,   # Сколько миллисекунд за кадр можно тратить на поиск путей для мобов
+    'NAV_CACHE_SIZE': 256, # Сколько найденных путей помнить
+    'NAV_CACHE_MB': 8,    # Сколько памяти (в мегабайтах) можно занять графом навигации (узлами полос)
+    'BLOCK_INDEX_MB': 4,  # Сколько памяти (в мегабайтах) можно занять счетчиками индекса блоков
+    
+    # Отрисовка мира кусками (чанками)
+    'CHUNK_SIZE': 16,     # Размер чанка в блоках (16 x 16) - чанк рисуется один раз и потом просто копируется на экран
+    'CHUNK_CACHE_MB': 64, # Сколько памяти (в мегабайтах) можно занять готовыми картинками чанков
+    'TEXTURE_CACHE_DIR': '.texture_cache', # Папка для готовых (уже уменьшенных) текстур (None - без кэша)
+    'TEXTURE_WORKERS': None, # Сколько потоков загружают текстуры (None - по числу ядер процессора)
+    
+    # Масштаб камеры (колесо мыши или +/- - приблизить/отдалить, 0 - обычный масштаб)
+    'ZOOM_MIN': None,     # Самое сильное отдаление (0.5 - блоки вдвое меньше; None - пока мир не поместится на экран по ширине)
+    'ZOOM_MAX': 2,        # Самое сильное приближение
+    'ZOOM_STEP': 1.5,     # Во сколько раз меняется масштаб за одно нажатие
+    'LOD_BLOCK_PIXELS': 6, # Если блок на экране меньше стольких пикселей, мир рисуется уменьшенными картинками (цветом блоков)
+    'LOD_CACHE_MB': 16,   # Сколько памяти (в мегабайтах) можно занять уменьшенными картинками мира
+    
+    # Освещение: свет неба и светящихся блоков (пещеры и глубина становятся темными)
+    'LIGHTING': True,     # Включить освещение
+    'MAX_DARKNESS': 210,  # Насколько темна клетка совсем без света (0 - не затемнять, 255 - черная)
+    'LIGHT_CACHE_MB': 16, # Сколько памяти (в мегабайтах) можно занять картами света
+    
+    # Миникарта в правом верхнем углу (M - показать/скрыть)
+    'MINIMAP': True,      # Показывать ли миникарту при запуске
+    'MINIMAP_BLOCKS': 128, # Сколько столбцов мира вокруг игрока видно на миникарте
+    'MINIMAP_ROWS': 64,   # Сколько строк мира вокруг игрока видно на миникарте (высокий мир не растягивает её на весь экран)
+    'MINIMAP_SCALE': 2,   # Сколько пикселей экрана занимает один блок на миникарте
+    
+    # Как часто (в миллисекундах) обновлять координаты и FPS в углах экрана
+    'HUD_STATS_INTERVAL': 250,
+    
+    # Профилировщик: показывает, сколько времени занимает каждый этап кадра (включается и выключается клавишей F3)
+    'PROFILER': False,
     
     # Цвет неба (R, G, B) - Red (Красный), Green (Зеленый), Blue (Синий)
     # Можно выбрать свой цвет в палитре. Например, здесь - https://csscolor.ru
@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+from game.network import GameServer
+from game.world import BlockRegistry
+from mods.my_config import GAME_CONFIG
+from mods.my_blocks import BLOCKS
+
+# Сервер для игры по сети: хранит общий мир и пересылает игрокам изменения.
+# Запуск: python3 server.py --port 5000
+# Игроки подключаются, указав в mods/my_config.py 'SERVER': 'адрес_сервера:5000'
+# Общий мир хранится в SERVER_SAVE_FILE (или в файле --save) и переживает перезапуск сервера
+
+async def serve(args):
+    server = GameServer(GAME_CONFIG, BlockRegistry(BLOCKS), GAME_CONFIG.get('NET_TICK_HZ', 20), args.save)
+    port = await server.start(args.host, args.port)
+    print(f"Сервер запущен на {args.host}:{port}, зерно мира {server.world_info['WORLD_SEED']}")
+    try:
+        await asyncio.Event().wait() # Работаем, пока сервер не остановят (Ctrl+C)
+    finally:
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер для игры по сети')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес, на котором ждать игроков (0.0.0.0 - все адреса)')
+    parser.add_argument('--port', type=int, default=GAME_CONFIG.get('SERVER_PORT', 5000), help='Порт')
+    parser.add_argument('--save', default=GAME_CONFIG.get('SERVER_SAVE_FILE'), help='Файл общего мира')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file